@@ -1,8 +1,12 @@
 """Callbacks for tracking LLM usage and costs"""
 
+from contextvars import Token
 from typing import Any
+from uuid import UUID
 from langchain.callbacks.base import BaseCallbackHandler
+from langchain_core.agents import AgentAction
 from langchain_core.outputs import LLMResult
+from app.core.tracing import Span, NonRecordingSpan, restore_span, start_span, use_span
 from app.domain.schemas import UsageStats
 
 
@@ -33,6 +37,14 @@ MODEL_PRICING = {
 }
 
 
+def format_action(index: int, tool_name: str, tool_input: Any) -> str:
+    """Format a tool call for the actions_taken list, e.g. "1. create_todo(title=Milk)"""
+    if isinstance(tool_input, dict):
+        input_str = ", ".join([f"{k}={v}" for k, v in tool_input.items() if v])
+        return f"{index}. {tool_name}({input_str})"
+    return f"{index}. {tool_name}({tool_input})"
+
+
 class TokenTrackingCallback(BaseCallbackHandler):
     """Callback handler to track token usage and costs"""
     
@@ -81,3 +93,68 @@ class TokenTrackingCallback(BaseCallbackHandler):
         )
 
 
+class ProgressTrackingCallback(TokenTrackingCallback):
+    """Tracks usage and the actions taken so far, for reporting progress of a running agent"""
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        self.actions: list[str] = []
+
+    def on_agent_action(self, action: AgentAction, **kwargs: Any) -> None:
+        """Called when the agent decides to call a tool"""
+        self.actions.append(format_action(len(self.actions) + 1, action.tool, action.tool_input))
+
+
+class TracingCallback(BaseCallbackHandler):
+    """
+    Records a span for each LLM call and tool call of an agent run
+
+    Runs inline (in the agent's own context) so a tool's span is current
+    while the tool runs, and its TodoService and SQL spans nest under it.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans: dict[UUID, tuple[Span | NonRecordingSpan, Token | None]] = {}
+
+    def on_llm_start(
+        self, serialized: dict[str, Any], prompts: list[str], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        model = (serialized or {}).get("kwargs", {}).get("model_name")
+        attributes = {"llm.model": model} if model else {}
+        self._spans[run_id] = (start_span("llm", kind="client", attributes=attributes), None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span, _ = self._spans.get(run_id, (None, None))
+        if span is not None and response.llm_output and "token_usage" in response.llm_output:
+            usage = response.llm_output["token_usage"]
+            span.set_attribute("llm.prompt_tokens", usage.get("prompt_tokens", 0))
+            span.set_attribute("llm.completion_tokens", usage.get("completion_tokens", 0))
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(
+        self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        name = (serialized or {}).get("name", "tool")
+        span = start_span(f"tool {name}", attributes={"tool.name": name, "tool.input": input_str[:500]})
+        self._spans[run_id] = (span, use_span(span) if span.recording else None)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        span, token = self._spans.pop(run_id, (None, None))
+        if span is None:
+            return
+        if token is not None:
+            restore_span(token)
+        if error is not None:
+            span.set_error(error)
+        span.end()
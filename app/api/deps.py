@@ -2,22 +2,57 @@
 Dependency injection for API routes
 """
 
+from datetime import timedelta
 from functools import lru_cache
 from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.db.session import get_db
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal, get_db
+from app.db.unit_of_work import SessionPerCall, UnitOfWork
+from app.repositories.agent_job_repository import AgentJobRepository
+from app.repositories.todo_event_repository import TodoEventRepository
 from app.repositories.todo_repository import TodoRepository
 from app.services.todo_service import TodoService
+from app.services.run_read_cache import RunReadCache
+from app.services.duplicate_index import get_duplicate_index
+from app.services.todo_cache import get_todo_cache
+from app.services.todo_index import get_todo_index
+from app.services.sync_service import TodoSyncService
 from app.services.agent_service import AgentService
-from app.tools.todo_tools import build_todo_tools
-from app.agents.executor import build_agent_executor
+from app.services.agent_job_service import AgentJobService
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Dependency for opening sessions whose lifetime the caller manages,
+    e.g. a streaming response that keeps reading after the handler returns
+    """
+    return AsyncSessionLocal
 
 
 def get_todo_service(db: AsyncSession = Depends(get_db)) -> TodoService:
     """Dependency for getting TodoService"""
     repo = TodoRepository(db)
-    return TodoService(repo)
+    return TodoService(
+        repo, cache=get_todo_cache(), index=get_todo_index(), duplicates=get_duplicate_index()
+    )
+
+
+def get_sync_service(db: AsyncSession = Depends(get_db)) -> TodoSyncService:
+    """Dependency for getting TodoSyncService"""
+    settings = get_settings()
+    return TodoSyncService(
+        TodoRepository(db),
+        TodoEventRepository(db),
+        settle=timedelta(seconds=settings.SYNC_SETTLE_SECONDS),
+        retention=timedelta(hours=settings.CHANGE_FEED_RETENTION_HOURS),
+    )
+
+
+def get_agent_job_service(db: AsyncSession = Depends(get_db)) -> AgentJobService:
+    """Dependency for getting AgentJobService"""
+    return AgentJobService(AgentJobRepository(db))
 
 
 @lru_cache
@@ -32,15 +67,31 @@ def get_agent_executor_cached():
 
 
 async def get_agent_service(
-    todo_service: TodoService = Depends(get_todo_service)
+    db: AsyncSession = Depends(get_db),
+    todo_service: TodoService = Depends(get_todo_service),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory)
 ) -> AgentService:
     """
     Dependency for getting AgentService with tools
     
     Note: This creates a new agent executor for each request with the
-    current database session's TodoService
+    current database session's TodoService. With AGENT_TRANSACTION_MODE
+    "tool" (the default) each tool call runs on a short-lived session of its
+    own, so no connection is held while the agent waits on the LLM; with
+    "run" all tool calls share the request session's transaction through a
+    UnitOfWork.
     """
-    tools = build_todo_tools(todo_service)
-    agent_executor = build_agent_executor(tools)
-    return AgentService(agent_executor)
+    # LangChain is imported on first use, not when the app starts
+    from app.tools.todo_tools import build_todo_tools
+    from app.agents.executor import build_agent_executor
 
+    reads = RunReadCache(todo_service)
+    mode = get_settings().AGENT_TRANSACTION_MODE
+    if mode == "tool":
+        sessions = SessionPerCall(session_factory, [todo_service.repo])
+        agent_executor = build_agent_executor(build_todo_tools(todo_service, reads, sessions))
+        return AgentService(agent_executor, read_cache=reads)
+    if mode == "run":
+        agent_executor = build_agent_executor(build_todo_tools(todo_service, reads))
+        return AgentService(agent_executor, unit_of_work=UnitOfWork(db), read_cache=reads)
+    raise ValueError(f"Unknown AGENT_TRANSACTION_MODE '{mode}'")
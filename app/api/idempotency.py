@@ -0,0 +1,398 @@
+"""
+Idempotency-Key support for non-idempotent POST endpoints
+
+A client that sends `Idempotency-Key: <unique value>` can safely retry the
+request: the first request's response is stored and replayed for every
+retry with the same key, and a retry that arrives while the first request
+is still running waits for it instead of running the work again.
+
+Keys are scoped to the method and path. A retry whose body differs from the
+original is rejected with 422. Only deterministic outcomes are stored: 2xx
+and most 4xx responses; after a 5xx or a crash the key is released so the
+client can retry for real.
+"""
+
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import lru_cache
+from typing import Iterable
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.domain.models import IdempotencyRecord
+from app.utils.datetime import utc_now
+
+logger = get_logger(__name__)
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+# Larger responses are not stored (the key is released instead)
+MAX_STORED_BODY_BYTES = 1024 * 1024
+# Transient 4xx outcomes that a retry should not get replayed
+UNSTORED_CLIENT_ERRORS = {408, 409, 425, 429}
+
+PENDING = "pending"
+COMPLETED = "completed"
+
+
+@dataclass(slots=True)
+class StoredResponse:
+    status: str
+    fingerprint: str | None = None
+    status_code: int | None = None
+    headers: list[tuple[bytes, bytes]] | None = None
+    body: bytes | None = None
+
+
+class IdempotencyStore:
+    """Base class for idempotency result stores"""
+
+    async def claim(self, key: str) -> StoredResponse | None:
+        """
+        Atomically claim key for a new request
+
+        Returns None when the caller now owns the key, otherwise the
+        existing (pending or completed) record.
+        """
+        raise NotImplementedError
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        """Store the response of the request that claimed key"""
+        raise NotImplementedError
+
+    async def release(self, key: str) -> None:
+        """Give up a claim without storing a response"""
+        raise NotImplementedError
+
+    async def wait(self, key: str, timeout: float) -> StoredResponse | None:
+        """
+        Wait for a pending key to complete
+
+        Returns the completed record, the still pending record on timeout,
+        or None when the key was released.
+        """
+        raise NotImplementedError
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process store; retries must reach the same worker"""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, record); insertion order is expiry order
+        self._records: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+        self._done: dict[str, asyncio.Event] = {}
+
+    def _purge(self) -> None:
+        now = asyncio.get_running_loop().time()
+        while self._records:
+            key, (expires_at, record) = next(iter(self._records.items()))
+            if expires_at > now or record.status == PENDING:
+                break
+            del self._records[key]
+
+    async def claim(self, key: str) -> StoredResponse | None:
+        self._purge()
+        entry = self._records.get(key)
+        if entry is not None and entry[0] > asyncio.get_running_loop().time():
+            return entry[1]
+        self._set(key, StoredResponse(status=PENDING))
+        self._done[key] = asyncio.Event()
+        return None
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        self._set(key, response)
+        self._finish(key)
+
+    async def release(self, key: str) -> None:
+        self._records.pop(key, None)
+        self._finish(key)
+
+    async def wait(self, key: str, timeout: float) -> StoredResponse | None:
+        done = self._done.get(key)
+        if done is not None:
+            try:
+                await asyncio.wait_for(done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        entry = self._records.get(key)
+        return entry[1] if entry else None
+
+    def _set(self, key: str, record: StoredResponse) -> None:
+        self._records.pop(key, None)
+        expires_at = asyncio.get_running_loop().time() + self.ttl_seconds
+        self._records[key] = (expires_at, record)
+
+    def _finish(self, key: str) -> None:
+        done = self._done.pop(key, None)
+        if done is not None:
+            done.set()
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Store backed by the idempotency_keys table, shared by every worker"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ttl_seconds: float,
+        pending_timeout_seconds: float,
+        poll_interval: float = 0.25,
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.pending_timeout = timedelta(seconds=pending_timeout_seconds)
+        self.poll_interval = poll_interval
+
+    async def claim(self, key: str) -> StoredResponse | None:
+        now = utc_now()
+        async with self.session_factory() as session:
+            # Expired records and abandoned claims no longer hold the key
+            await session.execute(
+                delete(IdempotencyRecord).where(
+                    IdempotencyRecord.key == key,
+                    or_(
+                        IdempotencyRecord.expires_at < now,
+                        and_(
+                            IdempotencyRecord.status == PENDING,
+                            IdempotencyRecord.created_at < now - self.pending_timeout,
+                        ),
+                    ),
+                )
+            )
+            session.add(IdempotencyRecord(
+                key=key, status=PENDING, created_at=now, expires_at=now + self.ttl
+            ))
+            try:
+                await session.commit()
+                return None
+            except IntegrityError:
+                await session.rollback()
+            return await self._get(session, key)
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        async with self.session_factory() as session:
+            record = await session.get(IdempotencyRecord, key)
+            if record is None:
+                return
+            record.status = COMPLETED
+            record.fingerprint = response.fingerprint
+            record.status_code = response.status_code
+            record.headers = json.dumps(
+                [[name.decode("latin-1"), value.decode("latin-1")] for name, value in response.headers]
+            )
+            record.body = response.body
+            await session.commit()
+
+    async def release(self, key: str) -> None:
+        async with self.session_factory() as session:
+            await session.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+            await session.commit()
+
+    async def wait(self, key: str, timeout: float) -> StoredResponse | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            async with self.session_factory() as session:
+                record = await self._get(session, key)
+            if record is None or record.status == COMPLETED or loop.time() >= deadline:
+                return record
+            await asyncio.sleep(self.poll_interval)
+
+    async def _get(self, session: AsyncSession, key: str) -> StoredResponse | None:
+        result = await session.execute(
+            select(IdempotencyRecord)
+            .where(IdempotencyRecord.key == key)
+            .execution_options(populate_existing=True)
+        )
+        record = result.scalar_one_or_none()
+        if record is None:
+            return None
+        headers = None
+        if record.headers:
+            headers = [
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in json.loads(record.headers)
+            ]
+        return StoredResponse(
+            status=record.status,
+            fingerprint=record.fingerprint,
+            status_code=record.status_code,
+            headers=headers,
+            body=record.body,
+        )
+
+
+@lru_cache
+def get_idempotency_store() -> IdempotencyStore:
+    """Get the process-wide idempotency store configured by IDEMPOTENCY_BACKEND"""
+    settings = get_settings()
+    if settings.IDEMPOTENCY_BACKEND == "memory":
+        return InMemoryIdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS)
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        from app.db.session import AsyncSessionLocal
+
+        return DatabaseIdempotencyStore(
+            AsyncSessionLocal,
+            ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+            pending_timeout_seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS,
+        )
+    raise ValueError(f"Unknown IDEMPOTENCY_BACKEND '{settings.IDEMPOTENCY_BACKEND}'")
+
+
+def _should_store(status_code: int) -> bool:
+    if 200 <= status_code < 300:
+        return True
+    return 400 <= status_code < 500 and status_code not in UNSTORED_CLIENT_ERRORS
+
+
+class IdempotencyMiddleware:
+    """
+    ASGI middleware applying Idempotency-Key handling to POSTs on the given paths
+
+    The request body is hashed as the endpoint reads it (bulk imports are not
+    buffered); the response is buffered to be stored.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        store: IdempotencyStore | None = None,
+        wait_seconds: float | None = None,
+    ):
+        self.app = app
+        self.paths = {path.rstrip("/") for path in paths}
+        self._store = store
+        self.wait_seconds = wait_seconds
+
+    @property
+    def store(self) -> IdempotencyStore:
+        return self._store or get_idempotency_store()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"].rstrip("/")
+        key = dict(scope["headers"]).get(IDEMPOTENCY_HEADER)
+        if path not in self.paths or key is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_error(send, 400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            return
+
+        store_key = f"POST {path} {key}"
+        hasher = hashlib.sha256(f"{path}?{scope.get('query_string', b'').decode()}\n".encode())
+
+        existing = await _claim(self.store, store_key)
+        if existing is not None:
+            await self._replay(store_key, existing, hasher, receive, send)
+            return
+
+        await self._run(store_key, hasher, scope, receive, send)
+
+    async def _run(self, store_key, hasher, scope: Scope, receive: Receive, send: Send) -> None:
+        body_complete = False
+        status_code = 500
+        headers: list = []
+        chunks: list[bytes] = []
+        size = 0
+
+        async def hashing_receive() -> Message:
+            nonlocal body_complete
+            message = await receive()
+            if message["type"] == "http.request":
+                hasher.update(message.get("body", b""))
+                body_complete = not message.get("more_body", False)
+            return message
+
+        async def capturing_send(message: Message) -> None:
+            nonlocal status_code, headers, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and size <= MAX_STORED_BODY_BYTES:
+                body = message.get("body", b"")
+                size += len(body)
+                chunks.append(body)
+            await send(message)
+
+        try:
+            await self.app(scope, hashing_receive, capturing_send)
+        except BaseException:
+            await self.store.release(store_key)
+            raise
+
+        if not _should_store(status_code) or size > MAX_STORED_BODY_BYTES:
+            await self.store.release(store_key)
+            return
+        await self.store.complete(store_key, StoredResponse(
+            status=COMPLETED,
+            # The endpoint stopped reading early (e.g. rejected the body): no check
+            fingerprint=hasher.hexdigest() if body_complete else None,
+            status_code=status_code,
+            headers=headers,
+            body=b"".join(chunks),
+        ))
+
+    async def _replay(self, store_key, record, hasher, receive: Receive, send: Send) -> None:
+        # Hash the retry's body to make sure it is the same request
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            hasher.update(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        if record.status == PENDING:
+            wait_seconds = self.wait_seconds
+            if wait_seconds is None:
+                wait_seconds = get_settings().IDEMPOTENCY_WAIT_SECONDS
+            record = await self.store.wait(store_key, wait_seconds)
+            if record is None or record.status == PENDING:
+                # Original failed (key released) or is still running
+                await _send_error(
+                    send, 409, "A request with this Idempotency-Key is in progress or failed; retry",
+                    retry_after=True,
+                )
+                return
+
+        if record.fingerprint is not None and record.fingerprint != hasher.hexdigest():
+            await _send_error(send, 422, "Idempotency-Key was already used for a different request")
+            return
+
+        headers = [(name, value) for name, value in record.headers or [] if name != REPLAYED_HEADER]
+        headers.append((REPLAYED_HEADER, b"true"))
+        await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": record.body or b""})
+
+
+async def _claim(store: IdempotencyStore, key: str) -> StoredResponse | None:
+    try:
+        return await store.claim(key)
+    except Exception as e:
+        # Idempotency is best effort: never fail the write because the store is down
+        logger.error(f"Idempotency store unavailable, running request without it: {e}")
+        return None
+
+
+async def _send_error(send: Send, status_code: int, detail: str, retry_after: bool = False) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    if retry_after:
+        headers.append((b"retry-after", b"1"))
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,123 @@
+"""
+Fast JSON responses for large todo listings
+
+Serializes rows (ORM objects, snapshots or projected rows) straight to JSON
+bytes with orjson, skipping per-item Pydantic validation, and compresses
+large bodies with brotli or gzip according to Accept-Encoding. orjson and
+brotli are optional; without them the stdlib json encoder and gzip are used.
+"""
+
+import gzip
+import json
+from datetime import datetime
+from enum import Enum
+from fastapi import Response
+from app.domain.schemas import TodoRead
+from app.utils.constants import COMPRESSION_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Fields a client may select with ?fields=, in response order
+TODO_FIELDS = tuple(TodoRead.model_fields)
+
+
+def parse_fields(value: str | None) -> tuple[str, ...] | None:
+    """
+    Parse a comma separated ?fields= value into TodoRead field names
+
+    Returns None for "all fields". The id is always included. Raises
+    ValueError naming any unknown field.
+    """
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = requested - set(TODO_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(TODO_FIELDS)}"
+        )
+    requested.add("id")
+    return tuple(name for name in TODO_FIELDS if name in requested)
+
+
+def _default(value):
+    # Matches Pydantic's JSON output for the types a todo row holds
+    if isinstance(value, datetime):
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(content) -> bytes:
+    """Encode content as compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+    return json.dumps(content, default=_default, separators=(",", ":")).encode()
+
+
+def todo_dicts(rows, fields: tuple[str, ...] | None = None) -> list[dict]:
+    """Plain dicts of the given fields (all TodoRead fields by default) of todo rows"""
+    names = fields or TODO_FIELDS
+    return [{name: getattr(row, name) for name in names} for row in rows]
+
+
+def serialize_todos(rows, fields: tuple[str, ...] | None = None) -> bytes:
+    """Encode todo rows as a JSON array of objects with the given fields"""
+    return dump_json(todo_dicts(rows, fields))
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    def wants(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and wants("br"):
+        return "br"
+    if wants("gzip"):
+        return "gzip"
+    return None
+
+
+def json_response(
+    body: bytes,
+    accept_encoding: str | None = None,
+    status_code: int = 200,
+    headers: dict | None = None,
+) -> Response:
+    """Build a JSON response, compressing bodies of COMPRESSION_MIN_BYTES or more"""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = negotiate_encoding(accept_encoding) if len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        content=body, status_code=status_code, media_type="application/json", headers=headers
+    )
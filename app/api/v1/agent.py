@@ -2,10 +2,13 @@
 AI agent endpoints for natural language todo operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.deps import get_agent_service
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from app.api.deps import get_agent_job_service, get_agent_service
+from app.domain.models import AgentJob
+from app.services.agent_job_service import AgentJobService
 from app.services.agent_service import AgentService
-from app.domain.schemas import AgentRequest, AgentResponse
+from app.domain.schemas import AgentJobRead, AgentRequest, AgentResponse, UsageStats
 from app.utils.exceptions import AgentExecutionError
 
 router = APIRouter(prefix="/agent", tags=["AI Agent"])
@@ -39,3 +42,53 @@ async def query_agent(
             detail=f"Unexpected error: {str(e)}"
         )
 
+
+def job_read(job: AgentJob) -> AgentJobRead:
+    """Convert a stored job (JSON progress columns) to its response schema"""
+    return AgentJobRead(
+        id=job.id,
+        status=job.status,
+        query=job.query,
+        attempts=job.attempts,
+        actions_taken=json.loads(job.actions),
+        response=job.response,
+        usage=UsageStats.model_validate_json(job.usage) if job.usage else None,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/jobs", response_model=AgentJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def submit_agent_job(
+    request: AgentRequest,
+    http_request: Request,
+    response: Response,
+    job_service: AgentJobService = Depends(get_agent_job_service)
+):
+    """
+    Queue a natural language query and return immediately
+
+    Poll the returned job (see the Location header) until its status is
+    "succeeded" or "failed". Use this instead of /query for runs that may
+    outlast proxy or client timeouts.
+    """
+    job = await job_service.submit(request.query)
+    response.headers["Location"] = str(http_request.url_for("get_agent_job", job_id=job.id))
+    return job_read(job)
+
+
+@router.get("/jobs/{job_id}", response_model=AgentJobRead)
+async def get_agent_job(
+    job_id: str,
+    job_service: AgentJobService = Depends(get_agent_job_service)
+):
+    """Get a job's status, the actions taken so far, usage and, once finished, its result"""
+    job = await job_service.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Agent job {job_id} not found"
+        )
+    return job_read(job)
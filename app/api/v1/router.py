@@ -3,11 +3,29 @@ API v1 router aggregator
 """
 
 from fastapi import APIRouter
-from app.api.v1 import todos, agent
+from app.core.config import get_settings
 
-api_router = APIRouter()
+APP_ROLES = ("all", "rest", "agent")
 
-# Include all v1 routers
-api_router.include_router(todos.router)
-api_router.include_router(agent.router)
 
+def build_api_router(role: str) -> APIRouter:
+    """
+    Router with the endpoints a deployment role serves
+
+    Endpoint modules are imported here, so a "rest" deployment never loads
+    the agent stack.
+    """
+    if role not in APP_ROLES:
+        raise ValueError(f"Unknown APP_ROLE '{role}', expected one of {', '.join(APP_ROLES)}")
+
+    api_router = APIRouter()
+    if role in ("all", "rest"):
+        from app.api.v1 import todos
+        api_router.include_router(todos.router)
+    if role in ("all", "agent"):
+        from app.api.v1 import agent
+        api_router.include_router(agent.router)
+    return api_router
+
+
+api_router = build_api_router(get_settings().APP_ROLE)
@@ -2,53 +2,361 @@
 REST API endpoints for todo CRUD operations
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.api.deps import get_todo_service
+import json
+import time
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.deps import get_session_factory, get_sync_service, get_todo_service
+from app.api.responses import (
+    TODO_FIELDS,
+    dump_json,
+    json_response,
+    parse_fields,
+    serialize_todos,
+    todo_dicts,
+)
+from app.core.config import get_settings
+from app.repositories.todo_repository import TodoRepository
+from app.services.change_feed import ChangeFeed, get_change_feed
+from app.services.sync_service import TodoSyncService, sync_columns
 from app.services.todo_service import TodoService
-from app.domain.schemas import TodoCreate, TodoUpdate, TodoRead
+from app.domain.schemas import (
+    TodoCreate,
+    TodoDuplicateCluster,
+    TodoDuplicateReport,
+    TodoImportResult,
+    TodoRead,
+    TodoSyncPage,
+    TodoUpdate,
+)
+from app.utils.constants import (
+    DUPLICATE_MIN_SIMILARITY,
+    EXPORT_BATCH_SIZE,
+    IMPORT_BATCH_SIZE,
+    MAX_SYNC_PAGE_SIZE,
+    SYNC_PAGE_SIZE,
+)
+from app.utils.etag import etag_matches, todo_etag
+from app.utils.exceptions import (
+    DuplicateDetectionDisabledError,
+    InvalidSyncCursorError,
+    SyncCursorExpiredError,
+    TodoConflictError,
+    TodoPreconditionFailedError,
+)
+from app.utils.todo_io import (
+    EXPORT_FORMATS,
+    encode_csv,
+    encode_ndjson,
+    iter_csv_records,
+    iter_ndjson_records,
+)
 
 router = APIRouter(prefix="/todos", tags=["Todos"])
 
 
+def not_modified(etag: str, vary: str | None = None) -> Response:
+    """Empty 304 response carrying the current ETag (and the Vary of the full response)"""
+    headers = {"ETag": etag}
+    if vary is not None:
+        headers["Vary"] = vary
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
 @router.post("/", response_model=TodoRead, status_code=status.HTTP_201_CREATED)
 async def create_todo(
     data: TodoCreate,
+    response: Response,
     service: TodoService = Depends(get_todo_service)
 ):
     """Create a new todo item"""
     todo = await service.create_todo(data)
+    response.headers["ETag"] = todo_etag(todo)
     return todo
 
 
 @router.get("/", response_model=list[TodoRead])
 async def list_todos(
     completed: bool | None = None,
+    fields: str | None = Query(None, description="Comma separated TodoRead fields to return"),
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
     service: TodoService = Depends(get_todo_service)
 ):
     """
     List todos, optionally filtered by completion status
-    
+
     - **completed**: Filter by completion status (true/false), or omit for all
+    - **fields**: Only return these fields (e.g. `id,title,completed`); the id is always included
+
+    Responses carry an ETag; send it back in If-None-Match to get an empty
+    304 when nothing has changed. Large responses are compressed with
+    brotli or gzip when the client accepts it.
+    """
+    try:
+        selected = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    etag = await service.get_list_etag(completed, selected)
+    if etag_matches(if_none_match, etag, weak=True):
+        # Caches pair the 304 with the stored 200, which varies by encoding
+        return not_modified(etag, vary="Accept-Encoding")
+
+    todos = await service.list_fields(selected or TODO_FIELDS, completed)
+
+    # Rows are encoded directly; response_model only documents the schema
+    return json_response(
+        serialize_todos(todos, selected),
+        accept_encoding=accept_encoding,
+        headers={"ETag": etag},
+    )
+
+
+@router.get("/sync", response_model=TodoSyncPage)
+async def sync_todos(
+    since: str | None = Query(None, description="Cursor returned by the previous sync"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=MAX_SYNC_PAGE_SIZE),
+    accept_encoding: str | None = Header(None),
+    service: TodoSyncService = Depends(get_sync_service)
+):
+    """
+    Delta sync: todos changed and ids deleted since a cursor
+
+    Omit **since** for the first sync. Store the returned cursor and pass it
+    next time; while has_more is true, call again right away with the new
+    cursor. Changes from the last minute may be sent again, so apply them
+    as upserts. 410 Gone means the client must reload all todos.
+    """
+    if not get_settings().CHANGE_FEED_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Delta sync needs the change feed (CHANGE_FEED_ENABLED)"
+        )
+    try:
+        page = await service.sync(since, sync_columns(TODO_FIELDS), limit)
+    except InvalidSyncCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except SyncCursorExpiredError as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e))
+
+    return json_response(
+        dump_json({
+            "changed": todo_dicts(page.changed),
+            "deleted": page.deleted,
+            "cursor": page.cursor.encode(),
+            "has_more": page.has_more,
+        }),
+        accept_encoding=accept_encoding,
+    )
+
+
+@router.get("/export")
+async def export_todos(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory)
+):
+    """
+    Stream every todo as NDJSON (one object per line) or CSV
+
+    Rows are read through a server-side cursor and written out batch by
+    batch, so memory use does not grow with the number of todos.
     """
-    if completed is not None:
-        todos = await service.get_by_completed(completed)
-    else:
-        todos = await service.list_todos()
-    return todos
+    async def body():
+        # The response outlives the handler, so the stream owns its session
+        async with session_factory() as session:
+            service = TodoService(TodoRepository(session))
+            if format == "csv":
+                yield encode_csv([], header=True)
+            async for batch in service.export_batches(EXPORT_BATCH_SIZE):
+                yield encode_csv(batch) if format == "csv" else encode_ndjson(batch)
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="todos.{format}"'},
+    )
+
+
+@router.post("/import", response_model=TodoImportResult)
+async def import_todos(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    keep_ids: bool = False,
+    skip_duplicates: bool = False,
+    service: TodoService = Depends(get_todo_service)
+):
+    """
+    Bulk import todos from an NDJSON or CSV request body (as produced by /export)
+
+    - **keep_ids**: Keep the ids from the file (restoring a backup) instead of assigning new ones
+    - **skip_duplicates**: Skip records that nearly duplicate an existing todo or an earlier record
+      (501 without DUPLICATE_DETECTION_ENABLED)
+
+    The import is all-or-nothing; Postgres loads rows with COPY.
+    """
+    parse = iter_csv_records if format == "csv" else iter_ndjson_records
+    start = time.perf_counter()
+    try:
+        duplicates = await service.duplicate_filter() if skip_duplicates else None
+    except DuplicateDetectionDisabledError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    try:
+        imported = await service.import_records(
+            parse(request.stream()),
+            batch_size=IMPORT_BATCH_SIZE,
+            keep_ids=keep_ids,
+            duplicates=duplicates,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import conflicts with existing todos (duplicate ids?)"
+        )
+    seconds = time.perf_counter() - start
+    return TodoImportResult(
+        imported=imported,
+        skipped=duplicates.skipped if duplicates is not None else 0,
+        seconds=round(seconds, 3),
+        rows_per_second=round(imported / seconds, 1) if seconds else 0.0,
+    )
+
+
+@router.get("/duplicates", response_model=TodoDuplicateReport)
+async def duplicate_todos(
+    min_similarity: float = Query(DUPLICATE_MIN_SIMILARITY, ge=0.5, le=1.0),
+    limit: int = Query(100, ge=1, le=1000),
+    service: TodoService = Depends(get_todo_service)
+):
+    """
+    Report clusters of near-duplicate todos, largest first
+
+    - **min_similarity**: Estimated similarity (shared character shingles of
+      title and description) from which two todos count as duplicates
+    - **limit**: Maximum number of clusters returned
+
+    Answers 501 without DUPLICATE_DETECTION_ENABLED.
+    """
+    try:
+        report = await service.duplicate_report(min_similarity, limit)
+    except DuplicateDetectionDisabledError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    return TodoDuplicateReport(
+        clusters=[TodoDuplicateCluster(todos=todos) for todos in report.clusters],
+        total_clusters=report.total_clusters,
+        duplicate_todos=report.duplicate_todos,
+    )
+
+
+def require_change_feed() -> ChangeFeed:
+    feed = get_change_feed()
+    if feed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Change feed is disabled")
+    return feed
+
+
+def sse_message(event: dict | None) -> str:
+    """Format a change event (or a heartbeat for None) as a Server-Sent Event"""
+    if event is None:
+        return ": heartbeat\n\n"
+    lines = [f"event: {event['op']}", f"data: {json.dumps(event)}"]
+    if event["id"] is not None:
+        lines.insert(0, f"id: {event['id']}")
+    return "\n".join(lines) + "\n\n"
+
+
+@router.get("/changes")
+async def todo_changes(
+    request: Request,
+    after: int | None = Query(None, ge=0, description="Resume after this event id"),
+    last_event_id: str | None = Header(None),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory)
+):
+    """
+    Server-Sent Events stream of todo changes (create / update / delete)
+
+    Each event carries its id, the todo id and the todo after the change.
+    Reconnecting clients resume through the standard Last-Event-ID header
+    (or ?after=). A "resync" event means events were missed and the client
+    should reload its todos.
+    """
+    feed = require_change_feed()
+    if last_event_id is not None:
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Last-Event-ID must be an event id"
+            )
+    heartbeat = get_settings().CHANGE_FEED_HEARTBEAT_SECONDS
+
+    async def body():
+        async for event in feed.stream(session_factory, after, heartbeat):
+            if event is None and await request.is_disconnected():
+                return
+            yield sse_message(event)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/changes/ws")
+async def todo_changes_ws(
+    websocket: WebSocket,
+    after: int | None = Query(None, ge=0),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory)
+):
+    """WebSocket variant of /changes: one JSON event per message, resume with ?after="""
+    feed = get_change_feed()
+    if feed is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Change feed is disabled")
+        return
+    await websocket.accept()
+    heartbeat = get_settings().CHANGE_FEED_HEARTBEAT_SECONDS
+    try:
+        async for event in feed.stream(session_factory, after, heartbeat):
+            await websocket.send_json(event or {"op": "heartbeat"})
+    except WebSocketDisconnect:
+        pass
 
 
 @router.get("/{todo_id}", response_model=TodoRead)
 async def get_todo(
     todo_id: int,
+    response: Response,
+    if_none_match: str | None = Header(None),
     service: TodoService = Depends(get_todo_service)
 ):
-    """Get a specific todo by ID"""
+    """Get a specific todo by ID (supports If-None-Match)"""
     todo = await service.get_by_id(todo_id)
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Todo with id {todo_id} not found"
         )
+    etag = todo_etag(todo)
+    if etag_matches(if_none_match, etag, weak=True):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return todo
 
 
@@ -56,29 +364,42 @@ async def get_todo(
 async def update_todo(
     todo_id: int,
     data: TodoUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     service: TodoService = Depends(get_todo_service)
 ):
-    """Update a todo by ID"""
-    todo = await service.update_by_id(todo_id, data)
+    """Update a todo by ID (supports If-Match)"""
+    try:
+        todo = await service.update_by_id(todo_id, data, if_match=if_match)
+    except TodoPreconditionFailedError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    except TodoConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if not todo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Todo with id {todo_id} not found"
         )
+    response.headers["ETag"] = todo_etag(todo)
     return todo
 
 
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_todo(
     todo_id: int,
+    if_match: str | None = Header(None),
     service: TodoService = Depends(get_todo_service)
 ):
-    """Delete a todo by ID"""
-    success = await service.delete_by_id(todo_id)
+    """Delete a todo by ID (supports If-Match)"""
+    try:
+        success = await service.delete_by_id(todo_id, if_match=if_match)
+    except TodoPreconditionFailedError as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    except TodoConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Todo with id {todo_id} not found"
         )
     return None
-
@@ -0,0 +1,162 @@
+"""
+Publish/subscribe broadcast between application workers
+
+Used to fan out small text messages (cache invalidations, change events)
+to every uvicorn worker. Two backends are provided:
+- memory: in-process only, for a single worker and for tests
+- postgres: Postgres LISTEN/NOTIFY over a dedicated asyncpg connection
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Callable
+from sqlalchemy.engine import make_url
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Callbacks receive each message, or None when messages may have been missed
+# (e.g. after the listener reconnected) and subscribers should resynchronise
+MessageCallback = Callable[[str | None], None]
+
+# Postgres NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_BYTES = 7999
+
+
+class Broadcast:
+    """Base class for broadcast backends"""
+
+    def __init__(self):
+        self._subscribers: dict[str, list[MessageCallback]] = {}
+
+    async def start(self) -> None:
+        """Start receiving messages"""
+
+    async def stop(self) -> None:
+        """Stop receiving messages and release connections"""
+
+    def subscribe(self, channel: str, callback: MessageCallback) -> None:
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def publish(self, channel: str, message: str) -> None:
+        """Publish a message to every worker; safe to call from sync code"""
+        raise NotImplementedError
+
+    def _deliver(self, channel: str, message: str | None) -> None:
+        for callback in list(self._subscribers.get(channel, [])):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Broadcast subscriber on '{channel}' failed: {e}")
+
+
+class InMemoryBroadcast(Broadcast):
+    """Delivers messages to subscribers in the same process"""
+
+    def publish(self, channel: str, message: str) -> None:
+        self._deliver(channel, message)
+
+
+class PostgresBroadcast(Broadcast):
+    """Delivers messages to every worker through Postgres LISTEN/NOTIFY"""
+
+    def __init__(self, dsn: str, reconnect_delay: float = 1.0):
+        super().__init__()
+        self.dsn = dsn
+        self.reconnect_delay = reconnect_delay
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._pending: set[asyncio.Task] = set()
+        self._reconnect_task: asyncio.Task | None = None
+        self._stopped = False
+
+    async def start(self) -> None:
+        self._stopped = False
+        await self._connect_listener()
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = self._publish_conn = None
+
+    def subscribe(self, channel: str, callback: MessageCallback) -> None:
+        first = channel not in self._subscribers
+        super().subscribe(channel, callback)
+        if first and self._listen_conn is not None:
+            self._spawn(self._listen_conn.add_listener(channel, self._on_notify))
+
+    def publish(self, channel: str, message: str) -> None:
+        if len(message.encode()) > MAX_PAYLOAD_BYTES:
+            raise ValueError(f"Broadcast message on '{channel}' exceeds {MAX_PAYLOAD_BYTES} bytes")
+        self._spawn(self._notify(channel, message))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _notify(self, channel: str, message: str) -> None:
+        import asyncpg
+
+        async with self._publish_lock:
+            try:
+                if self._publish_conn is None or self._publish_conn.is_closed():
+                    self._publish_conn = await asyncpg.connect(self.dsn)
+                await self._publish_conn.execute("SELECT pg_notify($1, $2)", channel, message)
+            except Exception as e:
+                logger.error(f"Failed to publish broadcast on '{channel}': {e}")
+
+    async def _connect_listener(self) -> None:
+        import asyncpg
+
+        self._listen_conn = await asyncpg.connect(self.dsn)
+        self._listen_conn.add_termination_listener(self._on_terminated)
+        for channel in self._subscribers:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel: str, payload: str) -> None:
+        self._deliver(channel, payload)
+
+    def _on_terminated(self, connection) -> None:
+        if self._stopped:
+            return
+        logger.warning("Broadcast listener connection lost, reconnecting")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopped:
+            try:
+                await self._connect_listener()
+            except Exception as e:
+                logger.error(f"Broadcast listener reconnect failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+            # Notifications sent while disconnected are lost
+            for channel in list(self._subscribers):
+                self._deliver(channel, None)
+            return
+
+
+def postgres_dsn(database_url: str) -> str:
+    """Convert a SQLAlchemy URL (postgresql+asyncpg://...) into a libpq DSN"""
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache
+def get_broadcast() -> Broadcast:
+    """Get the process-wide broadcast configured by BROADCAST_BACKEND"""
+    settings = get_settings()
+    if settings.BROADCAST_BACKEND == "postgres":
+        return PostgresBroadcast(postgres_dsn(settings.DATABASE_URL))
+    if settings.BROADCAST_BACKEND == "memory":
+        return InMemoryBroadcast()
+    raise ValueError(f"Unknown BROADCAST_BACKEND '{settings.BROADCAST_BACKEND}'")
@@ -4,9 +4,105 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     APP_NAME: str = "Todo AI Agent"
+    # What this deployment serves: "all", "rest" (todo endpoints only; the
+    # agent stack is never loaded) or "agent" (agent endpoints and job workers)
+    APP_ROLE: str = "all"
 
     # Database Configuration
     DATABASE_URL: str
+    # Optional read replicas (JSON list); plain reads are routed to them
+    DATABASE_REPLICA_URLS: list[str] = []
+
+    # Create missing tables on startup instead of checking the schema version
+    # (development only; run scripts/init_db.py otherwise)
+    DB_CREATE_ALL_ON_STARTUP: bool = False
+
+    # Connection Pool
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    # asyncpg only: prepared statements cached per connection, and a
+    # server-side statement_timeout in milliseconds (0 disables it)
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Cross-worker messaging: "memory" (single worker) or "postgres" (LISTEN/NOTIFY)
+    BROADCAST_BACKEND: str = "memory"
+
+    # Todo Read Cache
+    TODO_CACHE_ENABLED: bool = False
+    TODO_CACHE_TTL_SECONDS: float = 30.0
+    TODO_CACHE_MAX_ROWS: int = 10_000
+
+    # Semantic matching: when a lookup finds no todo containing the text, try
+    # the nearest todos from an in-memory vector index of hashed embeddings
+    SEMANTIC_MATCH_ENABLED: bool = False
+
+    # Near-duplicate detection: keep a MinHash/LSH index of todo texts in
+    # memory so creates can be checked against near-duplicates (the duplicate
+    # report and skip_duplicates imports need it)
+    DUPLICATE_DETECTION_ENABLED: bool = False
+
+    # Change Feed (todo_events outbox + /todos/changes)
+    CHANGE_FEED_ENABLED: bool = True
+    CHANGE_FEED_RETENTION_HOURS: int = 24
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+    # Delta sync re-sends changes this recent, as commits may land out of timestamp order
+    SYNC_SETTLE_SECONDS: float = 60.0
+
+    # Idempotency-Key support: "memory" (single worker) or "database" (shared table)
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # How long a retry waits for the original request before answering 409
+    IDEMPOTENCY_WAIT_SECONDS: float = 60.0
+    # A pending key older than this is assumed abandoned (e.g. worker crashed)
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS: float = 300.0
+
+    # Agent admission control: per-client token buckets ("memory" or "database")
+    # and a per-worker cap on concurrent runs with a bounded wait queue
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    # Identify clients by X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    AGENT_RATE_LIMIT_PER_MINUTE: float = 20.0
+    AGENT_RATE_LIMIT_BURST: int = 5
+    AGENT_MAX_CONCURRENT_RUNS: int = 4
+    AGENT_MAX_QUEUED_RUNS: int = 16
+    AGENT_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # How /agent/query runs use the database: "tool" gives each tool call a
+    # short-lived session (writes commit as they are made; no connection is
+    # held while waiting on the LLM), "run" shares one transaction across the
+    # run, rolled back if it fails. Agent jobs always run in one transaction,
+    # as a job retried after a crash must not repeat committed writes
+    AGENT_TRANSACTION_MODE: str = "tool"
+
+    # Asynchronous agent jobs (/agent/jobs): worker tasks per process (0 runs
+    # none here), the heartbeat lease after which a job is run again, and how
+    # long a job's run may take (queries on the request path get 30 seconds)
+    AGENT_JOB_WORKERS: int = 2
+    AGENT_JOB_POLL_SECONDS: float = 2.0
+    AGENT_JOB_LEASE_SECONDS: float = 60.0
+    AGENT_JOB_TIMEOUT_SECONDS: float = 300.0
+    AGENT_JOB_MAX_ATTEMPTS: int = 3
+    AGENT_JOB_RETENTION_HOURS: int = 24
+
+    # Request profiling (opt-in): requests sent with "X-Profile: 1", or this
+    # random fraction of them, get SQL statement accounting and a CPU profile
+    # written to PROFILING_DIR
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+
+    # Tracing: spans for requests, agent runs, LLM and tool calls, TodoService
+    # methods and SQL statements, continuing incoming traceparent headers.
+    # Exporter: "console", "file" (JSON lines in TRACING_FILE) or "module:factory"
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "console"
+    TRACING_FILE: str = "traces.ndjson"
+    # Fraction of new traces recorded (incoming traceparent flags decide for theirs)
+    TRACING_SAMPLE_RATE: float = 1.0
 
     # OpenRouter/LLM Configuration
     OPENROUTER_API_KEY: str
@@ -0,0 +1,243 @@
+"""
+Opt-in request profiling and SQL query accounting
+
+With PROFILING_ENABLED, requests sent with "X-Profile: 1" (or a random
+PROFILING_SAMPLE_RATE fraction of them) are profiled:
+- every SQL statement is counted and timed through SQLAlchemy engine
+  events, and statements run more than once with the same parameters are
+  flagged (a lookup the request could have reused)
+- a cProfile CPU profile is recorded while the request runs
+
+The response carries a summary: Server-Timing with the total, CPU and SQL
+time (the rest is time spent waiting, e.g. on the LLM), X-Profile-Queries
+with the statement counts and X-Profile-Id. The full profile is written to
+PROFILING_DIR as <id>.prof (open with pstats or snakeviz) and <id>.json
+(the statements).
+
+cProfile sees the whole event loop thread, so other requests running at the
+same time show up in the CPU profile, and only one request is CPU-profiled
+at a time (the others still get SQL accounting). For streamed responses the
+headers cover the work done before the first byte; the files cover all of it.
+"""
+
+import asyncio
+import cProfile
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.utils.datetime import utc_now
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = "x-profile"
+# Statement text kept per entry in the .json file
+MAX_STATEMENT_CHARS = 2000
+
+_recorder: ContextVar["QueryRecorder | None"] = ContextVar("query_recorder", default=None)
+# cProfile hooks the whole thread, so one CPU profile runs at a time
+_cpu_profile_running = False
+
+
+@dataclass
+class StatementStats:
+    count: int = 0
+    seconds: float = 0.0
+    # Most executions with one set of parameters
+    max_identical: int = 0
+
+
+class QueryRecorder:
+    """Counts and times the SQL statements executed in its context"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: dict[str, StatementStats] = {}
+        self._executions: Counter[tuple[str, str]] = Counter()
+
+    def record(self, statement: str, parameters, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        stats = self.statements.setdefault(statement, StatementStats())
+        stats.count += 1
+        stats.seconds += seconds
+        key = (statement, repr(parameters))
+        self._executions[key] += 1
+        stats.max_identical = max(stats.max_identical, self._executions[key])
+
+    @property
+    def repeated(self) -> int:
+        """Executions that repeated an earlier statement with the same parameters"""
+        return sum(count - 1 for count in self._executions.values())
+
+    def as_dict(self) -> dict:
+        statements = sorted(self.statements.items(), key=lambda item: item[1].seconds, reverse=True)
+        return {
+            "count": self.count,
+            "milliseconds": round(self.seconds * 1000, 3),
+            "repeated": self.repeated,
+            "statements": [
+                {
+                    "statement": statement[:MAX_STATEMENT_CHARS],
+                    "count": stats.count,
+                    "milliseconds": round(stats.seconds * 1000, 3),
+                    "max_identical": stats.max_identical,
+                }
+                for statement, stats in statements
+            ],
+        }
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Record the SQL statements executed in this context (and tasks started from it)"""
+    recorder = QueryRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recorder.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorder = _recorder.get()
+    started = conn.info.get("profiling_started")
+    if recorder is not None and started:
+        recorder.record(statement, parameters, time.perf_counter() - started.pop())
+
+
+def _start_cpu_profile() -> cProfile.Profile | None:
+    global _cpu_profile_running
+    if _cpu_profile_running:
+        return None
+    _cpu_profile_running = True
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+
+def _stop_cpu_profile(profile: cProfile.Profile | None) -> None:
+    global _cpu_profile_running
+    if profile is not None:
+        profile.disable()
+        _cpu_profile_running = False
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests under the given path prefixes"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        enabled: bool | None = None,
+        sample_rate: float | None = None,
+        output_dir: str | Path | None = None,
+    ):
+        self.app = app
+        self.paths = tuple(path.rstrip("/") for path in paths)
+        self._enabled = enabled
+        self._sample_rate = sample_rate
+        self._output_dir = output_dir
+
+    def _wanted(self, scope: Scope) -> bool:
+        settings = get_settings()
+        enabled = self._enabled if self._enabled is not None else settings.PROFILING_ENABLED
+        if not enabled or not scope["path"].startswith(self.paths):
+            return False
+        for name, value in scope["headers"]:
+            if name.decode("latin-1") == PROFILE_HEADER:
+                return value.decode("latin-1").strip().lower() in ("1", "true", "yes")
+        rate = self._sample_rate if self._sample_rate is not None else settings.PROFILING_SAMPLE_RATE
+        return random.random() < rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:16]
+        response = {"status": None}
+        started_at = utc_now()
+        start, start_cpu = time.perf_counter(), time.thread_time()
+
+        with record_queries() as queries:
+            profile = _start_cpu_profile()
+
+            async def send_with_summary(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(
+                        time.perf_counter() - start, time.thread_time() - start_cpu, queries
+                    ))
+                    headers.append("X-Profile-Queries", f"count={queries.count}, repeated={queries.repeated}")
+                    headers.append("X-Profile-Id", profile_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_summary)
+            finally:
+                _stop_cpu_profile(profile)
+                seconds, cpu_seconds = time.perf_counter() - start, time.thread_time() - start_cpu
+
+        if queries.repeated:
+            logger.warning(
+                f"{scope['method']} {scope['path']}: {queries.repeated} repeated SQL "
+                f"statement(s) (profile {profile_id})"
+            )
+        report = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query_string": scope.get("query_string", b"").decode("latin-1"),
+            "status": response["status"],
+            "started_at": started_at.isoformat(),
+            "milliseconds": round(seconds * 1000, 3),
+            "cpu_milliseconds": round(cpu_seconds * 1000, 3),
+            "cpu_profile": profile is not None,
+            "sql": queries.as_dict(),
+        }
+        output_dir = Path(self._output_dir or get_settings().PROFILING_DIR)
+        try:
+            await asyncio.to_thread(write_profile, output_dir, profile_id, report, profile)
+        except OSError as e:
+            logger.error(f"Failed to write profile {profile_id}: {e}")
+
+
+def server_timing(seconds: float, cpu_seconds: float, queries: QueryRecorder) -> str:
+    """Server-Timing header value: total, CPU and SQL time in milliseconds"""
+    return (
+        f"total;dur={seconds * 1000:.1f}, cpu;dur={cpu_seconds * 1000:.1f}, "
+        f'sql;dur={queries.seconds * 1000:.1f};desc="{queries.count} queries"'
+    )
+
+
+def write_profile(
+    output_dir: Path, profile_id: str, report: dict, profile: cProfile.Profile | None
+) -> None:
+    """Write <id>.json (timings and statements) and <id>.prof (CPU profile) to output_dir"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / f"{profile_id}.json").write_text(json.dumps(report, indent=2))
+    if profile is not None:
+        profile.dump_stats(output_dir / f"{profile_id}.prof")
@@ -1,9 +1,297 @@
-# Future-ready security module
-# Add authentication and authorization logic here when needed
+"""
+Admission control for expensive endpoints
 
-# Example:
-# - JWT token validation
-# - API key management
-# - Rate limiting
-# - CORS configuration
+Each agent query runs an LLM loop that holds a database connection for its
+whole duration, so a burst of queries can exhaust the pool and the provider
+quota. Two limits guard it:
+- rate limiting: a token bucket per client (AGENT_RATE_LIMIT_PER_MINUTE,
+  bursts of AGENT_RATE_LIMIT_BURST), answered with 429 when empty
+- concurrency: at most AGENT_MAX_CONCURRENT_RUNS runs per worker; up to
+  AGENT_MAX_QUEUED_RUNS more wait (for AGENT_QUEUE_TIMEOUT_SECONDS at most),
+  anything beyond is answered with 503 right away
 
+Both responses carry Retry-After. Buckets live in process memory by default;
+RATE_LIMIT_BACKEND=database shares them between workers.
+
+Authentication and authorization will live here as well when needed.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.domain.models import RateLimitBucket
+from app.utils.exceptions import AdmissionRejectedError
+
+logger = get_logger(__name__)
+
+# Buckets kept by the in-memory backend; the least recently used are dropped
+MAX_TRACKED_CLIENTS = 10_000
+# The database backend deletes full (idle) buckets every this many requests
+PRUNE_EVERY = 1000
+
+
+def refill(tokens: float, elapsed: float, rate: float, burst: float) -> float:
+    """Tokens in a bucket after `elapsed` seconds at `rate` tokens per second"""
+    return min(burst, tokens + max(elapsed, 0.0) * rate)
+
+
+def take(tokens: float, rate: float) -> tuple[float, float]:
+    """Take one token: (tokens left, seconds to wait; 0 when the token was granted)"""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class RateLimitBackend:
+    """Base class for token bucket storage"""
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        """
+        Take a token from key's bucket
+
+        Returns 0 when the request may proceed, otherwise the seconds until
+        a token is available.
+        """
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in process memory; each worker limits separately"""
+
+    def __init__(self, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.max_clients = max_clients
+        # key -> (tokens, monotonic time of the last refill)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, refilled_at = self._buckets.pop(key, (burst, now))
+        tokens, wait = take(refill(tokens, now - refilled_at, rate, burst), rate)
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            # A forgotten client simply starts again with a full bucket
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """Buckets in the rate_limit_buckets table, shared by every worker"""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self.session_factory = session_factory
+        self._requests = 0
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        self._requests += 1
+        if self._requests % PRUNE_EVERY == 0:
+            await self._prune(rate, burst)
+        try:
+            return await self._acquire(key, rate, burst)
+        except IntegrityError:
+            # Another worker created the bucket first
+            return await self._acquire(key, rate, burst)
+
+    async def _acquire(self, key: str, rate: float, burst: float) -> float:
+        now = time.time()
+        async with self.session_factory() as session:
+            async with session.begin():
+                bucket = (await session.execute(
+                    select(RateLimitBucket).where(RateLimitBucket.key == key).with_for_update()
+                )).scalar_one_or_none()
+                if bucket is None:
+                    bucket = RateLimitBucket(key=key, tokens=burst, refilled_at=now)
+                    session.add(bucket)
+                tokens = refill(bucket.tokens, now - bucket.refilled_at, rate, burst)
+                bucket.tokens, wait = take(tokens, rate)
+                bucket.refilled_at = now
+        return wait
+
+    async def _prune(self, rate: float, burst: float) -> None:
+        # Buckets idle long enough to have refilled completely carry no state
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(RateLimitBucket).where(RateLimitBucket.refilled_at < time.time() - burst / rate)
+            )
+            await session.commit()
+
+
+class ConcurrencyLimiter:
+    """
+    Caps concurrent runs, with a bounded queue of waiting runs
+
+    Keeps a moving average of run durations to suggest a Retry-After.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._queued = 0
+        self._average_seconds = 1.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after(self) -> float:
+        """Rough seconds until the current backlog has drained"""
+        waves = (self._active + self._queued) / self.max_concurrent
+        return max(1.0, self._average_seconds * waves)
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        if self._semaphore.locked():
+            if self._queued >= self.max_queued:
+                raise AdmissionRejectedError("Too many concurrent runs", self.retry_after())
+            self._queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise AdmissionRejectedError("Too many concurrent runs", self.retry_after())
+            finally:
+                self._queued -= 1
+        else:
+            await self._semaphore.acquire()
+        self._active += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._active -= 1
+        self._semaphore.release()
+
+    def record(self, seconds: float) -> None:
+        """Feed a run duration into the moving average"""
+        self._average_seconds = 0.8 * self._average_seconds + 0.2 * seconds
+
+
+@lru_cache
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Get the process-wide rate limit backend configured by RATE_LIMIT_BACKEND"""
+    settings = get_settings()
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return InMemoryRateLimitBackend()
+    if settings.RATE_LIMIT_BACKEND == "database":
+        from app.db.session import AsyncSessionLocal
+
+        return DatabaseRateLimitBackend(AsyncSessionLocal)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{settings.RATE_LIMIT_BACKEND}'")
+
+
+@lru_cache
+def get_agent_limiter() -> ConcurrencyLimiter:
+    """Get the per-worker concurrency limiter for agent runs"""
+    settings = get_settings()
+    return ConcurrencyLimiter(
+        max_concurrent=settings.AGENT_MAX_CONCURRENT_RUNS,
+        max_queued=settings.AGENT_MAX_QUEUED_RUNS,
+        queue_timeout=settings.AGENT_QUEUE_TIMEOUT_SECONDS,
+    )
+
+
+def client_id(scope: Scope, trust_forwarded: bool = False) -> str:
+    """Identify the client of a request by address (the first X-Forwarded-For hop behind a proxy)"""
+    if trust_forwarded:
+        forwarded = dict(scope["headers"]).get(b"x-forwarded-for")
+        if forwarded:
+            return forwarded.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying the rate and concurrency limits to POSTs on the given paths
+
+    With limit_concurrency=False only the rate limit applies (for endpoints
+    that queue work rather than run it).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Iterable[str],
+        backend: RateLimitBackend | None = None,
+        limiter: ConcurrencyLimiter | None = None,
+        limit_concurrency: bool = True,
+    ):
+        self.app = app
+        self.paths = {path.rstrip("/") for path in paths}
+        self._backend = backend
+        self._limiter = limiter
+        self.limit_concurrency = limit_concurrency
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        if not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        backend = self._backend or get_rate_limit_backend()
+        key = f"{scope['path'].rstrip('/')}:{client_id(scope, settings.RATE_LIMIT_TRUST_FORWARDED)}"
+        try:
+            wait = await backend.acquire(
+                key,
+                rate=settings.AGENT_RATE_LIMIT_PER_MINUTE / 60,
+                burst=settings.AGENT_RATE_LIMIT_BURST,
+            )
+        except Exception as e:
+            # Fail open: an unavailable limit store must not take the API down
+            logger.error(f"Rate limit backend unavailable: {e}")
+            wait = 0.0
+        if wait:
+            await _send_limited(send, 429, "Rate limit exceeded", wait)
+            return
+        if not self.limit_concurrency:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self._limiter or get_agent_limiter()
+        try:
+            async with limiter:
+                start = time.monotonic()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    limiter.record(time.monotonic() - start)
+        except AdmissionRejectedError as e:
+            logger.warning(
+                f"Rejected {scope['path']}: {limiter.active} running, {limiter.queued} queued"
+            )
+            await _send_limited(send, 503, "Server is busy", e.retry_after)
+
+
+async def _send_limited(send: Send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(retry_after)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,443 @@
+"""
+Tracing: spans across the API, agent, LLM, tool, service and SQL layers
+
+With TRACING_ENABLED every /api/v1 request becomes a trace. Inside it:
+- a server span per request, continuing the caller's W3C traceparent
+- agent.process_query, with a span per LLM call and per tool call (fed from
+  LangChain callbacks, see app.agents.callbacks.TracingCallback)
+- a span per TodoService method
+- a span per SQL statement, from SQLAlchemy engine events
+
+Agent jobs run outside a request and start their own trace. Service and SQL
+spans are only recorded inside a trace, so background polling adds nothing.
+
+Finished spans are handed to the exporter one trace at a time, when the
+span that started the trace in this process ends. TRACING_EXPORTER selects
+it: "console" (log lines), "file" (one JSON span per line in TRACING_FILE)
+or "package.module:factory" for a custom SpanExporter, e.g. one forwarding
+to a collector. export() runs on the event loop, so exporters that do I/O
+should hand spans to a thread.
+"""
+
+import functools
+import importlib
+import inspect
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import get_settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+# SQL text kept in db.statement
+MAX_STATEMENT_CHARS = 1000
+# A trace holding more finished spans than this is exported early
+MAX_SPANS_PER_TRACE = 1000
+
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        kind: str = "internal",
+        attributes: dict[str, Any] | None = None,
+        local_root: bool = False,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.local_root = local_root
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException | str) -> None:
+        self.error = str(error) or type(error).__name__
+
+    def rename(self, name: str) -> None:
+        self.name = name
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.finish(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def as_dict(self) -> dict:
+        """The span in (flattened) OTLP JSON field names"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class NonRecordingSpan:
+    """Stands in for a span outside a sampled trace; records nothing"""
+
+    recording = False
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException | str) -> None:
+        pass
+
+    def rename(self, name: str) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = NonRecordingSpan()
+
+_current: ContextVar[Span | NonRecordingSpan | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | NonRecordingSpan | None:
+    """The active span, NON_RECORDING_SPAN in an unsampled trace, or None outside any trace"""
+    return _current.get()
+
+
+def current_traceparent() -> str | None:
+    """traceparent header for outgoing calls made within the current span"""
+    span = _current.get()
+    return span.traceparent if span is not None else None
+
+
+def parse_traceparent(value: str | None) -> tuple[str, str, bool] | None:
+    """(trace id, parent span id, sampled) from a W3C traceparent header, None if invalid"""
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if not match:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class SpanExporter:
+    """Base class for span exporters"""
+
+    def export(self, spans: list[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Logs one line per span"""
+
+    def export(self, spans: list[Span]) -> None:
+        for span in spans:
+            status = f" error={span.error}" if span.error else ""
+            logger.info(
+                f"span {span.name} {span.duration_ms:.1f}ms trace={span.trace_id} "
+                f"span={span.span_id} parent={span.parent_id}{status} {span.attributes}"
+            )
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends one JSON span per line to a local file"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        lines = "".join(json.dumps(span.as_dict(), default=str) + "\n" for span in spans)
+        with self._lock, self.path.open("a") as f:
+            f.write(lines)
+
+
+class Tracer:
+    """Creates traces and exports their spans"""
+
+    def __init__(self, exporter: SpanExporter | None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._pending: dict[str, list[Span]] = {}
+        # Local roots still running, per trace
+        self._open: Counter[str] = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def trace(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: dict[str, Any] | None = None,
+        traceparent: str | None = None,
+    ) -> Iterator[Span | NonRecordingSpan]:
+        """
+        Span that starts a trace, continuing traceparent when given
+
+        Inside an active span it is a child span instead.
+        """
+        parent = _current.get()
+        if parent is not None:
+            with span(name, kind, attributes) as child:
+                yield child
+            return
+        if not self.enabled:
+            yield NON_RECORDING_SPAN
+            return
+
+        context = parse_traceparent(traceparent)
+        if context is not None:
+            trace_id, parent_id, sampled = context
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+            sampled = random.random() < self.sample_rate
+        if sampled:
+            self._open[trace_id] += 1
+            root = Span(self, name, trace_id, parent_id, kind, attributes, local_root=True)
+        else:
+            root = NON_RECORDING_SPAN
+        with _activate(root):
+            yield root
+
+    def finish(self, span: Span) -> None:
+        """Collect a finished span; a trace is exported when its local root ends"""
+        pending = self._pending.setdefault(span.trace_id, [])
+        pending.append(span)
+        if span.local_root:
+            self._open[span.trace_id] -= 1
+            if self._open[span.trace_id] <= 0:
+                del self._open[span.trace_id]
+        # Spans ending after their root (e.g. in a streamed response) go out alone
+        if span.trace_id not in self._open or len(pending) >= MAX_SPANS_PER_TRACE:
+            self._export(self._pending.pop(span.trace_id))
+
+    def _export(self, spans: list[Span]) -> None:
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            logger.error(f"Failed to export {len(spans)} spans: {e}")
+
+    def shutdown(self) -> None:
+        for spans in self._pending.values():
+            self._export(spans)
+        self._pending.clear()
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+@contextmanager
+def _activate(span: Span | NonRecordingSpan) -> Iterator[None]:
+    token = _current.set(span)
+    try:
+        yield
+    except BaseException as e:
+        span.set_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def start_span(
+    name: str, kind: str = "internal", attributes: dict[str, Any] | None = None
+) -> Span | NonRecordingSpan:
+    """
+    Start a child of the current span without making it current; end() it
+
+    Outside a sampled trace this returns NON_RECORDING_SPAN.
+    """
+    parent = _current.get()
+    if not isinstance(parent, Span):
+        return NON_RECORDING_SPAN
+    return Span(parent.tracer, name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(
+    name: str, kind: str = "internal", attributes: dict[str, Any] | None = None
+) -> Iterator[Span | NonRecordingSpan]:
+    """Child span of the current span, current while the block runs"""
+    child = start_span(name, kind, attributes)
+    if not child.recording:
+        yield child
+        return
+    with _activate(child):
+        yield child
+
+
+def use_span(span: Span | NonRecordingSpan) -> Token:
+    """Make span current (for spans started and ended in callbacks); pass the token to restore_span"""
+    return _current.set(span)
+
+
+def restore_span(token: Token) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended from another context (e.g. a callback run in a copied context)
+        pass
+
+
+def traced(name: str):
+    """Decorator running an async function in a child span"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not isinstance(_current.get(), Span):
+                return await func(*args, **kwargs)
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(cls):
+    """Class decorator tracing every public async method as "<Class>.<method>\""""
+    for name, attr in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(attr):
+            setattr(cls, name, traced(f"{cls.__name__}.{name}")(attr))
+    return cls
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    if isinstance(_current.get(), Span):
+        operation = statement.split(None, 1)[0].upper() if statement.strip() else "SQL"
+        conn.info.setdefault("tracing_spans", []).append(start_span(
+            f"SQL {operation}",
+            kind="client",
+            attributes={
+                "db.system": conn.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement[:MAX_STATEMENT_CHARS],
+            },
+        ))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get("tracing_spans")
+    if spans and isinstance(_current.get(), Span):
+        spans.pop().end()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_sql_span(exception_context):
+    conn = exception_context.connection
+    spans = conn.info.get("tracing_spans") if conn is not None else None
+    if spans and isinstance(_current.get(), Span):
+        failed = spans.pop()
+        failed.set_error(exception_context.original_exception)
+        failed.end()
+
+
+def load_exporter(name: str, path: str) -> SpanExporter:
+    """Exporter for TRACING_EXPORTER: "console", "file" or "package.module:factory\""""
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(path)
+    module_name, _, factory = name.partition(":")
+    if not factory:
+        raise ValueError(f"Unknown TRACING_EXPORTER '{name}' (console, file or module:factory)")
+    return getattr(importlib.import_module(module_name), factory)()
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer (exporting nothing unless TRACING_ENABLED)"""
+    settings = get_settings()
+    if not settings.TRACING_ENABLED:
+        return Tracer(None)
+    return Tracer(
+        load_exporter(settings.TRACING_EXPORTER, settings.TRACING_FILE),
+        sample_rate=settings.TRACING_SAMPLE_RATE,
+    )
+
+
+class TracingMiddleware:
+    """ASGI middleware starting a server span for each request under the given path prefixes"""
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], tracer: Tracer | None = None):
+        self.app = app
+        self.paths = tuple(path.rstrip("/") for path in paths)
+        self._tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = self._tracer or get_tracer()
+        if scope["type"] != "http" or not tracer.enabled or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name.decode("latin-1") == TRACEPARENT_HEADER:
+                traceparent = value.decode("latin-1")
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+
+        with tracer.trace(f"{method} {scope['path']}", "server", attributes, traceparent) as server:
+            async def send_with_trace_id(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    server.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        server.set_error(f"HTTP {message['status']}")
+                    if server.recording:
+                        MutableHeaders(scope=message).append("X-Trace-Id", server.trace_id)
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = scope.get("route")
+                if route is not None and hasattr(route, "path"):
+                    server.rename(f"{method} {route.path}")
+                    server.set_attribute("http.route", route.path)
@@ -0,0 +1,189 @@
+"""
+Commit-time tracking of todo changes
+
+Every flush records which todos were created, updated or deleted on the
+session; once the transaction commits, the collected changes are handed to
+the registered commit listeners (cache invalidation, change feeds, ...).
+Changes from a rolled back transaction are discarded.
+
+When CHANGE_FEED_ENABLED is on, each recorded change is also written to the
+todo_events outbox in the same transaction, so the change feed can replay
+exactly what committed.
+"""
+
+import json
+from dataclasses import dataclass, field, replace
+from typing import Callable
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.orm import Session
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.domain.models import Todo, TodoEvent
+from app.domain.schemas import TodoRead
+
+logger = get_logger(__name__)
+
+# Session.info key holding (transaction, change) pairs not yet committed
+PENDING_CHANGES_KEY = "pending_todo_changes"
+
+
+@dataclass(slots=True, frozen=True)
+class TodoChange:
+    """
+    A committed change to one todo
+
+    completed and priority hold every value the row had before or after the
+    change, so listeners can tell which filtered views it touched. todo_id is
+    None for set-based writes whose individual rows are not tracked (e.g. a
+    bulk import), in which case the change stands for all affected rows.
+    """
+    op: str  # "create", "update" or "delete"
+    todo_id: int | None
+    completed: tuple[bool, ...] = ()
+    priority: tuple[str, ...] = ()
+    # The todo after the change (TodoRead JSON), when known
+    todo: dict | None = field(default=None, compare=False)
+    # Id of the todo_events row written for the change, when the outbox is on
+    event_id: int | None = field(default=None, compare=False)
+
+
+CommitListener = Callable[[list[TodoChange]], None]
+
+_commit_listeners: list[CommitListener] = []
+
+
+def add_commit_listener(listener: CommitListener) -> None:
+    """Register a callable that receives the todo changes of each commit"""
+    _commit_listeners.append(listener)
+
+
+def remove_commit_listener(listener: CommitListener) -> None:
+    if listener in _commit_listeners:
+        _commit_listeners.remove(listener)
+
+
+def record_changes(session: Session, changes: list[TodoChange]) -> None:
+    """
+    Record changes made outside the unit of work, e.g. bulk UPDATE/DELETE
+    statements, so they are published with the session's next commit
+    """
+    if not changes:
+        return
+    if get_settings().CHANGE_FEED_ENABLED:
+        changes = _write_events(session, changes)
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    pending = session.info.setdefault(PENDING_CHANGES_KEY, [])
+    pending.extend((transaction, change) for change in changes)
+
+
+def has_uncommitted_changes(session) -> bool:
+    """Whether a (sync or async) session holds todo changes not yet committed, flushed or not"""
+    return bool(
+        session.info.get(PENDING_CHANGES_KEY) or session.new or session.dirty or session.deleted
+    )
+
+
+def event_op(change: TodoChange) -> str:
+    """Change feed operation: changes without a todo id ask clients to resync"""
+    return change.op if change.todo_id is not None else "resync"
+
+
+def _write_events(session: Session, changes: list[TodoChange]) -> list[TodoChange]:
+    # Runs inside the flush / bulk statement's transaction, so a rollback
+    # (including of a savepoint) takes the events with it
+    rows = [
+        {
+            "op": event_op(change),
+            "todo_id": change.todo_id,
+            "data": json.dumps(change.todo) if change.todo is not None else None,
+        }
+        for change in changes
+    ]
+    result = session.connection().execute(
+        insert(TodoEvent.__table__).returning(
+            TodoEvent.__table__.c.id, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    event_ids = result.scalars().all()
+    return [replace(change, event_id=event_id) for change, event_id in zip(changes, event_ids)]
+
+
+def _within(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def _attribute_values(todo: Todo, key: str) -> tuple:
+    history = inspect(todo).attrs[key].history
+    values = []
+    for value in (*history.added, *history.unchanged, *history.deleted):
+        value = getattr(value, "value", value)
+        if value is not None and value not in values:
+            values.append(value)
+    return tuple(values)
+
+
+def _todo_data(todo: Todo) -> dict | None:
+    # Only from already loaded attributes; never trigger a load mid-flush
+    if inspect(todo).unloaded:
+        return None
+    return TodoRead.model_validate(todo).model_dump(mode="json")
+
+
+def _change_for(op: str, todo: Todo) -> TodoChange:
+    return TodoChange(
+        op=op,
+        todo_id=todo.id,
+        completed=_attribute_values(todo, "completed"),
+        priority=_attribute_values(todo, "priority"),
+        todo=_todo_data(todo) if op != "delete" else None,
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_changes(session: Session, flush_context) -> None:
+    changes = [_change_for("create", obj) for obj in session.new if isinstance(obj, Todo)]
+    changes += [
+        _change_for("update", obj)
+        for obj in session.dirty
+        if isinstance(obj, Todo) and session.is_modified(obj, include_collections=False)
+    ]
+    changes += [_change_for("delete", obj) for obj in session.deleted if isinstance(obj, Todo)]
+    if changes:
+        record_changes(session, changes)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session: Session) -> None:
+    # Also fires when a savepoint is released; only the outermost commit counts
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(PENDING_CHANGES_KEY, None)
+    if not pending:
+        return
+    changes = [change for _, change in pending]
+    for listener in list(_commit_listeners):
+        try:
+            listener(changes)
+        except Exception as e:
+            logger.error(f"Todo change listener {listener!r} failed: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_changes(session: Session, previous_transaction) -> None:
+    pending = session.info.get(PENDING_CHANGES_KEY)
+    if not pending:
+        return
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_CHANGES_KEY, None)
+        return
+    # A savepoint rolled back: drop only what was recorded inside it
+    pending[:] = [
+        (transaction, change)
+        for transaction, change in pending
+        if not _within(transaction, previous_transaction)
+    ]
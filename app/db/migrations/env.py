@@ -27,7 +27,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import all models to register them with Base
-from app.domain.models import Todo  # noqa
+from app.domain.models import Todo, TodoEvent, IdempotencyRecord, RateLimitBucket, AgentJob, SchemaVersion  # noqa
 
 target_metadata = Base.metadata
 
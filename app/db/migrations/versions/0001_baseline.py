@@ -0,0 +1,46 @@
+"""Baseline: the todos table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 08:08:55
+
+Databases created with scripts/init_db.py before migrations existed have
+exactly this schema; stamp them with `alembic stamp 0001` before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'todos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('completed', sa.Boolean(), nullable=False),
+        sa.Column(
+            'priority',
+            sa.Enum('LOW', 'MEDIUM', 'HIGH', 'URGENT', name='todo_priority', native_enum=False),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_todos_id'), 'todos', ['id'], unique=False)
+    op.create_index(op.f('ix_todos_title'), 'todos', ['title'], unique=False)
+    op.create_index(op.f('ix_todos_completed'), 'todos', ['completed'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_todos_completed'), table_name='todos')
+    op.drop_index(op.f('ix_todos_title'), table_name='todos')
+    op.drop_index(op.f('ix_todos_id'), table_name='todos')
+    op.drop_table('todos')
@@ -0,0 +1,23 @@
+"""Index todos.updated_at for list ETag watermarks
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_todos_updated_at'), 'todos', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_todos_updated_at'), table_name='todos')
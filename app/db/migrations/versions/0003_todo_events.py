@@ -0,0 +1,34 @@
+"""Add the todo_events outbox for the change feed
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'todo_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=16), nullable=False),
+        sa.Column('todo_id', sa.Integer(), nullable=True),
+        sa.Column('data', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_todo_events_created_at'), 'todo_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_todo_events_created_at'), table_name='todo_events')
+    op.drop_table('todo_events')
@@ -0,0 +1,29 @@
+"""Replace the updated_at / created_at indexes with (timestamp, id) keyset indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index(op.f('ix_todos_updated_at'), table_name='todos')
+    op.create_index('ix_todos_updated_at_id', 'todos', ['updated_at', 'id'], unique=False)
+    op.drop_index(op.f('ix_todo_events_created_at'), table_name='todo_events')
+    op.create_index('ix_todo_events_created_at_id', 'todo_events', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todo_events_created_at_id', table_name='todo_events')
+    op.create_index(op.f('ix_todo_events_created_at'), 'todo_events', ['created_at'], unique=False)
+    op.drop_index('ix_todos_updated_at_id', table_name='todos')
+    op.create_index(op.f('ix_todos_updated_at'), 'todos', ['updated_at'], unique=False)
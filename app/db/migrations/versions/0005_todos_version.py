@@ -0,0 +1,26 @@
+"""Add todos.version for optimistic concurrency
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00
+
+Existing rows start at version 1 through the server default.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('todos', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('todos') as batch_op:
+        batch_op.drop_column('version')
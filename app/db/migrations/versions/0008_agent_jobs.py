@@ -0,0 +1,46 @@
+"""Add agent_jobs for asynchronous agent queries
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'agent_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('query', sa.Text(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='agent_job_status', native_enum=False),
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('worker_id', sa.String(length=64), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('response', sa.Text(), nullable=True),
+        sa.Column('actions', sa.Text(), nullable=False),
+        sa.Column('usage', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_agent_jobs_status_created_at', 'agent_jobs', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_agent_jobs_status_created_at', table_name='agent_jobs')
+    op.drop_table('agent_jobs')
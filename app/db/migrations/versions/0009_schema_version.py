@@ -0,0 +1,29 @@
+"""Add schema_version for the startup schema check
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'schema_version',
+        sa.Column('version', sa.String(length=64), nullable=False),
+        sa.Column('applied_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('version'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('schema_version')
@@ -0,0 +1,113 @@
+"""
+Connection pool configuration and live pool statistics
+"""
+
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import Settings
+
+
+class PoolStats:
+    """Cumulative checkout counters for one pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        if timed_out:
+            self.timeouts += 1
+        else:
+            self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict:
+        attempts = self.checkouts + self.timeouts
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waits"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "MonitoredQueuePool":
+        # Keep counters across dispose() so they describe the process lifetime
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def engine_options(url: str, settings: Settings) -> dict:
+    """
+    Build create_async_engine() keyword arguments for a database URL
+
+    Pool sizing applies to every backend with a real connection pool;
+    prepared statement caching and statement_timeout only to asyncpg.
+    """
+    parsed = make_url(url)
+    options: dict = {}
+
+    if parsed.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=MonitoredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if parsed.get_driver_name() == "asyncpg":
+        connect_args: dict = {
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        }
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+            }
+        options["connect_args"] = connect_args
+
+    return options
+
+
+def pool_status(engine: AsyncEngine) -> dict:
+    """Snapshot of an engine's pool: occupancy, overflow and checkout waits"""
+    pool = engine.sync_engine.pool
+    status: dict = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    if isinstance(pool, MonitoredQueuePool):
+        status.update(pool.stats.as_dict())
+
+    return status
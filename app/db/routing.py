@@ -0,0 +1,141 @@
+"""
+Primary/replica routing for database sessions
+
+Reads go to a healthy replica when one is configured; writes, locking reads
+and every statement issued after a session's first write go to the primary,
+so a request always reads its own writes. Write paths that read first (a
+read-modify-write) pin the session with pin_to_primary() before that read.
+"""
+
+import itertools
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Session.info keys
+ROUTER_KEY = "engine_router"
+PINNED_KEY = "pinned_to_primary"
+
+# Seconds an unhealthy replica is skipped before it is tried again
+REPLICA_RETRY_SECONDS = 30.0
+
+
+class EngineHealth:
+    """Connection health of a single engine, fed by engine events"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+        self.last_failure_at: float | None = None
+
+    def mark_ok(self) -> None:
+        if not self.healthy:
+            logger.info(f"Database engine '{self.name}' is healthy again")
+        self.healthy = True
+        self.consecutive_failures = 0
+
+    def mark_failed(self, error: BaseException) -> None:
+        if self.healthy:
+            logger.warning(f"Database engine '{self.name}' marked unhealthy: {error}")
+        self.healthy = False
+        self.consecutive_failures += 1
+        self.last_error = str(error)
+        self.last_failure_at = time.monotonic()
+
+    def available(self) -> bool:
+        """Healthy, or unhealthy for long enough that it should be retried"""
+        if self.healthy or self.last_failure_at is None:
+            return True
+        return time.monotonic() - self.last_failure_at >= REPLICA_RETRY_SECONDS
+
+    def as_dict(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class EngineRouter:
+    """Holds the primary and replica engines and picks one per statement"""
+
+    def __init__(self, primary: AsyncEngine, replicas: list[AsyncEngine] | None = None):
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        self.health: dict[str, EngineHealth] = {}
+        self._engines: dict[str, AsyncEngine] = {}
+        self._register("primary", primary)
+        for i, replica in enumerate(self.replicas):
+            self._register(f"replica-{i}", replica)
+        self._replica_cycle = itertools.cycle(range(len(self.replicas)))
+
+    def _register(self, name: str, engine: AsyncEngine) -> None:
+        health = EngineHealth(name)
+        self.health[name] = health
+        self._engines[name] = engine
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            health.mark_ok()
+
+        @event.listens_for(engine.sync_engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                health.mark_failed(context.original_exception)
+
+    @property
+    def engines(self) -> dict[str, AsyncEngine]:
+        """All engines by name, primary first"""
+        return dict(self._engines)
+
+    def writer(self) -> Engine:
+        return self.primary.sync_engine
+
+    def reader(self) -> Engine:
+        """Next available replica in round-robin order, else the primary"""
+        for _ in range(len(self.replicas)):
+            i = next(self._replica_cycle)
+            if self.health[f"replica-{i}"].available():
+                return self.replicas[i].sync_engine
+        return self.primary.sync_engine
+
+    async def dispose(self) -> None:
+        for engine in self._engines.values():
+            await engine.dispose()
+
+
+def pin_to_primary(session) -> None:
+    """Send every further statement of a (sync or async) session to the primary"""
+    session.info[PINNED_KEY] = True
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to replicas via the EngineRouter in its info"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        router: EngineRouter | None = self.info.get(ROUTER_KEY)
+        if router is None or not router.replicas:
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        if self.info.get(PINNED_KEY):
+            return router.writer()
+
+        if self._flushing or not _is_plain_select(clause):
+            self.info[PINNED_KEY] = True
+            return router.writer()
+
+        return router.reader()
+
+
+def _is_plain_select(clause) -> bool:
+    """True for SELECT statements that take no row locks"""
+    if clause is None or not getattr(clause, "is_select", False):
+        return False
+    return getattr(clause, "_for_update_arg", None) is None
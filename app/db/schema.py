@@ -0,0 +1,107 @@
+"""
+Schema creation and the startup schema-version check
+
+scripts/init_db.py creates missing tables and stamps the schema_version
+table with a fingerprint of the models (tables, columns, types, indexes).
+create_all does not alter existing tables, so the stamp is only written once
+the live tables have every column and index of the models; a database behind
+them must be migrated first (alembic upgrade head). On startup the
+application compares the stamped fingerprint with the models it was built
+from: a single-row SELECT, instead of reflecting every table on every boot.
+A mismatch means the database needs migrating before this code can run
+against it.
+"""
+
+import hashlib
+from sqlalchemy import MetaData, delete, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.db.base import Base
+from app.domain import models  # noqa - registers every table on Base.metadata
+from app.domain.models import SchemaVersion
+from app.utils.exceptions import SchemaMismatchError
+
+
+def schema_fingerprint(metadata: MetaData = Base.metadata) -> str:
+    """Stable hash of the tables, columns, types and indexes in metadata"""
+    parts = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        parts.append(f"table {table.name}")
+        for column in table.columns:
+            parts.append(
+                f"column {column.name} {column.type} "
+                f"nullable={column.nullable} pk={column.primary_key}"
+            )
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            columns = ",".join(column.name for column in index.columns)
+            parts.append(f"index {index.name} ({columns}) unique={index.unique}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def missing_schema(connection: Connection, metadata: MetaData = Base.metadata) -> list[str]:
+    """Tables, columns and indexes of metadata that the live database lacks"""
+    inspector = inspect(connection)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        if table.name not in tables:
+            missing.append(f"table {table.name}")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        missing += [
+            f"column {table.name}.{column.name}"
+            for column in table.columns
+            if column.name not in columns
+        ]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing += [
+            f"index {index.name}"
+            for index in sorted(table.indexes, key=lambda i: i.name or "")
+            if index.name not in indexes
+        ]
+    return missing
+
+
+async def create_schema(engine: AsyncEngine) -> str:
+    """
+    Create missing tables and stamp the schema version; returns the version
+
+    Existing tables are not altered: raises SchemaMismatchError, without
+    stamping, when they lack columns or indexes of the models.
+    """
+    version = schema_fingerprint()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        missing = await conn.run_sync(missing_schema)
+        if missing:
+            raise SchemaMismatchError(
+                f"Database schema is behind the models (missing {', '.join(missing)}). "
+                "Run alembic upgrade head, then scripts/init_db.py again."
+            )
+        await conn.execute(delete(SchemaVersion))
+        await conn.execute(SchemaVersion.__table__.insert().values(version=version))
+    return version
+
+
+async def get_schema_version(engine: AsyncEngine) -> str | None:
+    """The stamped schema version, or None for an unstamped database"""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(select(SchemaVersion.version))
+        except DBAPIError:
+            # No schema_version table: never initialised by init_db.py
+            return None
+        return result.scalar_one_or_none()
+
+
+async def check_schema(engine: AsyncEngine) -> None:
+    """Raise SchemaMismatchError unless the database was stamped with the current models"""
+    expected = schema_fingerprint()
+    actual = await get_schema_version(engine)
+    if actual != expected:
+        raise SchemaMismatchError(
+            f"Database schema version is {actual or 'missing'}, expected {expected}. "
+            "Apply migrations (alembic upgrade head) and run scripts/init_db.py "
+            "before starting the application; see Database Migrations in the README."
+        )
@@ -1,27 +1,49 @@
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from app.core.config import get_settings
+from app.db import change_tracking  # noqa - registers commit-time change tracking
+from app.db.pool import engine_options
+from app.db.routing import EngineRouter, RoutingSession, ROUTER_KEY
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=False,
-)
 
-AsyncSessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
+def create_engine(url: str) -> AsyncEngine:
+    """Create an async engine with the application's defaults and pool settings"""
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        echo=False,
+        **engine_options(url, settings),
+    )
+
+
+def create_sessionmaker(router: EngineRouter) -> async_sessionmaker[AsyncSession]:
+    """Create a session factory that routes statements through the given router"""
+    return async_sessionmaker(
+        bind=router.primary,
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+        info={ROUTER_KEY: router},
+    )
+
+
+engine = create_engine(settings.DATABASE_URL)
+
+router = EngineRouter(
+    engine,
+    [create_engine(url) for url in settings.DATABASE_REPLICA_URLS],
 )
 
+AsyncSessionLocal = create_sessionmaker(router)
+
 
 async def get_db():
     """Dependency for getting async database sessions"""
     async with AsyncSessionLocal() as session:
         yield session
-
@@ -0,0 +1,103 @@
+"""
+Unit of work for grouping repository writes into one transaction, and its
+counterpart for giving each call a session of its own
+"""
+
+import asyncio
+import functools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.db.routing import PINNED_KEY, pin_to_primary
+
+# Session.info key that switches repositories from commit-per-write to savepoints
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+T = TypeVar("T")
+
+
+def in_unit_of_work(session: AsyncSession) -> bool:
+    """Check whether the session is currently inside a unit of work"""
+    return bool(session.info.get(UNIT_OF_WORK_KEY))
+
+
+class UnitOfWork:
+    """
+    Share one transaction across every repository write made through a session
+
+    While active, repository writes run inside savepoints instead of committing,
+    so a failed write only rolls back itself. The outer transaction is committed
+    once when the block exits cleanly and rolled back on any exception
+    (including cancellation and timeouts).
+
+    Usage:
+        async with UnitOfWork(session):
+            await service.create_todo(...)
+            await service.update_by_text(...)
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session.info[UNIT_OF_WORK_KEY] = True
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.session.info.pop(UNIT_OF_WORK_KEY, None)
+        if exc_type is None:
+            await self.session.commit()
+        else:
+            await self.session.rollback()
+
+
+class SessionPerCall:
+    """
+    Run each call on its own short-lived session instead of one shared session
+
+    The counterpart of a UnitOfWork for long runs that mostly wait on
+    something else, like an agent waiting on the LLM. While a call runs, the
+    given repositories are bound to a fresh session from the factory. Their
+    writes commit as they are made, as outside a UnitOfWork, and the session
+    is closed when the call returns, so its pooled connection is not held
+    between calls. Calls are serialised, as calls sharing the repositories
+    would have to be anyway. Once a call has written (its session was pinned
+    to the primary), every later session is pinned too, so the run reads its
+    own writes rather than a replica that may not have them yet.
+
+    Usage:
+        calls = SessionPerCall(session_factory, [repo])
+        async with calls.session():
+            await service.create_todo(...)
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], repos: list):
+        self.session_factory = session_factory
+        self.repos = repos
+        self._lock = asyncio.Lock()
+        self._pinned = False
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        """Bind the repositories to a new session for the duration of the block"""
+        async with self._lock, self.session_factory() as session:
+            if self._pinned:
+                pin_to_primary(session)
+            previous = [repo.session for repo in self.repos]
+            for repo in self.repos:
+                repo.session = session
+            try:
+                yield session
+            finally:
+                self._pinned = bool(session.info.get(PINNED_KEY))
+                for repo, bound in zip(self.repos, previous):
+                    repo.session = bound
+
+    def wrap(self, func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        """Wrap a coroutine function so each call runs inside session()"""
+        @functools.wraps(func)
+        async def call(*args, **kwargs) -> T:
+            async with self.session():
+                return await func(*args, **kwargs)
+
+        return call
@@ -28,3 +28,16 @@ class TodoPriority(str, Enum):
     HIGH = "high"
     URGENT = "urgent"
 
+
+class AgentJobStatus(str, Enum):
+    """
+    Lifecycle of an asynchronous agent job
+
+    - queued: waiting for a worker
+    - running: claimed by a worker (returns to queued if the worker stops)
+    - succeeded / failed: finished; the result or error is stored
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
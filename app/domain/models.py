@@ -1,9 +1,9 @@
 from datetime import datetime
-from sqlalchemy import Boolean, String, Text, DateTime, Enum as SQLEnum
+from sqlalchemy import Boolean, Float, Index, Integer, LargeBinary, String, Text, DateTime, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from app.db.base import Base
-from app.domain.enums import TodoPriority
+from app.domain.enums import AgentJobStatus, TodoPriority
 
 
 class Todo(Base):
@@ -29,7 +29,141 @@ class Todo(Base):
         onupdate=func.now(),
         nullable=False
     )
+    # Bumped by every ORM UPDATE, which only matches the version it read
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
+    __table_args__ = (
+        # Keyset order of the delta sync; also serves max(updated_at) for ETags
+        Index("ix_todos_updated_at_id", "updated_at", "id"),
+    )
+
+    # Load server-generated timestamps with the INSERT/UPDATE (RETURNING)
+    # so flushed todos are complete without a follow-up SELECT; version_id_col
+    # makes UPDATE/DELETE conditional on the version (optimistic concurrency)
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
 
     def __repr__(self):
         return f"<Todo(id={self.id}, title='{self.title}', priority={self.priority}, completed={self.completed})>"
 
+
+
+class TodoEvent(Base):
+    """
+    Outbox of committed todo changes, written in the same transaction as the
+    change itself; ids order the change feed and let clients resume
+    """
+    __tablename__ = "todo_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    op: Mapped[str] = mapped_column(String(16), nullable=False)
+    todo_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # JSON of the todo after the change (TodoRead shape); null for deletes
+    data: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    __table_args__ = (
+        # Pruning by age and the delta sync's tombstone keyset
+        Index("ix_todo_events_created_at_id", "created_at", "id"),
+    )
+
+    def __repr__(self):
+        return f"<TodoEvent(id={self.id}, op='{self.op}', todo_id={self.todo_id})>"
+
+
+class IdempotencyRecord(Base):
+    """
+    Stored outcome of a write sent with an Idempotency-Key header
+
+    status is "pending" while the first request runs, then "completed"
+    with the response to replay.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(512), primary_key=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # JSON list of [name, value] pairs
+    headers: Mapped[str | None] = mapped_column(Text, nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(key='{self.key}', status='{self.status}')>"
+
+
+class RateLimitBucket(Base):
+    """Token bucket of one client, shared by every worker (RATE_LIMIT_BACKEND=database)"""
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Unix time of the last refill
+    refilled_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens})>"
+
+
+class AgentJob(Base):
+    """
+    Agent query queued through /agent/jobs and run by a background worker
+
+    A running job's worker refreshes heartbeat_at; a job whose heartbeat is
+    older than the lease belongs to a crashed worker and is run again.
+    """
+    __tablename__ = "agent_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    query: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(
+        SQLEnum(AgentJobStatus, name="agent_job_status", native_enum=False),
+        default=AgentJobStatus.QUEUED,
+        nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    worker_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # JSON: list of actions so far, and UsageStats
+    actions: Mapped[str] = mapped_column(Text, default="[]", nullable=False)
+    usage: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Workers claim the oldest queued (or abandoned running) job
+        Index("ix_agent_jobs_status_created_at", "status", "created_at"),
+    )
+
+    # Load created_at with the INSERT, so a submitted job needs no refresh
+    __mapper_args__ = {"eager_defaults": True}
+
+    def __repr__(self):
+        return f"<AgentJob(id='{self.id}', status={self.status}, attempts={self.attempts})>"
+
+
+class SchemaVersion(Base):
+    """Fingerprint of the models the database schema was created from (see app.db.schema)"""
+    __tablename__ = "schema_version"
+
+    version: Mapped[str] = mapped_column(String(64), primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f"<SchemaVersion(version='{self.version}')>"
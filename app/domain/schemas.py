@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, Field
-from app.domain.enums import TodoPriority
+from app.domain.enums import AgentJobStatus, TodoPriority
 
 
 class TodoCreate(BaseModel):
@@ -27,11 +27,40 @@ class TodoRead(BaseModel):
     priority: TodoPriority
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
 
 
+class TodoSyncPage(BaseModel):
+    """Schema for one page of a delta sync"""
+    changed: list[TodoRead]
+    deleted: list[int]
+    cursor: str
+    has_more: bool
+
+
+class TodoImportResult(BaseModel):
+    """Schema for the outcome of a bulk import"""
+    imported: int = Field(..., description="Number of todos imported")
+    skipped: int = Field(0, description="Near-duplicates skipped (with skip_duplicates)")
+    seconds: float = Field(..., description="Time spent importing")
+    rows_per_second: float = Field(..., description="Import throughput")
+
+
+class TodoDuplicateCluster(BaseModel):
+    """Schema for a group of near-duplicate todos, oldest first"""
+    todos: list[TodoRead]
+
+
+class TodoDuplicateReport(BaseModel):
+    """Schema for the near-duplicate clustering report"""
+    clusters: list[TodoDuplicateCluster]
+    total_clusters: int = Field(..., description="Clusters found, including those beyond the limit")
+    duplicate_todos: int = Field(..., description="Todos in a cluster beyond its first")
+
+
 class AgentRequest(BaseModel):
     """Schema for agent natural language requests"""
     query: str = Field(..., min_length=1, max_length=1000, description="Natural language query for the AI agent")
@@ -53,3 +82,17 @@ class AgentResponse(BaseModel):
     actions_taken: list[str] = []
     usage: UsageStats = Field(default_factory=UsageStats, description="Token usage and cost statistics")
 
+
+class AgentJobRead(BaseModel):
+    """Schema for an asynchronous agent job and its (partial) result"""
+    id: str
+    status: AgentJobStatus
+    query: str
+    attempts: int = Field(..., description="Runs started, including ones interrupted by a crash")
+    actions_taken: list[str] = Field([], description="Tool calls so far")
+    response: str | None = None
+    usage: UsageStats | None = None
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
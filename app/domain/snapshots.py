@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from datetime import datetime
+from app.domain.enums import TodoPriority
+from app.domain.models import Todo
+
+
+@dataclass(slots=True, frozen=True)
+class TodoSnapshot:
+    """
+    Compact, read-only copy of a todo row
+
+    Mirrors the attributes of the Todo model so it can be formatted by the
+    tools and validated into TodoRead, but holds no session or ORM state.
+    """
+    id: int
+    title: str
+    description: str | None
+    completed: bool
+    priority: TodoPriority
+    created_at: datetime
+    updated_at: datetime
+    version: int
+
+    @classmethod
+    def from_todo(cls, todo: Todo) -> "TodoSnapshot":
+        return cls(
+            id=todo.id,
+            title=todo.title,
+            description=todo.description,
+            completed=todo.completed,
+            priority=todo.priority,
+            created_at=todo.created_at,
+            updated_at=todo.updated_at,
+            version=todo.version,
+        )
+
+
+@dataclass(slots=True, frozen=True)
+class TodoSummary:
+    """
+    The columns a todo listing shows, read without the ORM
+
+    Built from projected column queries, so no Todo entity is hydrated into
+    the identity map. description may be a truncated preview depending on
+    the query that produced it.
+    """
+    id: int
+    title: str
+    description: str | None
+    completed: bool
+    priority: TodoPriority
+    created_at: datetime
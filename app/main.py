@@ -3,14 +3,23 @@ Todo AI Agent - FastAPI Application Entry Point
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.core.broadcast import get_broadcast
+from app.services.change_feed import get_change_feed
+from app.services.agent_job_service import get_agent_job_runner
 from app.api.v1.router import api_router
-from app.db.base import Base
-from app.db.session import engine
+from app.api.idempotency import IdempotencyMiddleware
+from app.core.security import AdmissionControlMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware, get_tracer
+from app.db.schema import check_schema, create_schema
+from app.db.session import AsyncSessionLocal, engine, router
+from app.db.pool import pool_status
 
 settings = get_settings()
 logger = get_logger(__name__)
@@ -20,19 +29,33 @@ logger = get_logger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    logger.info(f"Starting {settings.APP_NAME}")
+    logger.info(f"Starting {settings.APP_NAME} (role: {settings.APP_ROLE})")
     
-    # Create tables (for development - use Alembic in production)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.DB_CREATE_ALL_ON_STARTUP:
+        version = await create_schema(engine)
+        logger.info(f"Database tables created (schema {version})")
+    else:
+        await check_schema(engine)
     
-    logger.info("Database tables created")
+    await get_broadcast().start()
+    change_feed = get_change_feed()
+    if change_feed:
+        await change_feed.start(AsyncSessionLocal)
+    job_runner = get_agent_job_runner()
+    if job_runner:
+        await job_runner.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down application")
-    await engine.dispose()
+    if job_runner:
+        await job_runner.stop()
+    if change_feed:
+        await change_feed.stop()
+    await get_broadcast().stop()
+    await router.dispose()
+    get_tracer().shutdown()
 
 
 app = FastAPI(
@@ -42,6 +65,27 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Rate and concurrency limits for agent runs (inside idempotency, so replays skip them)
+app.add_middleware(AdmissionControlMiddleware, paths=["/api/v1/agent/query"])
+app.add_middleware(AdmissionControlMiddleware, paths=["/api/v1/agent/jobs"], limit_concurrency=False)
+
+# Idempotency-Key support for non-idempotent writes (inside CORS, so replays get CORS headers)
+app.add_middleware(
+    IdempotencyMiddleware,
+    paths=[
+        "/api/v1/todos",
+        "/api/v1/todos/import",
+        "/api/v1/agent/query",
+        "/api/v1/agent/jobs",
+    ],
+)
+
+# Opt-in request profiling (outside the limits, so queueing shows up in the total)
+app.add_middleware(ProfilingMiddleware, paths=["/api/v1"])
+
+# Trace spans per request, continuing the caller's traceparent
+app.add_middleware(TracingMiddleware, paths=["/api/v1"])
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -70,3 +114,16 @@ async def health():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+
+@app.get("/health/db")
+async def health_db():
+    """Database health: per-engine connection health and live pool statistics"""
+    engines = {
+        name: {**router.health[name].as_dict(), "pool": pool_status(db_engine)}
+        for name, db_engine in router.engines.items()
+    }
+    healthy = router.health["primary"].healthy
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "healthy" if healthy else "unhealthy", "engines": engines},
+    )
@@ -0,0 +1,164 @@
+import json
+import uuid
+from datetime import datetime
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import pin_to_primary
+from app.db.unit_of_work import in_unit_of_work
+from app.domain.enums import AgentJobStatus
+from app.domain.models import AgentJob
+from app.domain.schemas import UsageStats
+from app.utils.datetime import utc_now
+
+
+class AgentJobRepository:
+    """Repository for the agent_jobs queue"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # Job state changes must be read back from where they were written
+        pin_to_primary(session)
+
+    async def create(self, query: str) -> AgentJob:
+        """Enqueue a job for query"""
+        job = AgentJob(id=uuid.uuid4().hex, query=query, status=AgentJobStatus.QUEUED)
+        self.session.add(job)
+        await self.session.commit()
+        return job
+
+    async def get_by_id(self, job_id: str) -> AgentJob | None:
+        """Get a job by ID"""
+        result = await self.session.execute(
+            select(AgentJob)
+            .where(AgentJob.id == job_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalar_one_or_none()
+
+    async def claim_next(
+        self, worker_id: str, lease_expired_before: datetime, max_attempts: int
+    ) -> AgentJob | None:
+        """
+        Claim the oldest queued job, or a running job with attempts left
+        whose worker stopped heartbeating before lease_expired_before
+
+        Concurrent workers skip rows another worker is claiming (SKIP LOCKED
+        on Postgres); the claim is committed before it is returned.
+        """
+        result = await self.session.execute(
+            select(AgentJob)
+            .where(or_(
+                AgentJob.status == AgentJobStatus.QUEUED,
+                and_(
+                    AgentJob.status == AgentJobStatus.RUNNING,
+                    AgentJob.heartbeat_at < lease_expired_before,
+                    AgentJob.attempts < max_attempts,
+                ),
+            ))
+            .order_by(AgentJob.created_at, AgentJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            await self.session.commit()
+            return None
+
+        now = utc_now()
+        job.status = AgentJobStatus.RUNNING
+        job.attempts += 1
+        job.worker_id = worker_id
+        job.heartbeat_at = now
+        job.started_at = now
+        await self.session.commit()
+        return job
+
+    async def heartbeat(
+        self, job_id: str, worker_id: str, actions: list[str], usage: UsageStats
+    ) -> bool:
+        """Extend worker_id's lease on a job and record its progress; False if the lease was lost"""
+        return await self._update_owned(
+            job_id, worker_id,
+            heartbeat_at=utc_now(),
+            actions=json.dumps(actions),
+            usage=usage.model_dump_json(),
+        )
+
+    async def finish(
+        self,
+        job_id: str,
+        worker_id: str,
+        status: AgentJobStatus,
+        actions: list[str],
+        usage: UsageStats,
+        response: str | None = None,
+        error: str | None = None,
+    ) -> bool:
+        """
+        Store the outcome of a job run by worker_id
+
+        Inside a unit of work the update joins its transaction, so the
+        outcome commits together with the run's todo changes.
+        """
+        return await self._update_owned(
+            job_id, worker_id,
+            status=status,
+            response=response,
+            error=error,
+            actions=json.dumps(actions),
+            usage=usage.model_dump_json(),
+            finished_at=utc_now(),
+        )
+
+    async def requeue(self, job_id: str, worker_id: str) -> bool:
+        """Hand a job back to the queue (its worker is shutting down)"""
+        return await self._update_owned(
+            job_id, worker_id,
+            status=AgentJobStatus.QUEUED,
+            attempts=AgentJob.attempts - 1,
+            worker_id=None,
+            heartbeat_at=None,
+        )
+
+    async def fail_abandoned(self, lease_expired_before: datetime, max_attempts: int) -> int:
+        """Fail jobs whose workers stopped heartbeating max_attempts times"""
+        result = await self.session.execute(
+            update(AgentJob)
+            .where(
+                AgentJob.status == AgentJobStatus.RUNNING,
+                AgentJob.heartbeat_at < lease_expired_before,
+                AgentJob.attempts >= max_attempts,
+            )
+            .values(
+                status=AgentJobStatus.FAILED,
+                error=f"Abandoned after {max_attempts} attempts",
+                finished_at=utc_now(),
+            )
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def delete_finished_before(self, cutoff: datetime) -> int:
+        """Delete jobs finished before cutoff and return how many were removed"""
+        result = await self.session.execute(
+            delete(AgentJob).where(AgentJob.finished_at < cutoff)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def _update_owned(self, job_id: str, owner: str, **values) -> bool:
+        # Only the worker holding the lease may write, so a job taken over
+        # after a missed heartbeat is not overwritten by its old worker
+        result = await self.session.execute(
+            update(AgentJob)
+            .where(
+                AgentJob.id == job_id,
+                AgentJob.worker_id == owner,
+                AgentJob.status == AgentJobStatus.RUNNING,
+            )
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if not in_unit_of_work(self.session):
+            await self.session.commit()
+        return result.rowcount == 1
@@ -0,0 +1,61 @@
+from datetime import datetime
+from sqlalchemy import select, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
+from app.db.routing import pin_to_primary
+from app.domain.models import TodoEvent
+
+
+class TodoEventRepository:
+    """Repository for the todo_events outbox"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        # A replica may not have the events the feed has already delivered live
+        pin_to_primary(session)
+
+    async def get_after(self, event_id: int, limit: int = 500) -> list[TodoEvent]:
+        """Get up to limit events with an id greater than event_id, oldest first"""
+        result = await self.session.execute(
+            select(TodoEvent)
+            .where(TodoEvent.id > event_id)
+            .order_by(TodoEvent.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_by_id(self, event_id: int) -> TodoEvent | None:
+        """Get an event by ID"""
+        result = await self.session.execute(
+            select(TodoEvent).where(TodoEvent.id == event_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_tombstones_since(
+        self, created_at: datetime, event_id: int, limit: int
+    ) -> list[TodoEvent]:
+        """Get delete and resync events ordered after (created_at, event_id)"""
+        result = await self.session.execute(
+            select(TodoEvent)
+            .where(
+                TodoEvent.op.in_(("delete", "resync")),
+                tuple_(TodoEvent.created_at, TodoEvent.id) > tuple_(created_at, event_id),
+            )
+            .order_by(TodoEvent.created_at, TodoEvent.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_bounds(self) -> tuple[int | None, int | None]:
+        """Get the oldest and newest retained event ids"""
+        result = await self.session.execute(select(func.min(TodoEvent.id), func.max(TodoEvent.id)))
+        oldest, newest = result.one()
+        return oldest, newest
+
+    async def delete_before(self, cutoff: datetime) -> int:
+        """Delete events created before cutoff and return how many were removed"""
+        result = await self.session.execute(
+            delete(TodoEvent).where(TodoEvent.created_at < cutoff)
+        )
+        await self.session.commit()
+        return result.rowcount
@@ -1,8 +1,138 @@
-from sqlalchemy import select, or_, delete
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator
+from sqlalchemy import BindParameter, Integer, Select, bindparam, select, or_, delete, insert, text, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy.sql import func
+from app.db.change_tracking import TodoChange, record_changes
+from app.db.unit_of_work import in_unit_of_work
 from app.domain.models import Todo
 from app.domain.enums import TodoPriority
+from app.domain.schemas import TodoRead
+from app.domain.snapshots import TodoSnapshot, TodoSummary
+from app.utils.exceptions import TodoConflictError
+
+
+def _summary_columns(description_chars: int | BindParameter | None = None) -> list:
+    """Columns of TodoSummary, in field order"""
+    description = Todo.description
+    if description_chars is not None:
+        description = func.substr(Todo.description, 1, description_chars).label("description")
+    return [Todo.id, Todo.title, description, Todo.completed, Todo.priority, Todo.created_at]
+
+
+def _snapshot_columns() -> list:
+    """Columns of TodoSnapshot, in field order"""
+    return [
+        Todo.id, Todo.title, Todo.description, Todo.completed, Todo.priority,
+        Todo.created_at, Todo.updated_at, Todo.version,
+    ]
+
+
+def _snapshot_data(snapshot: TodoSnapshot) -> dict:
+    return TodoRead.model_validate(snapshot).model_dump(mode="json")
+
+
+# Statements are built once, with bound parameters for the values that vary
+# per call. SQLAlchemy caches the compiled SQL per statement shape anyway;
+# reusing the statement also skips rebuilding the expression and most of the
+# cache key work on every call, and keeps the SQL text (and so the asyncpg
+# prepared statement) identical from call to call.
+
+_IDS = bindparam("ids", expanding=True)
+_PATTERN = bindparam("pattern")
+
+
+def _matching_text(condition):
+    """Title or description (lowercased) matching a condition"""
+    return or_(condition(func.lower(Todo.title)), condition(func.lower(Todo.description)))
+
+
+_ALL = select(Todo)
+_BY_ID = select(Todo).where(Todo.id == bindparam("todo_id"))
+_BY_IDS = select(Todo).where(Todo.id.in_(_IDS))
+_BY_EXACT_TEXT = select(Todo).where(_matching_text(lambda column: column == bindparam("text")))
+_BY_PARTIAL_TEXT = select(Todo).where(_matching_text(lambda column: column.like(_PATTERN)))
+_BY_COMPLETED = select(Todo).where(Todo.completed == bindparam("completed"))
+_BY_PRIORITY = select(Todo).where(Todo.priority == bindparam("priority"))
+_SUMMARIES_BY_IDS = select(*_summary_columns()).where(Todo.id.in_(_IDS))
+_SUMMARIES_BY_PARTIAL_TEXT = select(*_summary_columns()).where(
+    _matching_text(lambda column: column.like(_PATTERN))
+)
+_EXISTING_TITLES = (
+    select(func.lower(Todo.title))
+    .where(func.lower(Todo.title).in_(bindparam("titles", expanding=True)))
+    .distinct()
+)
+# The session brings todos it has loaded up to date after these by matching
+# the returned ids ("fetch"); its default evaluates the WHERE clause in
+# Python, which sees the bound ids as None. It applies the SET values the
+# same way, hence one UPDATE per status rather than a bound status
+_SET_COMPLETED = {
+    completed: update(Todo)
+    .where(Todo.id.in_(_IDS), Todo.completed != completed)
+    .values(completed=completed, version=Todo.version + 1)
+    .returning(*_snapshot_columns())
+    .execution_options(synchronize_session="fetch")
+    for completed in (False, True)
+}
+_DELETE_BY_IDS = (
+    delete(Todo)
+    .where(Todo.id.in_(_IDS))
+    .returning(*_snapshot_columns())
+    .execution_options(synchronize_session="fetch")
+)
+_DELETE_ALL = delete(Todo).returning(Todo.id, Todo.completed, Todo.priority)
+
+
+@lru_cache(maxsize=None)
+def _summaries_statement(completed: bool, priority: bool, preview: bool) -> Select:
+    """get_summaries() statement for the filters in use (one of eight shapes)"""
+    description_chars = bindparam("description_chars", type_=Integer) if preview else None
+    stmt = select(*_summary_columns(description_chars))
+    if completed:
+        stmt = stmt.where(Todo.completed == bindparam("completed"))
+    if priority:
+        stmt = stmt.where(Todo.priority == bindparam("priority"))
+    return stmt
+
+
+@lru_cache(maxsize=None)
+def _watermark_statement(completed: bool) -> Select:
+    stmt = select(func.count(Todo.id), func.max(Todo.updated_at))
+    if completed:
+        stmt = stmt.where(Todo.completed == bindparam("completed"))
+    return stmt
+
+
+# Statements over caller-chosen Todo columns are cached by attribute names
+@lru_cache(maxsize=64)
+def _columns_statement(names: tuple[str, ...], completed: bool, ids: bool) -> Select:
+    stmt = select(*[getattr(Todo, name) for name in names])
+    if completed:
+        stmt = stmt.where(Todo.completed == bindparam("completed"))
+    if ids:
+        stmt = stmt.where(Todo.id.in_(_IDS))
+    return stmt
+
+
+@lru_cache(maxsize=64)
+def _changed_since_statement(names: tuple[str, ...]) -> Select:
+    return (
+        select(*[getattr(Todo, name) for name in names])
+        .where(
+            tuple_(Todo.updated_at, Todo.id)
+            > tuple_(bindparam("updated_at", type_=Todo.updated_at.type), bindparam("todo_id"))
+        )
+        .order_by(Todo.updated_at, Todo.id)
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+def _names(columns: list) -> tuple[str, ...]:
+    return tuple(column.key for column in columns)
 
 
 class TodoRepository:
@@ -11,78 +141,283 @@ class TodoRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @asynccontextmanager
+    async def _write(self):
+        """
+        Scope a write: commit on success, or use a savepoint when the
+        session is inside a UnitOfWork so the outer transaction commits once
+
+        Raises TodoConflictError when an UPDATE/DELETE matched no row because
+        another transaction changed the todo's version first; the write is
+        rolled back, which expires the stale todo so the next read is fresh.
+        """
+        nested = in_unit_of_work(self.session)
+        try:
+            if nested:
+                async with self.session.begin_nested():
+                    yield
+            else:
+                yield
+                await self.session.commit()
+        except StaleDataError as e:
+            if not nested:
+                await self.session.rollback()
+            raise TodoConflictError("Todo was changed by another request") from e
+
     async def create(self, todo: Todo) -> Todo:
         """Create a new todo in the database"""
-        self.session.add(todo)
-        await self.session.commit()
+        async with self._write():
+            self.session.add(todo)
         await self.session.refresh(todo)
         return todo
 
+    async def create_many(self, todos: list[Todo]) -> list[Todo]:
+        """Create several todos in one flush (a single multi-row INSERT)"""
+        async with self._write():
+            self.session.add_all(todos)
+        return todos
+
     async def get_all(self) -> list[Todo]:
         """Get all todos"""
-        result = await self.session.execute(select(Todo))
+        result = await self.session.execute(_ALL)
         return list(result.scalars().all())
 
-    async def get_by_id(self, todo_id: int) -> Todo | None:
-        """Get a todo by ID"""
+    async def get_columns(
+        self, columns: list, completed: bool | None = None, ids: list[int] | None = None
+    ) -> list:
+        """Get only the given columns of all todos, optionally filtered by completion status or ids"""
+        stmt = _columns_statement(_names(columns), completed is not None, ids is not None)
+        result = await self.session.execute(stmt, {"completed": completed, "ids": ids})
+        return list(result.all())
+
+    async def get_summaries(
+        self,
+        completed: bool | None = None,
+        priority: TodoPriority | None = None,
+        description_chars: int | None = None,
+    ) -> list[TodoSummary]:
+        """
+        Get listing rows without loading Todo entities
+
+        Only the TodoSummary columns are selected; with description_chars the
+        description is cut to that many characters in the database.
+        """
+        stmt = _summaries_statement(
+            completed is not None, priority is not None, description_chars is not None
+        )
+        result = await self.session.execute(stmt, {
+            "completed": completed,
+            "priority": priority and priority.value,
+            "description_chars": description_chars,
+        })
+        return [TodoSummary(*row) for row in result]
+
+    async def get_summaries_by_partial_text(self, text: str) -> list[TodoSummary]:
+        """Get listing rows (with full descriptions) by partial match on title or description"""
+        result = await self.session.execute(
+            _SUMMARIES_BY_PARTIAL_TEXT, {"pattern": f"%{text.lower()}%"}
+        )
+        return [TodoSummary(*row) for row in result]
+
+    async def get_changed_since(
+        self, columns: list, updated_at: datetime, todo_id: int, limit: int
+    ) -> list:
+        """
+        Get the given columns of todos ordered after (updated_at, todo_id)
+
+        Keyset pagination over the (updated_at, id) index, so the cost
+        follows the number of changed rows rather than the table size.
+        """
         result = await self.session.execute(
-            select(Todo).where(Todo.id == todo_id)
+            _changed_since_statement(_names(columns)),
+            {"updated_at": updated_at, "todo_id": todo_id, "limit": limit},
         )
+        return list(result.all())
+
+    async def get_by_id(self, todo_id: int) -> Todo | None:
+        """Get a todo by ID"""
+        result = await self.session.execute(_BY_ID, {"todo_id": todo_id})
         return result.scalar_one_or_none()
 
+    async def get_by_ids(self, todo_ids: list[int]) -> list[Todo]:
+        """Get the todos with the given ids (missing ids are skipped)"""
+        result = await self.session.execute(_BY_IDS, {"ids": todo_ids})
+        return list(result.scalars().all())
+
+    async def get_summaries_by_ids(self, todo_ids: list[int]) -> list[TodoSummary]:
+        """Get listing rows (with full descriptions) for the given ids"""
+        result = await self.session.execute(_SUMMARIES_BY_IDS, {"ids": todo_ids})
+        return [TodoSummary(*row) for row in result]
+
     async def get_by_exact_text(self, text: str) -> Todo | None:
         """Get a todo by exact match on title or description"""
-        result = await self.session.execute(
-            select(Todo).where(
-                or_(
-                    func.lower(Todo.title) == text.lower(),
-                    func.lower(Todo.description) == text.lower(),
-                )
-            )
-        )
+        result = await self.session.execute(_BY_EXACT_TEXT, {"text": text.lower()})
         return result.scalar_one_or_none()
 
     async def get_by_partial_text(self, text: str) -> list[Todo]:
         """Get todos by partial match on title or description"""
-        like = f"%{text.lower()}%"
-        result = await self.session.execute(
-            select(Todo).where(
-                or_(
-                    func.lower(Todo.title).like(like),
-                    func.lower(Todo.description).like(like),
-                )
-            )
-        )
+        result = await self.session.execute(_BY_PARTIAL_TEXT, {"pattern": f"%{text.lower()}%"})
         return list(result.scalars().all())
 
+    async def get_existing_titles(self, titles: list[str]) -> set[str]:
+        """Which of the titles (compared lowercased) some todo already has"""
+        lowered = {title.lower() for title in titles}
+        if not lowered:
+            return set()
+        result = await self.session.execute(_EXISTING_TITLES, {"titles": list(lowered)})
+        return set(result.scalars().all())
+
     async def get_by_completed(self, completed: bool) -> list[Todo]:
         """Get todos filtered by completion status"""
-        result = await self.session.execute(
-            select(Todo).where(Todo.completed == completed)
-        )
+        result = await self.session.execute(_BY_COMPLETED, {"completed": completed})
         return list(result.scalars().all())
 
     async def get_by_priority(self, priority: TodoPriority) -> list[Todo]:
         """Get todos filtered by priority level"""
+        result = await self.session.execute(_BY_PRIORITY, {"priority": priority.value})
+        return list(result.scalars().all())
+
+    async def get_watermark(self, completed: bool | None = None) -> tuple[int, datetime | None]:
+        """Get the row count and newest updated_at, optionally filtered by completion status"""
         result = await self.session.execute(
-            select(Todo).where(Todo.priority == priority.value)
+            _watermark_statement(completed is not None), {"completed": completed}
         )
-        return list(result.scalars().all())
+        count, max_updated_at = result.one()
+        return count, max_updated_at
+
+    async def stream_batches(self, columns: list, batch_size: int = 1000) -> AsyncIterator[list]:
+        """
+        Stream rows of the given Todo columns in id order, batch_size at a time
+
+        Uses a server-side cursor (where the driver supports one) and plain
+        column rows, so memory stays constant regardless of table size.
+        """
+        result = await self.session.stream(
+            select(*columns).order_by(Todo.id).execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    async def bulk_insert(self, rows: list[dict]) -> list[int]:
+        """
+        Insert many todos at once and return their ids
+
+        Rows are column dicts as produced by normalize_import_row(); they all
+        carry the same keys. On Postgres (asyncpg) rows are loaded with COPY,
+        elsewhere with a single executemany INSERT.
+        """
+        if not rows:
+            return []
+        async with self._write():
+            if self.session.bind.dialect.driver == "asyncpg":
+                ids = await self._copy_rows(rows)
+            else:
+                result = await self.session.execute(
+                    insert(Todo).returning(Todo.id, sort_by_parameter_order=True), rows
+                )
+                ids = list(result.scalars().all())
+            await self.session.run_sync(record_changes, [
+                TodoChange(
+                    "create",
+                    None,
+                    tuple({row["completed"] for row in rows}),
+                    tuple({row["priority"].value for row in rows}),
+                )
+            ])
+        return ids
+
+    async def _copy_rows(self, rows: list[dict]) -> list[int]:
+        """Load rows with Postgres COPY, allocating ids from the sequence unless given"""
+        keep_ids = "id" in rows[0]
+        if keep_ids:
+            ids = [row["id"] for row in rows]
+        else:
+            result = await self.session.execute(
+                text("SELECT nextval(pg_get_serial_sequence('todos', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(rows)},
+            )
+            ids = list(result.scalars().all())
+
+        columns = ["id", "title", "description", "completed", "priority", "created_at", "updated_at"]
+        records = [
+            (
+                todo_id, row["title"], row["description"], row["completed"],
+                row["priority"].name, row["created_at"], row["updated_at"],
+            )
+            for todo_id, row in zip(ids, rows)
+        ]
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Todo.__tablename__, records=records, columns=columns
+        )
+
+        if keep_ids:
+            await self.session.execute(text(
+                "SELECT setval(pg_get_serial_sequence('todos', 'id'), "
+                "(SELECT coalesce(max(id), 1) FROM todos))"
+            ))
+        return ids
 
-    async def update(self, todo: Todo) -> Todo:
-        """Update an existing todo"""
-        await self.session.commit()
+    async def update(self, todo: Todo, values: dict | None = None) -> Todo:
+        """Update an existing todo, applying the given field values"""
+        async with self._write():
+            for field, value in (values or {}).items():
+                setattr(todo, field, value)
         await self.session.refresh(todo)
         return todo
 
     async def delete(self, todo: Todo) -> None:
         """Delete a todo"""
-        await self.session.delete(todo)
-        await self.session.commit()
+        async with self._write():
+            await self.session.delete(todo)
+
+    async def set_completed_many(self, todo_ids: list[int], completed: bool) -> list[TodoSnapshot]:
+        """
+        Set the completion status of the given todos with one UPDATE
+
+        Todos that already have the status are left alone; the others get
+        their version bumped, so concurrent ORM writes to them conflict as
+        usual. Returns the changed todos as they are after the update.
+        """
+        if not todo_ids:
+            return []
+        async with self._write():
+            result = await self.session.execute(_SET_COMPLETED[completed], {"ids": todo_ids})
+            changed = [TodoSnapshot(*row) for row in result]
+            await self.session.run_sync(record_changes, [
+                TodoChange(
+                    "update",
+                    todo.id,
+                    (not completed, completed),
+                    (todo.priority.value,),
+                    todo=_snapshot_data(todo),
+                )
+                for todo in changed
+            ])
+        return changed
+
+    async def delete_many(self, todo_ids: list[int]) -> list[TodoSnapshot]:
+        """Delete the given todos with one DELETE and return the deleted rows"""
+        if not todo_ids:
+            return []
+        async with self._write():
+            result = await self.session.execute(_DELETE_BY_IDS, {"ids": todo_ids})
+            deleted = [TodoSnapshot(*row) for row in result]
+            await self.session.run_sync(record_changes, [
+                TodoChange("delete", todo.id, (todo.completed,), (todo.priority.value,))
+                for todo in deleted
+            ])
+        return deleted
 
     async def delete_all(self) -> int:
         """Delete all todos and return count of deleted items"""
-        result = await self.session.execute(delete(Todo))
-        await self.session.commit()
-        return result.rowcount
+        async with self._write():
+            result = await self.session.execute(_DELETE_ALL)
+            deleted = result.all()
+            await self.session.run_sync(record_changes, [
+                TodoChange("delete", todo_id, (completed,), (priority.value,))
+                for todo_id, completed, priority in deleted
+            ])
+        return len(deleted)
 
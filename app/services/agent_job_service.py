@@ -0,0 +1,268 @@
+"""
+Asynchronous agent jobs
+
+POST /agent/jobs stores the query in the agent_jobs table and returns at
+once; AgentJobRunner tasks in each application worker claim queued jobs and
+run them through AgentService, so LLM latency no longer holds HTTP
+connections. While a job runs its worker heartbeats, saving the actions
+taken so far and the usage. A job whose heartbeat stops (the process
+crashed) is claimed again by another worker after AGENT_JOB_LEASE_SECONDS,
+up to AGENT_JOB_MAX_ATTEMPTS times.
+
+A run's todo changes and the job's "succeeded" outcome are committed in one
+transaction, and only while the worker still holds the job's lease. A run
+that is interrupted, fails, or finishes after another worker took its job
+over leaves no todo changes behind, so a job's changes are applied at most
+once even though the job itself may run more than once.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import timedelta
+from functools import lru_cache
+from typing import Callable
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.unit_of_work import UnitOfWork
+from app.domain.enums import AgentJobStatus
+from app.domain.models import AgentJob
+from app.repositories.agent_job_repository import AgentJobRepository
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_service import AgentService
+from app.services.run_read_cache import RunReadCache
+from app.services.todo_cache import get_todo_cache
+from app.services.duplicate_index import get_duplicate_index
+from app.services.todo_index import get_todo_index
+from app.services.todo_service import TodoService
+from app.utils.constants import AGENT_TIMEOUT_SECONDS
+from app.utils.datetime import utc_now
+from app.utils.exceptions import AgentJobLeaseLostError
+
+logger = get_logger(__name__)
+
+AgentServiceFactory = Callable[[AsyncSession], AgentService]
+
+
+def build_agent_service(session: AsyncSession) -> AgentService:
+    """Build an AgentService whose tools use session (the runner wraps the run in a unit of work)"""
+    # LangChain is imported when the first job runs, not when the app starts
+    from app.agents.executor import build_agent_executor
+    from app.tools.todo_tools import build_todo_tools
+
+    todo_service = TodoService(
+        TodoRepository(session),
+        cache=get_todo_cache(),
+        index=get_todo_index(),
+        duplicates=get_duplicate_index(),
+    )
+    reads = RunReadCache(todo_service)
+    agent_executor = build_agent_executor(build_todo_tools(todo_service, reads))
+    return AgentService(agent_executor, read_cache=reads)
+
+
+class AgentJobService:
+    """Service for submitting and looking up agent jobs"""
+
+    def __init__(self, repo: AgentJobRepository):
+        self.repo = repo
+
+    async def submit(self, query: str) -> AgentJob:
+        """Queue query to be run by a job worker"""
+        job = await self.repo.create(query)
+        runner = get_agent_job_runner()
+        if runner is not None:
+            runner.notify()
+        return job
+
+    async def get(self, job_id: str) -> AgentJob | None:
+        """Get a job with its current status and progress"""
+        return await self.repo.get_by_id(job_id)
+
+
+class AgentJobRunner:
+    """Pool of worker tasks running queued agent jobs in this process"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        agent_service_factory: AgentServiceFactory = build_agent_service,
+        concurrency: int = 2,
+        poll_interval: float = 2.0,
+        lease: timedelta = timedelta(seconds=60),
+        max_attempts: int = 3,
+        retention: timedelta = timedelta(hours=24),
+        timeout: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.agent_service_factory = agent_service_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+        # Jobs run off the request path, so they may take longer than a query
+        self.timeout = timeout
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._wakeup: asyncio.Event | None = None
+        self._stopping: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(loop.create_task(self._maintain()))
+        logger.info(f"Started {self.concurrency} agent job workers ({self.worker_id})")
+
+    async def stop(self, timeout: float = AGENT_TIMEOUT_SECONDS) -> None:
+        """
+        Stop the workers, giving running jobs up to timeout seconds to finish
+
+        Jobs still running after that are cancelled and go back to the queue.
+        """
+        if not self._tasks:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        _, running = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers: a job was queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_next(self) -> bool:
+        """Claim and run one job; False when there was none"""
+        async with self.session_factory() as session:
+            job = await AgentJobRepository(session).claim_next(
+                self.worker_id, utc_now() - self.lease, self.max_attempts
+            )
+        if job is None:
+            return False
+        await self._run(job.id, job.query, job.attempts)
+        return True
+
+    async def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                ran = await self.run_next()
+            except Exception as e:
+                logger.error(f"Agent job worker failed: {e}")
+                ran = False
+            if ran:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            if not self._stopping.is_set():
+                self._wakeup.clear()
+
+    async def _run(self, job_id: str, query: str, attempt: int) -> None:
+        from app.agents.callbacks import ProgressTrackingCallback
+
+        logger.info(f"Running agent job {job_id} (attempt {attempt})")
+        progress = ProgressTrackingCallback(model_name=get_settings().OPENROUTER_MODEL)
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(job_id, progress))
+        try:
+            async with self.session_factory() as session:
+                async with UnitOfWork(session):
+                    result = await self.agent_service_factory(session).process_query(
+                        query, callback=progress, timeout=self.timeout
+                    )
+                    finished = await AgentJobRepository(session).finish(
+                        job_id, self.worker_id, AgentJobStatus.SUCCEEDED,
+                        actions=progress.actions,
+                        usage=progress.get_usage_stats(),
+                        response=result["response"],
+                    )
+                    if not finished:
+                        # Roll the run back: the job's new worker makes the changes
+                        raise AgentJobLeaseLostError(f"Agent job {job_id} was taken over")
+            logger.info(f"Agent job {job_id} succeeded")
+            return
+        except AgentJobLeaseLostError:
+            logger.warning(
+                f"Agent job {job_id} was taken over by another worker; its changes were rolled back"
+            )
+            return
+        except asyncio.CancelledError:
+            try:
+                async with self.session_factory() as session:
+                    await AgentJobRepository(session).requeue(job_id, self.worker_id)
+            except Exception as e:
+                # The lease expires and another worker picks the job up
+                logger.error(f"Failed to requeue agent job {job_id}: {e}")
+            raise
+        except Exception as e:
+            error = str(e)
+        finally:
+            heartbeat.cancel()
+
+        # The run was rolled back; record the failure on its own
+        async with self.session_factory() as session:
+            finished = await AgentJobRepository(session).finish(
+                job_id, self.worker_id, AgentJobStatus.FAILED,
+                actions=progress.actions,
+                usage=progress.get_usage_stats(),
+                error=error,
+            )
+        if not finished:
+            logger.warning(f"Agent job {job_id} was taken over by another worker")
+        logger.info(f"Agent job {job_id} failed")
+
+    async def _heartbeat(self, job_id: str, progress) -> None:
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            try:
+                async with self.session_factory() as session:
+                    await AgentJobRepository(session).heartbeat(
+                        job_id, self.worker_id, list(progress.actions), progress.get_usage_stats()
+                    )
+            except Exception as e:
+                logger.error(f"Failed to heartbeat agent job {job_id}: {e}")
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.lease.total_seconds())
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                async with self.session_factory() as session:
+                    repo = AgentJobRepository(session)
+                    failed = await repo.fail_abandoned(utc_now() - self.lease, self.max_attempts)
+                    removed = await repo.delete_finished_before(utc_now() - self.retention)
+                if failed or removed:
+                    logger.info(f"Failed {failed} abandoned and removed {removed} old agent jobs")
+            except Exception as e:
+                logger.error(f"Agent job maintenance failed: {e}")
+
+
+@lru_cache
+def get_agent_job_runner() -> AgentJobRunner | None:
+    """Get the process-wide job runner, or None when this process runs no jobs"""
+    settings = get_settings()
+    if settings.AGENT_JOB_WORKERS <= 0 or settings.APP_ROLE == "rest":
+        return None
+
+    from app.db.session import AsyncSessionLocal
+
+    return AgentJobRunner(
+        AsyncSessionLocal,
+        concurrency=settings.AGENT_JOB_WORKERS,
+        poll_interval=settings.AGENT_JOB_POLL_SECONDS,
+        lease=timedelta(seconds=settings.AGENT_JOB_LEASE_SECONDS),
+        max_attempts=settings.AGENT_JOB_MAX_ATTEMPTS,
+        retention=timedelta(hours=settings.AGENT_JOB_RETENTION_HOURS),
+        timeout=settings.AGENT_JOB_TIMEOUT_SECONDS,
+    )
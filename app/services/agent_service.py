@@ -1,7 +1,16 @@
+import asyncio
+from typing import TYPE_CHECKING
 from app.core.logging import get_logger
+from app.core.tracing import get_tracer
 from app.utils.exceptions import AgentExecutionError
-from app.agents.callbacks import TokenTrackingCallback
+from app.utils.constants import AGENT_TIMEOUT_SECONDS
 from app.core.config import get_settings
+from app.db.unit_of_work import UnitOfWork
+from app.services.run_read_cache import RunReadCache
+
+if TYPE_CHECKING:
+    # app.agents pulls in LangChain; it is imported when an agent first runs
+    from app.agents.callbacks import TokenTrackingCallback
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -10,35 +19,73 @@ settings = get_settings()
 class AgentService:
     """Service for orchestrating AI agent interactions"""
 
-    def __init__(self, agent_executor):
+    def __init__(
+        self,
+        agent_executor,
+        unit_of_work: UnitOfWork | None = None,
+        read_cache: RunReadCache | None = None,
+    ):
         self.agent_executor = agent_executor
+        self.unit_of_work = unit_of_work
+        self.read_cache = read_cache
 
-    async def process_query(self, query: str) -> dict:
+    async def process_query(
+        self,
+        query: str,
+        callback: "TokenTrackingCallback | None" = None,
+        timeout: float | None = None,
+    ) -> dict:
         """
         Process a natural language query through the AI agent
         
+        When a unit of work is configured, every tool call in the run shares
+        one transaction: it is committed once after the agent finishes and
+        rolled back if the run fails or exceeds its timeout.
+        The tools' read cache, if given, is reset for the run and its hit
+        rate reported once the run finishes.
+        
         Args:
             query: Natural language query from user
+            callback: Usage tracker to use, e.g. to report progress while running
+            timeout: Seconds the run may take (default AGENT_TIMEOUT_SECONDS)
             
         Returns:
             dict with 'response', 'actions_taken', and 'usage'
         """
+        if timeout is None:
+            timeout = AGENT_TIMEOUT_SECONDS
         try:
             logger.info(f"Processing agent query: {query}")
             
             # Create callback handler to track usage
-            callback = TokenTrackingCallback(model_name=settings.OPENROUTER_MODEL)
-            
-            # Execute agent with the query and callback
-            result = await self.agent_executor.ainvoke(
-                {"input": query},
-                config={"callbacks": [callback]}
-            )
+            if callback is None:
+                from app.agents.callbacks import TokenTrackingCallback
+
+                callback = TokenTrackingCallback(model_name=settings.OPENROUTER_MODEL)
             
-            # Extract response and actions
-            response = result.get("output", "")
-            actions_taken = self._extract_actions(result)
-            usage_stats = callback.get_usage_stats()
+            # A span for the run (its own trace when not inside a request)
+            with get_tracer().trace(
+                "agent.process_query", attributes={"agent.model": settings.OPENROUTER_MODEL}
+            ) as span:
+                callbacks = [callback]
+                if span.recording:
+                    from app.agents.callbacks import TracingCallback
+
+                    callbacks.append(TracingCallback())
+                if self.read_cache is not None:
+                    self.read_cache.reset()
+
+                # Execute agent with the query and callbacks
+                result = await self._run_agent(query, callbacks, timeout)
+                
+                # Extract response and actions
+                response = result.get("output", "")
+                actions_taken = self._extract_actions(result)
+                usage_stats = callback.get_usage_stats()
+                span.set_attribute("agent.actions", len(actions_taken))
+                span.set_attribute("agent.llm_calls", usage_stats.llm_calls)
+                span.set_attribute("agent.total_tokens", usage_stats.total_tokens)
+                self._report_read_cache(span)
             
             logger.info(f"Agent query completed. Actions: {actions_taken}, Tokens: {usage_stats.total_tokens}, Cost: ${usage_stats.estimated_cost_usd}")
             
@@ -47,12 +94,48 @@ class AgentService:
                 "actions_taken": actions_taken,
                 "usage": usage_stats,
             }
+        except asyncio.TimeoutError:
+            logger.error(f"Agent execution timed out after {timeout}s")
+            raise AgentExecutionError(f"Failed to process query: timed out after {timeout} seconds")
         except Exception as e:
             logger.error(f"Agent execution failed: {str(e)}")
             raise AgentExecutionError(f"Failed to process query: {str(e)}")
 
+    async def _run_agent(self, query: str, callbacks: list, timeout: float) -> dict:
+        """Invoke the agent executor, inside the unit of work if one is set"""
+        if self.unit_of_work is None:
+            return await self._invoke(query, callbacks, timeout)
+        
+        async with self.unit_of_work:
+            return await self._invoke(query, callbacks, timeout)
+
+    async def _invoke(self, query: str, callbacks: list, timeout: float) -> dict:
+        """Invoke the agent executor with the run timeout applied"""
+        return await asyncio.wait_for(
+            self.agent_executor.ainvoke(
+                {"input": query},
+                config={"callbacks": callbacks}
+            ),
+            timeout=timeout,
+        )
+
+    def _report_read_cache(self, span) -> None:
+        """Log the run's read cache hit rate and record it on the run span"""
+        reads = self.read_cache
+        if reads is None or not reads.hits + reads.misses:
+            return
+        span.set_attribute("agent.read_cache.hits", reads.hits)
+        span.set_attribute("agent.read_cache.misses", reads.misses)
+        span.set_attribute("agent.read_cache.hit_rate", round(reads.hit_rate, 3))
+        logger.info(
+            f"Agent read cache: {reads.hits} hits, {reads.misses} misses "
+            f"({reads.hit_rate:.0%} hit rate)"
+        )
+
     def _extract_actions(self, result: dict) -> list[str]:
         """Extract list of actions taken from agent result"""
+        from app.agents.callbacks import format_action
+
         actions = []
         
         # Check intermediate steps for tool calls
@@ -67,19 +150,7 @@ class AgentService:
                     
                     # Extract tool name and input
                     if hasattr(agent_action, 'tool'):
-                        tool_name = agent_action.tool
-                        tool_input = agent_action.tool_input
-                        
-                        # Format the action nicely
-                        if isinstance(tool_input, dict):
-                            # Format dict inputs
-                            input_str = ", ".join([f"{k}={v}" for k, v in tool_input.items() if v])
-                            if input_str:
-                                actions.append(f"{i}. {tool_name}({input_str})")
-                            else:
-                                actions.append(f"{i}. {tool_name}()")
-                        else:
-                            actions.append(f"{i}. {tool_name}({tool_input})")
+                        actions.append(format_action(i, agent_action.tool, agent_action.tool_input))
                     
                     # Log for debugging
                     logger.debug(f"Action {i}: {agent_action}")
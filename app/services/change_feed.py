@@ -0,0 +1,208 @@
+"""
+Todo change feed
+
+Pushes committed todo changes to connected clients (SSE and WebSocket) so
+they do not have to poll. Every change is written to the todo_events outbox
+in the committing transaction (see app.db.change_tracking); after the
+commit the events are published on the broadcast channel, which fans them
+out to the feed in every worker, and each worker hands them to its clients.
+
+Clients resume from the last event id they saw: missed events are replayed
+from the outbox. When that is not possible (the events were pruned, or the
+client fell too far behind) the client receives a "resync" event and should
+reload its todos.
+
+Event ids come from a sequence, so two concurrent transactions can commit
+out of id order; a client resuming at exactly that moment may miss the
+earlier one until its next resync.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from functools import lru_cache
+from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.broadcast import MAX_PAYLOAD_BYTES, Broadcast, get_broadcast
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.change_tracking import TodoChange, add_commit_listener, event_op
+from app.domain.models import TodoEvent
+from app.repositories.todo_event_repository import TodoEventRepository
+from app.utils.datetime import utc_now
+
+logger = get_logger(__name__)
+
+CHANGE_FEED_CHANNEL = "todo_changes"
+
+# Events buffered per client before it is considered lagging and told to resync
+CLIENT_QUEUE_SIZE = 1000
+REPLAY_BATCH_SIZE = 500
+PRUNE_INTERVAL_SECONDS = 3600
+
+RESYNC_EVENT = {"id": None, "op": "resync", "todo_id": None, "todo": None}
+
+
+def event_from_change(change: TodoChange) -> dict:
+    return {
+        "id": change.event_id,
+        "op": event_op(change),
+        "todo_id": change.todo_id,
+        "todo": change.todo,
+    }
+
+
+def event_from_row(row: TodoEvent) -> dict:
+    return {
+        "id": row.id,
+        "op": row.op,
+        "todo_id": row.todo_id,
+        "todo": json.loads(row.data) if row.data else None,
+    }
+
+
+class ChangeFeed:
+    """Per-worker broker between committed todo events and connected clients"""
+
+    def __init__(self, broadcast: Broadcast, retention: timedelta):
+        self.broadcast = broadcast
+        self.retention = retention
+        self._clients: set[asyncio.Queue] = set()
+        self._prune_task: asyncio.Task | None = None
+        broadcast.subscribe(CHANGE_FEED_CHANNEL, self._on_message)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    async def start(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        """Start pruning events older than the retention period"""
+        self._prune_task = asyncio.get_running_loop().create_task(
+            self._prune_loop(session_factory)
+        )
+
+    async def stop(self) -> None:
+        if self._prune_task:
+            self._prune_task.cancel()
+            self._prune_task = None
+
+    def publish_committed(self, changes: list[TodoChange]) -> None:
+        """Commit listener: publish the outbox events of a commit to every worker"""
+        for change in changes:
+            if change.event_id is None:
+                continue
+            message = json.dumps(event_from_change(change))
+            # Too large for NOTIFY: send the id and let receivers read the outbox
+            if len(message.encode()) > MAX_PAYLOAD_BYTES:
+                message = json.dumps({"id": change.event_id, "ref": True})
+            self.broadcast.publish(CHANGE_FEED_CHANNEL, message)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """Register a client queue that receives every live event"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._clients.add(queue)
+        try:
+            yield queue
+        finally:
+            self._clients.discard(queue)
+
+    async def stream(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        after: int | None = None,
+        heartbeat_seconds: float = 15.0,
+    ) -> AsyncIterator[dict | None]:
+        """
+        Yield events newer than the event id `after` (replayed, then live)
+
+        Without `after` only live events are sent. None is yielded every
+        heartbeat_seconds without events, so callers can keep the
+        connection alive and notice disconnects.
+        """
+        # Subscribe before replaying so nothing committed meanwhile is lost
+        async with self.subscribe() as queue:
+            last_id = 0
+            if after is not None:
+                last_id = after
+                async with session_factory() as session:
+                    repo = TodoEventRepository(session)
+                    async for event in self._replay(repo, after):
+                        if event["id"] is not None:
+                            last_id = event["id"]
+                        yield event
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                if event.get("ref"):
+                    async with session_factory() as session:
+                        row = await TodoEventRepository(session).get_by_id(event["id"])
+                    if row is None:
+                        continue
+                    event = event_from_row(row)
+
+                if event["id"] is not None:
+                    if event["id"] <= last_id:
+                        continue
+                    last_id = event["id"]
+                yield event
+
+    async def _replay(self, repo: TodoEventRepository, after: int) -> AsyncIterator[dict]:
+        oldest, newest = await repo.get_bounds()
+        if after > (newest or 0) or (oldest is not None and after < oldest - 1):
+            # Pruned or unknown position: the client has to reload everything
+            yield {**RESYNC_EVENT, "id": newest}
+            return
+        while True:
+            rows = await repo.get_after(after, limit=REPLAY_BATCH_SIZE)
+            for row in rows:
+                yield event_from_row(row)
+            if len(rows) < REPLAY_BATCH_SIZE:
+                return
+            after = rows[-1].id
+
+    def _on_message(self, message: str | None) -> None:
+        # None: the broadcast may have dropped messages
+        event = RESYNC_EVENT if message is None else json.loads(message)
+        for queue in list(self._clients):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A slow client: drop its backlog and make it reload
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+
+    async def _prune_loop(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        while True:
+            await asyncio.sleep(PRUNE_INTERVAL_SECONDS)
+            try:
+                async with session_factory() as session:
+                    removed = await TodoEventRepository(session).delete_before(
+                        utc_now() - self.retention
+                    )
+                if removed:
+                    logger.info(f"Pruned {removed} todo events")
+            except Exception as e:
+                logger.error(f"Failed to prune todo events: {e}")
+
+
+@lru_cache
+def get_change_feed() -> ChangeFeed | None:
+    """Get the process-wide change feed, or None when CHANGE_FEED_ENABLED is off"""
+    settings = get_settings()
+    if not settings.CHANGE_FEED_ENABLED:
+        return None
+
+    feed = ChangeFeed(
+        broadcast=get_broadcast(),
+        retention=timedelta(hours=settings.CHANGE_FEED_RETENTION_HOURS),
+    )
+    add_commit_listener(feed.publish_committed)
+    return feed
@@ -0,0 +1,169 @@
+"""
+In-memory MinHash/LSH index for near-duplicate todos
+
+Holds the MinHash signature (app.utils.minhash) of every todo and, per LSH
+band, the todos whose signatures agree on that band. A near-duplicate check
+only compares the todos sharing a band bucket with the new text, so its cost
+follows the number of similar todos rather than the table size. The index is
+kept current like the vector index (see TodoTextIndex).
+"""
+
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.broadcast import Broadcast, get_broadcast
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.change_tracking import add_commit_listener
+from app.services.todo_index import TodoTextIndex
+from app.utils.constants import DUPLICATE_MIN_SIMILARITY, MINHASH_BANDS
+from app.utils.minhash import Signature, band_keys, signature, similarity
+
+logger = get_logger(__name__)
+
+DUPLICATE_CHANNEL = "todo_duplicate_changes"
+
+# Clustering compares a todo with at most this many todos of each bucket it
+# is in; a near-duplicate missed in one band is usually met in another
+MAX_BUCKET_COMPARISONS = 32
+
+
+class DuplicateIndex(TodoTextIndex):
+    """Near-duplicate lookups and clustering over todo MinHash signatures"""
+
+    channel = DUPLICATE_CHANNEL
+
+    def __init__(
+        self,
+        broadcast: Broadcast | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self._signatures: dict[int, Signature] = {}
+        # One bucket table per band: band key -> todo ids
+        self._bands: list[dict[int, set[int]]] = [{} for _ in range(MINHASH_BANDS)]
+        super().__init__(broadcast, session_factory)
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def upsert(self, todo_id: int, title: str, description: str | None) -> None:
+        self.add(todo_id, signature(title, description))
+
+    def add(self, todo_id: int, sig: Signature | None) -> None:
+        """Index a todo by its signature (None: a todo without any text to compare)"""
+        self.remove(todo_id)
+        if sig is None:
+            return
+        self._signatures[todo_id] = sig
+        for buckets, key in zip(self._bands, band_keys(sig)):
+            buckets.setdefault(key, set()).add(todo_id)
+
+    def remove(self, todo_id: int) -> None:
+        sig = self._signatures.pop(todo_id, None)
+        if sig is None:
+            return
+        for buckets, key in zip(self._bands, band_keys(sig)):
+            members = buckets[key]
+            members.discard(todo_id)
+            if not members:
+                del buckets[key]
+
+    def similar(
+        self, sig: Signature, min_similarity: float = DUPLICATE_MIN_SIMILARITY
+    ) -> list[tuple[int, float]]:
+        """Todos at least min_similarity similar to a signature, as (id, similarity), best first"""
+        candidates = set()
+        for buckets, key in zip(self._bands, band_keys(sig)):
+            candidates.update(buckets.get(key, ()))
+        scored = [(todo_id, similarity(sig, self._signatures[todo_id])) for todo_id in candidates]
+        return sorted(
+            [pair for pair in scored if pair[1] >= min_similarity],
+            key=lambda pair: (-pair[1], pair[0]),
+        )
+
+    def clusters(self, min_similarity: float = DUPLICATE_MIN_SIMILARITY) -> list[list[int]]:
+        """
+        Groups of todos that are near-duplicates of each other, largest first
+
+        Todos sharing a band bucket are compared, in id order, with (up to
+        MAX_BUCKET_COMPARISONS of) the bucket's earlier todos that matched
+        none before them and joined to the first one similar enough. Groups
+        are transitive (a ~ b and b ~ c put a, b and c together), and each
+        lists its ids in ascending order.
+        """
+        parent: dict[int, int] = {}
+
+        def root(todo_id: int) -> int:
+            while parent[todo_id] != todo_id:
+                parent[todo_id] = parent[parent[todo_id]]
+                todo_id = parent[todo_id]
+            return todo_id
+
+        def join(a: int, b: int) -> None:
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            first, second = sorted((root(a), root(b)))
+            parent[second] = first
+
+        for buckets in self._bands:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                representatives: list[int] = []
+                for todo_id in sorted(members):
+                    sig = self._signatures[todo_id]
+                    for other in representatives[:MAX_BUCKET_COMPARISONS]:
+                        if similarity(sig, self._signatures[other]) >= min_similarity:
+                            join(todo_id, other)
+                            break
+                    else:
+                        representatives.append(todo_id)
+
+        groups: dict[int, list[int]] = {}
+        for todo_id in sorted(parent):
+            groups.setdefault(root(todo_id), []).append(todo_id)
+        return sorted(groups.values(), key=lambda ids: (-len(ids), ids[0]))
+
+    def _reset(self) -> None:
+        self._signatures.clear()
+        for buckets in self._bands:
+            buckets.clear()
+
+
+class DuplicateFilter:
+    """
+    Decides, text by text, whether a new todo nearly duplicates an existing
+    one or one accepted before it in the same batch (bulk import, create_todos)
+    """
+
+    def __init__(self, index: DuplicateIndex, min_similarity: float = DUPLICATE_MIN_SIMILARITY):
+        self.index = index
+        self.min_similarity = min_similarity
+        self.skipped = 0
+        # Texts accepted so far; not in the index until they are committed
+        self._accepted = DuplicateIndex()
+
+    def accept(self, title: str, description: str | None = None) -> bool:
+        """False (and counted as skipped) if the todo is a near-duplicate"""
+        sig = signature(title, description)
+        if sig is None:
+            return True
+        if self.index.similar(sig, self.min_similarity) or self._accepted.similar(sig, self.min_similarity):
+            self.skipped += 1
+            return False
+        self._accepted.add(-len(self._accepted) - 1, sig)
+        return True
+
+
+@lru_cache
+def get_duplicate_index() -> DuplicateIndex | None:
+    """Get the process-wide duplicate index, or None when DUPLICATE_DETECTION_ENABLED is off"""
+    settings = get_settings()
+    if not settings.DUPLICATE_DETECTION_ENABLED:
+        return None
+
+    from app.db.session import AsyncSessionLocal
+
+    index = DuplicateIndex(broadcast=get_broadcast(), session_factory=AsyncSessionLocal)
+    add_commit_listener(index.apply_changes)
+    logger.info(f"Near-duplicate detection enabled (broadcast={settings.BROADCAST_BACKEND})")
+    return index
@@ -0,0 +1,165 @@
+"""
+Run-scoped read cache for agent tools
+
+Within one agent run the model tends to list, search and then update the
+same todos, and each tool call used to refetch them. RunReadCache memoizes
+the TodoService reads the tools make (listings and fuzzy text matches) for
+the length of one run. Mutating tools report the rows they changed, and only
+the entries those rows could appear in are dropped.
+
+The cache is reset at the start of every run, so nothing outlives the run's
+transaction.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterator
+from app.domain.enums import TodoPriority
+from app.services.todo_service import TodoService
+from app.utils.embedding import embed, embed_todo
+
+RunCacheKey = tuple
+
+
+@dataclass(slots=True, frozen=True)
+class RowState:
+    """The fields of a todo that decide which cached reads it can appear in"""
+    title: str
+    description: str | None
+    completed: bool
+    priority: str
+
+    @classmethod
+    def of(cls, todo) -> "RowState":
+        return cls(
+            title=todo.title.lower(),
+            description=todo.description.lower() if todo.description else None,
+            completed=todo.completed,
+            priority=todo.priority.value,
+        )
+
+    def matches_text(self, text: str) -> bool:
+        """Whether a title/description LIKE '%text%' query could return the row"""
+        # LIKE wildcards in the query can match anything; play safe
+        if "%" in text or "_" in text:
+            return True
+        return text in self.title or (self.description is not None and text in self.description)
+
+    def shares_features(self, text: str) -> bool:
+        """Whether the row shares an embedding bucket with text, so a vector index query may return it"""
+        return not embed_todo(self.title, self.description).keys().isdisjoint(embed(text))
+
+    def matches_filter(self, completed: bool | None, priority: str | None) -> bool:
+        return (completed is None or completed == self.completed) and (
+            priority is None or priority == self.priority
+        )
+
+
+def list_key(completed: bool | None, priority: TodoPriority | None) -> RunCacheKey:
+    return ("list", completed, priority.value if priority else None)
+
+
+def find_key(text: str) -> RunCacheKey:
+    return ("find", text.lower())
+
+
+def search_key(text: str, min_similarity: float, semantic: bool) -> RunCacheKey:
+    return ("search", text.lower(), min_similarity, semantic)
+
+
+def is_affected(key: RunCacheKey, state: RowState, semantic: bool) -> bool:
+    """
+    Whether the cached value for key may differ once a row had or has state
+
+    semantic says whether the service matches through the vector index,
+    where rows sharing features with the text can match without containing it.
+    """
+    if key[0] == "list":
+        return state.matches_filter(key[1], key[2])
+    if state.matches_text(key[1]):
+        return True
+    uses_index = semantic and (key[0] == "find" or key[3])
+    return uses_index and state.shares_features(key[1])
+
+
+class RunReadCache:
+    """Memoizes the todo reads of one agent run, with hit/miss accounting"""
+
+    def __init__(self, service: TodoService):
+        self.service = service
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[RunCacheKey, object] = {}
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def list_summaries(
+        self, completed: bool | None = None, priority: TodoPriority | None = None
+    ) -> list:
+        """TodoService.list_summaries, memoized"""
+        return list(await self._get(
+            list_key(completed, priority),
+            lambda: self.service.list_summaries(completed=completed, priority=priority),
+        ))
+
+    async def find_by_text(self, text: str):
+        """TodoService.find_by_text, memoized"""
+        return await self._get(find_key(text), lambda: self.service.find_by_text(text))
+
+    async def search_by_text(
+        self, text: str, min_similarity: float = 0.6, semantic: bool = True
+    ) -> list:
+        """TodoService.search_by_text, memoized"""
+        return list(await self._get(
+            search_key(text, min_similarity, semantic),
+            lambda: self.service.search_by_text(text, min_similarity, semantic),
+        ))
+
+    def invalidate(self, *states: RowState) -> None:
+        """
+        Drop every entry a changed row could appear in
+
+        Pass the row's state before the change (updates, deletes) and after
+        it (creates, updates).
+        """
+        semantic = self.service.index is not None
+        for key in list(self._entries):
+            if any(is_affected(key, state, semantic) for state in states):
+                del self._entries[key]
+
+    @contextmanager
+    def changing(self, *todos) -> Iterator[None]:
+        """
+        Wrap a write to todos
+
+        Entries for the rows' current state are dropped before the write;
+        if the write fails midway everything is, as rows may be half
+        updated. Pass the results to invalidate() once the write succeeds.
+        Set-based writes whose rows are only known afterwards pass none.
+        """
+        self.invalidate(*(RowState.of(todo) for todo in todos))
+        try:
+            yield
+        except BaseException:
+            self._entries.clear()
+            raise
+
+    def reset(self) -> None:
+        """Forget all entries and counters, e.g. at the start of a run"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    async def _get(self, key: RunCacheKey, load: Callable[[], Awaitable]):
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        value = await load()
+        if isinstance(value, list):
+            value = tuple(value)
+        self._entries[key] = value
+        return value
@@ -0,0 +1,139 @@
+"""
+Delta sync for offline clients
+
+A sync cursor holds two keyset positions: (updated_at, id) in todos for
+changed rows, and (created_at, id) in the todo_events outbox for tombstones
+of deleted todos. Each call returns the rows and tombstones after those
+positions, so its cost follows the number of changes, not the table size.
+
+Timestamps are set when a transaction starts, so a slow transaction can
+commit a row "in the past". The final page of a sync therefore never moves
+the cursor past now - SYNC_SETTLE_SECONDS; changes that recent are sent
+again on the next sync and clients apply them idempotently.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from app.domain.models import Todo
+from app.repositories.todo_event_repository import TodoEventRepository
+from app.repositories.todo_repository import TodoRepository
+from app.utils.datetime import utc_now
+from app.utils.exceptions import InvalidSyncCursorError, SyncCursorExpiredError
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive timestamps; they are stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(slots=True, frozen=True)
+class SyncCursor:
+    """Keyset positions in todos and in the tombstone log"""
+    updated_at: datetime
+    todo_id: int
+    deleted_at: datetime
+    event_id: int
+
+    def encode(self) -> str:
+        payload = json.dumps([
+            self.updated_at.isoformat(), self.todo_id, self.deleted_at.isoformat(), self.event_id
+        ], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, value: str) -> "SyncCursor":
+        try:
+            padded = value + "=" * (-len(value) % 4)
+            updated_at, todo_id, deleted_at, event_id = json.loads(
+                base64.urlsafe_b64decode(padded)
+            )
+            return cls(
+                _as_utc(datetime.fromisoformat(updated_at)),
+                int(todo_id),
+                _as_utc(datetime.fromisoformat(deleted_at)),
+                int(event_id),
+            )
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+            raise InvalidSyncCursorError("Invalid sync cursor")
+
+
+@dataclass(slots=True)
+class SyncPage:
+    """One page of a delta sync"""
+    changed: list
+    deleted: list[int]
+    cursor: SyncCursor
+    has_more: bool
+
+
+class TodoSyncService:
+    """Service for delta sync of todos"""
+
+    def __init__(
+        self,
+        repo: TodoRepository,
+        event_repo: TodoEventRepository,
+        settle: timedelta,
+        retention: timedelta,
+    ):
+        self.repo = repo
+        self.event_repo = event_repo
+        self.settle = settle
+        self.retention = retention
+
+    async def sync(self, since: str | None, columns: list, limit: int) -> SyncPage:
+        """
+        Get the todos changed and deleted since a cursor (None for a first sync)
+
+        Raises InvalidSyncCursorError for a malformed cursor and
+        SyncCursorExpiredError when the client must reload everything:
+        the tombstones it needs were pruned, or a bulk change happened.
+        """
+        now = utc_now()
+        settled = now - self.settle
+        if since:
+            cursor = SyncCursor.decode(since)
+            if cursor.deleted_at < now - self.retention:
+                raise SyncCursorExpiredError("Sync cursor has expired; reload all todos")
+        else:
+            # Everything, plus deletes that race with the first sync
+            cursor = SyncCursor(EPOCH, 0, settled, 0)
+
+        rows = await self.repo.get_changed_since(
+            columns, cursor.updated_at, cursor.todo_id, limit
+        )
+        events = await self.event_repo.get_tombstones_since(
+            cursor.deleted_at, cursor.event_id, limit
+        )
+        if since and any(event.op == "resync" for event in events):
+            raise SyncCursorExpiredError("Todos were changed in bulk; reload all todos")
+
+        updated_at, todo_id = cursor.updated_at, cursor.todo_id
+        if rows:
+            updated_at, todo_id = _as_utc(rows[-1].updated_at), rows[-1].id
+        if len(rows) < limit and updated_at > settled:
+            updated_at, todo_id = max(settled, cursor.updated_at), 0
+
+        deleted_at, event_id = cursor.deleted_at, cursor.event_id
+        if events:
+            deleted_at, event_id = _as_utc(events[-1].created_at), events[-1].id
+        if len(events) < limit and deleted_at > settled:
+            deleted_at, event_id = max(settled, cursor.deleted_at), 0
+
+        return SyncPage(
+            changed=rows,
+            deleted=list(dict.fromkeys(event.todo_id for event in events if event.op == "delete")),
+            cursor=SyncCursor(updated_at, todo_id, deleted_at, event_id),
+            has_more=len(rows) == limit or len(events) == limit,
+        )
+
+
+def sync_columns(fields: tuple[str, ...]) -> list:
+    """Todo columns for the given fields; updated_at and id are needed for the cursor"""
+    names = dict.fromkeys((*fields, "id", "updated_at"))
+    return [getattr(Todo, name) for name in names]
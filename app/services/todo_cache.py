@@ -0,0 +1,194 @@
+"""
+Read-through cache for todo reads
+
+Caches TodoSnapshot results of the read-only TodoRepository queries in an
+in-process LRU with a TTL and a bound on the number of cached rows. Committed
+writes invalidate exactly the keys they touched, locally and, through the
+broadcast channel, in every other worker. Sessions that may see uncommitted
+rows (inside a unit of work, or with unflushed/uncommitted changes) bypass
+the cache entirely; see TodoService._shared_cache().
+"""
+
+import json
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable
+from app.core.broadcast import MAX_PAYLOAD_BYTES, Broadcast, get_broadcast
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.change_tracking import TodoChange, add_commit_listener
+from app.domain.snapshots import TodoSnapshot
+
+logger = get_logger(__name__)
+
+INVALIDATION_CHANNEL = "todo_cache_invalidate"
+
+CacheKey = tuple
+CachedValue = TodoSnapshot | tuple[TodoSnapshot, ...]
+
+
+def id_key(todo_id: int) -> CacheKey:
+    return ("id", todo_id)
+
+
+def all_key() -> CacheKey:
+    return ("all",)
+
+
+def completed_key(completed: bool) -> CacheKey:
+    return ("completed", completed)
+
+
+def priority_key(priority: str) -> CacheKey:
+    return ("priority", priority)
+
+
+def keys_for_change(change: TodoChange) -> list[CacheKey]:
+    """Every cache key whose value may differ after the change"""
+    keys = [all_key()]
+    if change.todo_id is not None:
+        keys.append(id_key(change.todo_id))
+    keys += [completed_key(value) for value in change.completed]
+    keys += [priority_key(value) for value in change.priority]
+    return keys
+
+
+class TodoReadCache:
+    """LRU + TTL cache of todo snapshots, bounded by total cached rows"""
+
+    def __init__(self, ttl_seconds: float, max_rows: int, broadcast: Broadcast | None = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.broadcast = broadcast
+        self.origin = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, tuple[float, int, CachedValue]] = OrderedDict()
+        self._rows = 0
+        # Bumped on every invalidation so a load that raced with a write is not stored
+        self._generation = 0
+
+        if broadcast is not None:
+            broadcast.subscribe(INVALIDATION_CHANNEL, self._on_remote_invalidation)
+
+    async def get_one(
+        self, key: CacheKey, load: Callable[[], Awaitable]
+    ) -> TodoSnapshot | None:
+        """Return the cached snapshot for key, loading the ORM row on a miss"""
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        generation = self._generation
+        todo = await load()
+        if todo is None:
+            return None
+        snapshot = TodoSnapshot.from_todo(todo)
+        self._put(key, snapshot, 1, generation)
+        return snapshot
+
+    async def get_many(
+        self, key: CacheKey, load: Callable[[], Awaitable]
+    ) -> list[TodoSnapshot]:
+        """Return the cached snapshots for key, loading the ORM rows on a miss"""
+        cached = self._get(key)
+        if cached is not None:
+            return list(cached)
+
+        generation = self._generation
+        snapshots = tuple(TodoSnapshot.from_todo(todo) for todo in await load())
+        self._put(key, snapshots, max(len(snapshots), 1), generation)
+        return list(snapshots)
+
+    def invalidate_changes(self, changes: list[TodoChange]) -> None:
+        """Drop the keys touched by committed changes and tell the other workers"""
+        self._invalidate_changes(changes)
+        if self.broadcast is not None:
+            self.broadcast.publish(INVALIDATION_CHANNEL, self._encode(changes))
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._rows = 0
+
+    def _get(self, key: CacheKey) -> CachedValue | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key: CacheKey, value: CachedValue, rows: int, generation: int) -> None:
+        if generation != self._generation or rows > self.max_rows:
+            return
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, rows, value)
+        self._rows += rows
+        while self._rows > self.max_rows:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def _drop(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._rows -= entry[1]
+
+    def _invalidate_changes(self, changes: list[TodoChange]) -> None:
+        self._generation += 1
+        for change in changes:
+            for key in keys_for_change(change):
+                self._drop(key)
+
+    def _encode(self, changes: list[TodoChange]) -> str:
+        message = json.dumps({
+            "origin": self.origin,
+            "changes": [[c.op, c.todo_id, list(c.completed), list(c.priority)] for c in changes],
+        })
+        # Too many changes for one NOTIFY payload: ask the others to clear everything
+        if len(message.encode()) > MAX_PAYLOAD_BYTES:
+            message = json.dumps({"origin": self.origin, "clear": True})
+        return message
+
+    def _on_remote_invalidation(self, message: str | None) -> None:
+        if message is None:
+            self.clear()
+            return
+        payload = json.loads(message)
+        if payload["origin"] == self.origin:
+            return
+        if payload.get("clear"):
+            self.clear()
+            return
+        self._invalidate_changes([
+            TodoChange(op, todo_id, tuple(completed), tuple(priority))
+            for op, todo_id, completed, priority in payload["changes"]
+        ])
+
+
+@lru_cache
+def get_todo_cache() -> TodoReadCache | None:
+    """Get the process-wide todo read cache, or None when TODO_CACHE_ENABLED is off"""
+    settings = get_settings()
+    if not settings.TODO_CACHE_ENABLED:
+        return None
+
+    cache = TodoReadCache(
+        ttl_seconds=settings.TODO_CACHE_TTL_SECONDS,
+        max_rows=settings.TODO_CACHE_MAX_ROWS,
+        broadcast=get_broadcast(),
+    )
+    add_commit_listener(cache.invalidate_changes)
+    logger.info(
+        f"Todo read cache enabled (ttl={settings.TODO_CACHE_TTL_SECONDS}s, "
+        f"max_rows={settings.TODO_CACHE_MAX_ROWS}, broadcast={settings.BROADCAST_BACKEND})"
+    )
+    return cache
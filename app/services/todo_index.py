@@ -0,0 +1,239 @@
+"""
+In-memory indexes of todo texts
+
+TodoTextIndex keeps an index of every todo's title and description in step
+with the database. It is built from the database on first use. Committed
+writes in this worker update the affected todos directly; writes in other
+workers arrive through the broadcast channel as ids that are re-read from the
+database before the next query. Set-based writes without row ids (bulk
+imports) mark the whole index for a rebuild. As the index is shared by the
+whole process it only ever reads committed rows: through a session of its own
+(pinned to the primary) when it has a session factory, otherwise through the
+caller's session unless that one may see uncommitted writes.
+
+TodoVectorIndex holds the embedding (app.utils.embedding) of each todo in an
+inverted index, bucket -> todo ids, plus each todo's vector norm. As features
+are binary and a bucket's weight follows from the bucket, that is the whole
+vector. A top-k query walks only the postings of the query's own buckets, so
+its cost follows how many todos share features with the query rather than
+the table size; the scores are the exact cosine similarities.
+"""
+
+import asyncio
+import heapq
+import json
+import uuid
+from abc import ABC, abstractmethod
+from array import array
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core.broadcast import MAX_PAYLOAD_BYTES, Broadcast, get_broadcast
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.change_tracking import TodoChange, add_commit_listener, has_uncommitted_changes
+from app.db.routing import pin_to_primary
+from app.db.unit_of_work import in_unit_of_work
+from app.domain.models import Todo
+from app.repositories.todo_repository import TodoRepository
+from app.utils.constants import EXPORT_BATCH_SIZE
+from app.utils.embedding import Vector, bucket_weight, description_details, feature_buckets, norm
+
+logger = get_logger(__name__)
+
+INDEX_CHANNEL = "todo_index_changes"
+
+TEXT_COLUMNS = [Todo.id, Todo.title, Todo.description]
+
+
+class TodoTextIndex(ABC):
+    """
+    Base class of the todo text indexes: keeps an index current with the
+    database; subclasses say how one todo is added and removed
+    """
+
+    # Broadcast channel on which the workers' indexes exchange changed ids
+    channel = INDEX_CHANNEL
+
+    def __init__(
+        self,
+        broadcast: Broadcast | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self.broadcast = broadcast
+        self.session_factory = session_factory
+        self.origin = uuid.uuid4().hex
+        self._loaded = False
+        self._dirty: set[int] = set()
+        self._lock = asyncio.Lock()
+
+        if broadcast is not None:
+            broadcast.subscribe(self.channel, self._on_remote_changes)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of indexed todos"""
+
+    @abstractmethod
+    def upsert(self, todo_id: int, title: str, description: str | None) -> None:
+        """Index a todo, replacing what was indexed for it"""
+
+    @abstractmethod
+    def remove(self, todo_id: int) -> None:
+        """Drop a todo from the index"""
+
+    @abstractmethod
+    def _reset(self) -> None:
+        """Drop every indexed todo"""
+
+    async def refresh(self, repo: TodoRepository) -> None:
+        """
+        Build the index on first use, then re-read todos changed elsewhere
+
+        Without a session factory, a caller inside a unit of work (or with
+        pending writes) leaves the index as it is until a later call.
+        """
+        if self._loaded and not self._dirty:
+            return
+        if self.session_factory is not None:
+            async with self.session_factory() as session:
+                pin_to_primary(session)
+                await self._refresh(TodoRepository(session))
+        elif not (in_unit_of_work(repo.session) or has_uncommitted_changes(repo.session)):
+            await self._refresh(repo)
+
+    async def _refresh(self, repo: TodoRepository) -> None:
+        async with self._lock:
+            if not self._loaded:
+                await self._load(repo)
+            while self._dirty:
+                ids, self._dirty = list(self._dirty), set()
+                rows = await repo.get_columns(TEXT_COLUMNS, ids=ids)
+                for todo_id in ids:
+                    self.remove(todo_id)
+                for todo_id, title, description in rows:
+                    self.upsert(todo_id, title, description)
+
+    def apply_changes(self, changes: list[TodoChange]) -> None:
+        """Commit listener: index this worker's committed changes and tell the other workers"""
+        self._apply(changes)
+        if self.broadcast is not None:
+            self.broadcast.publish(self.channel, self._encode(changes))
+
+    def clear(self) -> None:
+        """Drop everything; the index is rebuilt on next use"""
+        self._reset()
+        self._dirty.clear()
+        self._loaded = False
+
+    async def _load(self, repo: TodoRepository) -> None:
+        # Writes committed while loading are marked dirty and re-read afterwards
+        self._loaded = True
+        self._reset()
+        async for batch in repo.stream_batches(TEXT_COLUMNS, EXPORT_BATCH_SIZE):
+            for todo_id, title, description in batch:
+                self.upsert(todo_id, title, description)
+        logger.info(f"{type(self).__name__} built ({len(self)} todos)")
+
+    def _apply(self, changes: list[TodoChange]) -> None:
+        for change in changes:
+            if change.todo_id is None:
+                self.clear()
+                return
+            if change.op == "delete":
+                self.remove(change.todo_id)
+            elif change.todo is not None:
+                self.upsert(change.todo_id, change.todo["title"], change.todo["description"])
+            else:
+                self._dirty.add(change.todo_id)
+            if self._lock.locked():
+                self._dirty.add(change.todo_id)
+
+    def _encode(self, changes: list[TodoChange]) -> str:
+        if any(change.todo_id is None for change in changes):
+            return json.dumps({"origin": self.origin, "clear": True})
+        message = json.dumps({"origin": self.origin, "ids": [c.todo_id for c in changes]})
+        # Too many ids for one NOTIFY payload: ask the others to rebuild
+        if len(message.encode()) > MAX_PAYLOAD_BYTES:
+            message = json.dumps({"origin": self.origin, "clear": True})
+        return message
+
+    def _on_remote_changes(self, message: str | None) -> None:
+        if message is None:
+            self.clear()
+            return
+        payload = json.loads(message)
+        if payload["origin"] == self.origin:
+            return
+        if payload.get("clear"):
+            self.clear()
+            return
+        self._dirty.update(payload["ids"])
+
+
+class TodoVectorIndex(TodoTextIndex):
+    """Top-k cosine search over todo embeddings"""
+
+    def __init__(
+        self,
+        broadcast: Broadcast | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self._postings: dict[int, set[int]] = {}
+        self._norms: dict[int, float] = {}
+        # The buckets of each todo's vector, to remove it again
+        self._buckets: dict[int, array] = {}
+        super().__init__(broadcast, session_factory)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def upsert(self, todo_id: int, title: str, description: str | None) -> None:
+        self.remove(todo_id)
+        buckets = feature_buckets(title, description_details(description))
+        if not buckets:
+            return
+        for bucket in buckets:
+            self._postings.setdefault(bucket, set()).add(todo_id)
+        self._norms[todo_id] = norm(buckets)
+        self._buckets[todo_id] = array("I", buckets)
+
+    def remove(self, todo_id: int) -> None:
+        for bucket in self._buckets.pop(todo_id, ()):
+            postings = self._postings[bucket]
+            postings.discard(todo_id)
+            if not postings:
+                del self._postings[bucket]
+        self._norms.pop(todo_id, None)
+
+    def search(self, query: Vector, k: int) -> list[tuple[int, float]]:
+        """The k todos most similar to the query vector, as (id, cosine) pairs"""
+        dots: dict[int, float] = {}
+        for bucket, weight in query.items():
+            contribution = weight * bucket_weight(bucket)
+            for todo_id in self._postings.get(bucket, ()):
+                dots[todo_id] = dots.get(todo_id, 0.0) + contribution
+        norms = self._norms
+        return heapq.nlargest(
+            k, ((todo_id, dot / norms[todo_id]) for todo_id, dot in dots.items()),
+            key=lambda pair: pair[1],
+        )
+
+    def _reset(self) -> None:
+        self._postings.clear()
+        self._norms.clear()
+        self._buckets.clear()
+
+
+@lru_cache
+def get_todo_index() -> TodoVectorIndex | None:
+    """Get the process-wide todo vector index, or None when SEMANTIC_MATCH_ENABLED is off"""
+    settings = get_settings()
+    if not settings.SEMANTIC_MATCH_ENABLED:
+        return None
+
+    from app.db.session import AsyncSessionLocal
+
+    index = TodoVectorIndex(broadcast=get_broadcast(), session_factory=AsyncSessionLocal)
+    add_commit_listener(index.apply_changes)
+    logger.info(f"Semantic todo matching enabled (broadcast={settings.BROADCAST_BACKEND})")
+    return index
@@ -1,43 +1,169 @@
-from difflib import SequenceMatcher
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+from app.core.logging import get_logger
+from app.core.tracing import trace_methods
+from app.db.change_tracking import has_uncommitted_changes
+from app.db.routing import pin_to_primary
+from app.db.unit_of_work import UnitOfWork, in_unit_of_work
 from app.domain.models import Todo
 from app.domain.schemas import TodoCreate, TodoUpdate
 from app.domain.enums import TodoPriority
+from app.domain.snapshots import TodoSnapshot, TodoSummary
 from app.repositories.todo_repository import TodoRepository
+from app.utils.etag import etag_matches, list_etag, todo_etag
+from app.utils.exceptions import (
+    DuplicateDetectionDisabledError,
+    TodoConflictError,
+    TodoPreconditionFailedError,
+)
+from app.utils.embedding import embed
+from app.utils.minhash import signature, similarity
+from app.utils.matching import best_match, rank_matches, rank_semantic
+from app.utils.constants import (
+    DESCRIPTION_PREVIEW_CHARS,
+    DUPLICATE_MIN_SIMILARITY,
+    SEMANTIC_MIN_SCORE,
+    SEMANTIC_TOP_K,
+    WRITE_CONFLICT_ATTEMPTS,
+)
+from app.utils.todo_io import EXPORT_COLUMNS, normalize_import_row
+from app.services.todo_cache import (
+    TodoReadCache,
+    all_key,
+    completed_key,
+    id_key,
+    priority_key,
+)
+from app.services.duplicate_index import DuplicateFilter, DuplicateIndex
+from app.services.todo_index import TodoVectorIndex
 
+logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class DuplicateReport:
+    """Clusters of near-duplicate todos, largest first"""
+    clusters: list[list[Todo]]
+    total_clusters: int
+    # Todos in a cluster beyond its first, i.e. what merging them would remove
+    duplicate_todos: int
+
+
+@trace_methods
 class TodoService:
     """Service layer for todo business logic"""
 
-    def __init__(self, repo: TodoRepository):
+    def __init__(
+        self,
+        repo: TodoRepository,
+        cache: TodoReadCache | None = None,
+        index: TodoVectorIndex | None = None,
+        duplicates: DuplicateIndex | None = None,
+    ):
         self.repo = repo
+        self.cache = cache
+        self.index = index
+        self.duplicates = duplicates
 
     async def create_todo(self, data: TodoCreate) -> Todo:
         """Create a new todo"""
+        self._pin_for_write()
         todo = Todo(**data.model_dump())
         return await self.repo.create(todo)
 
-    async def list_todos(self) -> list[Todo]:
+    async def create_many(self, items: list[TodoCreate]) -> list[Todo]:
+        """Create several todos at once"""
+        self._pin_for_write()
+        return await self.repo.create_many([Todo(**data.model_dump()) for data in items])
+
+    async def existing_titles(self, titles: list[str]) -> set[str]:
+        """The titles, lowercased, that some todo already has"""
+        return await self.repo.get_existing_titles(titles)
+
+    async def list_todos(self) -> list[Todo | TodoSnapshot]:
         """List all todos"""
+        if cache := self._shared_cache():
+            return await cache.get_many(all_key(), self.repo.get_all)
         return await self.repo.get_all()
 
-    async def get_by_id(self, todo_id: int) -> Todo | None:
-        """Get a todo by ID"""
+    async def list_summaries(
+        self, completed: bool | None = None, priority: TodoPriority | None = None
+    ) -> list[TodoSummary | TodoSnapshot]:
+        """
+        List todos for display, filtered by completion status or priority
+
+        Reads only the listed columns and a description preview (one
+        character longer than DESCRIPTION_PREVIEW_CHARS so callers can tell
+        it was cut). With the cache enabled the cached snapshots are used.
+        """
+        if self._shared_cache():
+            if completed is not None:
+                return await self.get_by_completed(completed)
+            if priority is not None:
+                return await self.get_by_priority(priority)
+            return await self.list_todos()
+        return await self.repo.get_summaries(
+            completed, priority, description_chars=DESCRIPTION_PREVIEW_CHARS + 1
+        )
+
+    async def list_fields(self, fields: tuple[str, ...], completed: bool | None = None) -> list:
+        """
+        List todos with only the given fields loaded
+
+        Rows come from the cache when enabled (full snapshots), otherwise from
+        a SELECT of just those columns.
+        """
+        if self._shared_cache():
+            if completed is not None:
+                return await self.get_by_completed(completed)
+            return await self.list_todos()
+        columns = [getattr(Todo, name) for name in fields]
+        return await self.repo.get_columns(columns, completed)
+
+    async def get_by_id(self, todo_id: int) -> Todo | TodoSnapshot | None:
+        """Get a todo by ID (read-only; served from the cache when enabled)"""
+        if cache := self._shared_cache():
+            return await cache.get_one(
+                id_key(todo_id), lambda: self.repo.get_by_id(todo_id)
+            )
         return await self.repo.get_by_id(todo_id)
 
-    async def get_by_completed(self, completed: bool) -> list[Todo]:
+    async def get_by_completed(self, completed: bool) -> list[Todo | TodoSnapshot]:
         """Get todos by completion status"""
+        if cache := self._shared_cache():
+            return await cache.get_many(
+                completed_key(completed), lambda: self.repo.get_by_completed(completed)
+            )
         return await self.repo.get_by_completed(completed)
 
-    async def get_by_priority(self, priority: TodoPriority) -> list[Todo]:
+    async def get_by_priority(self, priority: TodoPriority) -> list[Todo | TodoSnapshot]:
         """Get todos by priority level"""
+        if cache := self._shared_cache():
+            return await cache.get_many(
+                priority_key(priority.value), lambda: self.repo.get_by_priority(priority)
+            )
         return await self.repo.get_by_priority(priority)
 
+    async def get_list_etag(
+        self, completed: bool | None = None, fields: tuple[str, ...] | None = None
+    ) -> str:
+        """ETag of the todo listing, computed from a count/updated_at watermark"""
+        count, max_updated_at = await self.repo.get_watermark(completed)
+        scope = "all" if completed is None else f"completed={completed}"
+        if fields:
+            scope += f";fields={','.join(fields)}"
+        return list_etag(scope, count, max_updated_at)
+
     async def find_by_text(self, text: str) -> Todo | None:
         """
         Find a todo by text with intelligent matching:
         1. Try exact match on title or description
         2. Try partial match
         3. Return best match using fuzzy matching
+        4. With the vector index enabled and no partial match, the best of
+           the nearest todos by fuzzy ratio and embedding similarity
         """
         # 1. Exact match
         todo = await self.repo.get_by_exact_text(text)
@@ -46,82 +172,258 @@ class TodoService:
 
         # 2. Partial match
         candidates = await self.repo.get_by_partial_text(text)
-        if not candidates:
-            return None
+        if candidates:
+            # 3. Best fuzzy match
+            return best_match(text, candidates)
 
-        # 3. Best fuzzy match
-        return max(
-            candidates,
-            key=lambda t: max(
-                SequenceMatcher(None, text.lower(), t.title.lower()).ratio(),
-                SequenceMatcher(None, text.lower(), (t.description or '').lower()).ratio(),
-            ),
-        )
+        # 4. Semantic match
+        if self.index is None:
+            return None
+        candidates = await self.repo.get_by_ids(await self._nearest_ids(text))
+        ranked = rank_semantic(text, candidates, SEMANTIC_MIN_SCORE)
+        return ranked[0] if ranked else None
 
-    async def search_by_text(self, text: str, min_similarity: float = 0.6) -> list[Todo]:
+    async def search_by_text(
+        self, text: str, min_similarity: float = 0.6, semantic: bool = True
+    ) -> list[TodoSummary]:
         """
         Search for ALL todos matching the text (not just best match).
-        Returns all todos above the similarity threshold.
+        Returns all todos above the similarity threshold, most similar first.
+        With the vector index enabled (and semantic on) the nearest todos
+        not containing the text follow, if their combined score is high enough.
         """
-        # Get all potential candidates
-        candidates = await self.repo.get_by_partial_text(text)
-        if not candidates:
+        # Get all potential candidates (projected rows, no ORM entities)
+        candidates = await self.repo.get_summaries_by_partial_text(text)
+        matches = rank_matches(text, candidates, min_similarity)
+        if self.index is None or not semantic:
+            return matches
+
+        seen = {todo.id for todo in candidates}
+        nearest = [todo_id for todo_id in await self._nearest_ids(text) if todo_id not in seen]
+        if nearest:
+            others = await self.repo.get_summaries_by_ids(nearest)
+            matches += rank_semantic(text, others, SEMANTIC_MIN_SCORE)
+        return matches
+
+    async def find_duplicates(
+        self,
+        title: str,
+        description: str | None = None,
+        min_similarity: float = DUPLICATE_MIN_SIMILARITY,
+    ) -> list[TodoSummary]:
+        """
+        Existing todos that nearly duplicate one with this title and
+        description, most similar first (e.g. "Buy milk" and "buy milk!")
+
+        The index only holds committed todos; its candidates are checked
+        again against the rows as this session sees them.
+        """
+        sig = signature(title, description)
+        if sig is None:
             return []
+        index = await self._duplicate_index()
+        candidates = await self.repo.get_summaries_by_ids(
+            [todo_id for todo_id, _ in index.similar(sig, min_similarity)]
+        )
+        scored = [
+            (similarity(sig, other), todo)
+            for todo in candidates
+            if (other := signature(todo.title, todo.description)) is not None
+        ]
+        return [
+            todo for score, todo in sorted(scored, key=lambda pair: (-pair[0], pair[1].id))
+            if score >= min_similarity
+        ]
 
-        # Calculate similarity scores and filter
-        results = []
-        for todo in candidates:
-            title_ratio = SequenceMatcher(None, text.lower(), todo.title.lower()).ratio()
-            desc_ratio = SequenceMatcher(None, text.lower(), (todo.description or '').lower()).ratio()
-            max_ratio = max(title_ratio, desc_ratio)
-            
-            if max_ratio >= min_similarity:
-                results.append((todo, max_ratio))
-        
-        # Sort by similarity (highest first)
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        return [todo for todo, _ in results]
+    async def duplicate_filter(self, min_similarity: float = DUPLICATE_MIN_SIMILARITY) -> DuplicateFilter:
+        """A filter rejecting new todos that nearly duplicate existing or earlier ones"""
+        return DuplicateFilter(await self._duplicate_index(), min_similarity)
 
-    async def update_by_id(self, todo_id: int, data: TodoUpdate) -> Todo | None:
-        """Update a todo by ID"""
-        todo = await self.repo.get_by_id(todo_id)
-        if not todo:
-            return None
-        
-        for field, value in data.model_dump(exclude_unset=True).items():
-            setattr(todo, field, value)
+    async def duplicate_report(
+        self, min_similarity: float = DUPLICATE_MIN_SIMILARITY, limit: int | None = None
+    ) -> DuplicateReport:
+        """Cluster all todos into groups of near-duplicates; limit caps the clusters loaded"""
+        clusters = (await self._duplicate_index()).clusters(min_similarity)
+        shown = clusters[:limit]
+        todos = {
+            todo.id: todo
+            for todo in await self.repo.get_by_ids([todo_id for ids in shown for todo_id in ids])
+        }
+        return DuplicateReport(
+            clusters=[[todos[todo_id] for todo_id in ids if todo_id in todos] for ids in shown],
+            total_clusters=len(clusters),
+            duplicate_todos=sum(len(ids) - 1 for ids in clusters),
+        )
+
+    async def update_by_id(
+        self, todo_id: int, data: TodoUpdate, if_match: str | None = None
+    ) -> Todo | None:
+        """
+        Update a todo by ID
         
-        return await self.repo.update(todo)
+        If if_match is given, the update only proceeds when it matches the
+        todo's current ETag; otherwise TodoPreconditionFailedError is raised.
+        A concurrent write is retried on a fresh read (where If-Match then
+        fails); TodoConflictError is raised if the retries run out.
+        """
+        self._pin_for_write()
+        values = data.model_dump(exclude_unset=True)
+
+        async def attempt() -> Todo | None:
+            todo = await self.repo.get_by_id(todo_id)
+            if not todo:
+                return None
+            self._check_precondition(todo, if_match)
+            return await self.repo.update(todo, values)
+
+        return await self._retry_on_conflict(attempt)
 
     async def update_by_text(self, text: str, data: TodoUpdate) -> Todo | None:
         """Update a todo by matching title or description"""
-        todo = await self.find_by_text(text)
-        if not todo:
-            return None
-        
-        for field, value in data.model_dump(exclude_unset=True).items():
-            setattr(todo, field, value)
-        
-        return await self.repo.update(todo)
+        self._pin_for_write()
+        values = data.model_dump(exclude_unset=True)
+
+        async def attempt() -> Todo | None:
+            todo = await self.find_by_text(text)
+            if not todo:
+                return None
+            return await self.repo.update(todo, values)
+
+        return await self._retry_on_conflict(attempt)
+
+    async def delete_by_id(self, todo_id: int, if_match: str | None = None) -> bool:
+        """Delete a todo by ID, optionally only if it still matches an If-Match ETag"""
+        self._pin_for_write()
+
+        async def attempt() -> bool:
+            todo = await self.repo.get_by_id(todo_id)
+            if not todo:
+                return False
+            self._check_precondition(todo, if_match)
+            await self.repo.delete(todo)
+            return True
 
-    async def delete_by_id(self, todo_id: int) -> bool:
-        """Delete a todo by ID"""
-        todo = await self.repo.get_by_id(todo_id)
-        if not todo:
-            return False
-        await self.repo.delete(todo)
-        return True
+        return await self._retry_on_conflict(attempt)
 
     async def delete_by_text(self, text: str) -> bool:
         """Delete a todo by matching title or description"""
-        todo = await self.find_by_text(text)
-        if not todo:
-            return False
-        await self.repo.delete(todo)
-        return True
+        self._pin_for_write()
+
+        async def attempt() -> bool:
+            todo = await self.find_by_text(text)
+            if not todo:
+                return False
+            await self.repo.delete(todo)
+            return True
+
+        return await self._retry_on_conflict(attempt)
+
+    async def set_completed_many(self, todo_ids: list[int], completed: bool) -> list[TodoSnapshot]:
+        """
+        Mark the given todos completed (or not) in one set-based update
+
+        Returns the todos that changed; ids that do not exist or already had
+        the status are skipped.
+        """
+        self._pin_for_write()
+        return await self.repo.set_completed_many(todo_ids, completed)
+
+    async def delete_many(self, todo_ids: list[int]) -> list[TodoSnapshot]:
+        """Delete the given todos in one statement, returning the deleted ones"""
+        self._pin_for_write()
+        return await self.repo.delete_many(todo_ids)
 
     async def delete_all(self) -> int:
         """Delete all todos and return count"""
+        self._pin_for_write()
         return await self.repo.delete_all()
 
+    async def export_batches(self, batch_size: int) -> AsyncIterator[list]:
+        """Stream all todos as rows ordered like EXPORT_COLUMNS, batch_size at a time"""
+        columns = [getattr(Todo, name) for name in EXPORT_COLUMNS]
+        async for batch in self.repo.stream_batches(columns, batch_size):
+            yield batch
+
+    async def import_records(
+        self,
+        records: AsyncIterator[tuple[int, dict]],
+        batch_size: int,
+        keep_ids: bool = False,
+        duplicates: DuplicateFilter | None = None,
+    ) -> int:
+        """
+        Validate and bulk insert (line number, record) pairs in one transaction
+        
+        Raises ValueError naming the offending line; nothing is imported then.
+        Records the duplicates filter rejects are skipped (and counted there).
+        """
+        self._pin_for_write()
+        imported = 0
+        batch: list[dict] = []
+        async with UnitOfWork(self.repo.session):
+            async for line_no, record in records:
+                try:
+                    row = normalize_import_row(record, keep_ids=keep_ids)
+                except ValueError as e:
+                    raise ValueError(f"line {line_no}: {e}")
+                if duplicates is not None and not duplicates.accept(row["title"], row["description"]):
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    imported += len(await self.repo.bulk_insert(batch))
+                    batch = []
+            if batch:
+                imported += len(await self.repo.bulk_insert(batch))
+        return imported
+
+    def _shared_cache(self) -> TodoReadCache | None:
+        """
+        The read cache, unless this session may see rows other requests must
+        not: inside a unit of work or with uncommitted changes, reads neither
+        use nor fill the cache, as they may see writes that are rolled back
+        (and cached entries are only invalidated on the outermost commit)
+        """
+        session = self.repo.session
+        if self.cache is None or in_unit_of_work(session) or has_uncommitted_changes(session):
+            return None
+        return self.cache
+
+    def _pin_for_write(self) -> None:
+        """
+        Send this session's statements to the primary from here on, so the
+        read of a read-modify-write sees the row (and version) it will change
+        """
+        pin_to_primary(self.repo.session)
+
+    async def _retry_on_conflict(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a read-modify-write, re-running it from a fresh read when a
+        concurrent write bumped the todo's version first
+        """
+        for attempt_no in range(1, WRITE_CONFLICT_ATTEMPTS + 1):
+            try:
+                return await attempt()
+            except TodoConflictError:
+                if attempt_no == WRITE_CONFLICT_ATTEMPTS:
+                    raise
+                logger.info(f"Todo write conflict, retrying ({attempt_no}/{WRITE_CONFLICT_ATTEMPTS})")
+
+    async def _nearest_ids(self, text: str) -> list[int]:
+        """Ids of the SEMANTIC_TOP_K todos whose embeddings are closest to text's"""
+        await self.index.refresh(self.repo)
+        return [todo_id for todo_id, _ in self.index.search(embed(text), SEMANTIC_TOP_K)]
+
+    async def _duplicate_index(self) -> DuplicateIndex:
+        """The current duplicate index; raises without DUPLICATE_DETECTION_ENABLED"""
+        if self.duplicates is None:
+            raise DuplicateDetectionDisabledError("Near-duplicate detection is disabled")
+        await self.duplicates.refresh(self.repo)
+        return self.duplicates
+
+    def _check_precondition(self, todo: Todo, if_match: str | None) -> None:
+        """Raise if an If-Match header was given and does not match the todo"""
+        if if_match is not None and not etag_matches(if_match, todo_etag(todo)):
+            raise TodoPreconditionFailedError(
+                f"Todo {todo.id} has changed (ETag {todo_etag(todo)})"
+            )
+
@@ -0,0 +1,85 @@
+"""
+Tests for the batch tools that handle multi-item commands in one call
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.domain.schemas import TodoCreate
+from app.repositories.todo_repository import TodoRepository
+from app.services.duplicate_index import DuplicateIndex
+from app.services.run_read_cache import RunReadCache
+from app.services.todo_service import TodoService
+from app.tools.todo_tools import build_todo_tools
+
+
+async def make_tools(session: AsyncSession):
+    service = TodoService(TodoRepository(session))
+    reads = RunReadCache(service)
+    return service, {t.name: t for t in build_todo_tools(service, reads)}
+
+
+@pytest.mark.asyncio
+async def test_create_todos_skips_existing(db_session: AsyncSession):
+    """Test that one call creates every new title and skips duplicates"""
+    service, tools = await make_tools(db_session)
+    await service.create_todo(TodoCreate(title="Milk"))
+
+    result = await tools["create_todos"].ainvoke(
+        {"titles": ["milk", "Eggs", "Bread", "eggs"], "priority": "high"}
+    )
+
+    assert "Created 2 todo(s) [Priority: high]" in result
+    assert "Skipped (already exist): milk, eggs" in result
+    assert sorted(t.title for t in await service.list_summaries()) == ["Bread", "Eggs", "Milk"]
+
+
+@pytest.mark.asyncio
+async def test_create_tools_skip_near_duplicates(db_session: AsyncSession):
+    """Test that with the duplicate index the create tools refuse near-duplicates"""
+    service = TodoService(TodoRepository(db_session), duplicates=DuplicateIndex())
+    tools = {t.name: t for t in build_todo_tools(service, RunReadCache(service))}
+    await service.create_todo(TodoCreate(title="Buy milk"))
+
+    assert "already exists: 'Buy milk'" in await tools["create_todo"].ainvoke({"title": "buy milk!"})
+    result = await tools["create_todos"].ainvoke({"titles": ["BUY MILK.", "Pay rent", "pay rent!"]})
+
+    assert "Created 1 todo(s)" in result
+    assert "Skipped (already exist): BUY MILK., pay rent!" in result
+
+
+@pytest.mark.asyncio
+async def test_complete_todos_by_match_and_ids(db_session: AsyncSession):
+    """Test that todos matched by text and by id are completed in one call"""
+    service, tools = await make_tools(db_session)
+    todos = await service.create_many([
+        TodoCreate(title="Grocery: milk"),
+        TodoCreate(title="Call mom", description="about the grocery list"),
+        TodoCreate(title="Pay rent"),
+        TodoCreate(title="Walk dog"),
+    ])
+    # Cached before the write; must not be served stale afterwards
+    await tools["get_completed_todos"].ainvoke({"completed": False})
+
+    result = await tools["complete_todos"].ainvoke({"match": "grocery", "ids": [todos[2].id]})
+
+    assert "Marked 3 todo(s) as complete" in result
+    incomplete = await tools["get_completed_todos"].ainvoke({"completed": False})
+    assert "Walk dog" in incomplete and "Pay rent" not in incomplete
+
+    again = await tools["complete_todos"].ainvoke({"ids": [todos[2].id]})
+    assert "already complete or not found" in again
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_by_match(db_session: AsyncSession):
+    """Test that every todo containing the match text is deleted"""
+    service, tools = await make_tools(db_session)
+    await service.create_many([TodoCreate(title="Old note 1"), TodoCreate(title="Old note 2"), TodoCreate(title="Keep")])
+    await tools["list_todos"].ainvoke({})
+
+    result = await tools["delete_todos"].ainvoke({"match": "old note"})
+
+    assert "Deleted 2 todo(s)" in result
+    listing = await tools["list_todos"].ainvoke({})
+    assert "Keep" in listing and "Old note" not in listing
+    assert "No todos to delete" in await tools["delete_todos"].ainvoke({})
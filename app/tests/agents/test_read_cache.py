@@ -0,0 +1,128 @@
+"""
+Tests for the run-scoped read cache shared by the agent tools
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.tracing import SpanExporter, Tracer
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.domain.schemas import TodoCreate
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_service import AgentService
+from app.services.run_read_cache import RunReadCache
+from app.services.todo_index import TodoVectorIndex
+from app.services.todo_service import TodoService
+from app.tools.todo_tools import build_todo_tools
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+async def make_tools(session: AsyncSession):
+    service = TodoService(TodoRepository(session))
+    await service.create_todo(TodoCreate(title="Buy milk"))
+    await service.create_todo(TodoCreate(title="Walk dog", description="Around the park"))
+    reads = RunReadCache(service)
+    tools = {t.name: t for t in build_todo_tools(service, reads)}
+    return reads, tools
+
+
+@pytest.mark.asyncio
+async def test_repeated_reads_are_memoized(db_session: AsyncSession):
+    """Test that the same read in one run is only loaded once"""
+    reads, tools = await make_tools(db_session)
+
+    first = await tools["list_todos"].ainvoke({})
+    second = await tools["list_todos"].ainvoke({})
+    await tools["search_todo"].ainvoke({"search_text": "dog"})
+    await tools["search_todo"].ainvoke({"search_text": "DOG"})
+
+    assert first == second
+    assert (reads.hits, reads.misses) == (2, 2)
+    assert reads.hit_rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_mutations_invalidate_only_affected_reads(db_session: AsyncSession):
+    """Test that a write drops the reads the row appears in and keeps the rest"""
+    reads, tools = await make_tools(db_session)
+    await tools["list_todos"].ainvoke({})
+    await tools["get_completed_todos"].ainvoke({"completed": True})
+    await tools["search_todo"].ainvoke({"search_text": "park"})
+
+    result = await tools["mark_complete"].ainvoke({"text": "Buy milk"})
+    assert "Marked as complete" in result
+    reads.hits = reads.misses = 0
+
+    # The unrelated search is still cached; both listings show the change
+    await tools["search_todo"].ainvoke({"search_text": "park"})
+    assert "Buy milk" in await tools["get_completed_todos"].ainvoke({"completed": True})
+    assert "✓" in await tools["list_todos"].ainvoke({})
+    assert (reads.hits, reads.misses) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_update_sees_its_own_writes(db_session: AsyncSession):
+    """Test that after a rename the old text no longer matches and the new one does"""
+    reads, tools = await make_tools(db_session)
+    await tools["search_todo"].ainvoke({"search_text": "milk"})
+
+    await tools["update_todo"].ainvoke({"text": "Buy milk", "title": "Buy bread"})
+
+    assert "No todos found" in await tools["search_todo"].ainvoke({"search_text": "milk"})
+    assert "Deleted" in await tools["delete_todo"].ainvoke({"text": "Buy bread"})
+    assert "No todos found" in await tools["search_todo"].ainvoke({"search_text": "bread"})
+
+
+class ToolExecutor:
+    """Runs a fixed sequence of tool calls, as the model might choose them"""
+
+    def __init__(self, tools: dict):
+        self.tools = tools
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        await self.tools["list_todos"].ainvoke({})
+        await self.tools["list_todos"].ainvoke({})
+        return {"output": "Done", "intermediate_steps": []}
+
+
+@pytest.mark.asyncio
+async def test_agent_reports_hit_rate_per_run(db_session: AsyncSession):
+    """Test that each run starts with an empty cache and reports its hit rate"""
+    reads, tools = await make_tools(db_session)
+    exporter = ListExporter()
+    agent = AgentService(ToolExecutor(tools), read_cache=reads)
+
+    for _ in range(2):
+        with Tracer(exporter).trace("request"):
+            await agent.process_query("Show my todos twice")
+
+    runs = [s for s in exporter.spans if s.name == "agent.process_query"]
+    assert len(runs) == 2
+    for run in runs:
+        assert run.attributes["agent.read_cache.hits"] == 1
+        assert run.attributes["agent.read_cache.misses"] == 1
+        assert run.attributes["agent.read_cache.hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_semantic_lookups_are_invalidated_by_similar_rows(db_session: AsyncSession):
+    """Test that with the vector index a write drops lookups the row may now answer"""
+    index = TodoVectorIndex()
+    add_commit_listener(index.apply_changes)
+    try:
+        service = TodoService(TodoRepository(db_session), index=index)
+        reads = RunReadCache(service)
+        tools = {t.name: t for t in build_todo_tools(service, reads)}
+        assert "not found" in await tools["delete_todo"].ainvoke({"text": "dentists appointment"})
+
+        await tools["create_todo"].ainvoke({"title": "Book appointment at the dentist"})
+
+        assert "Deleted" in await tools["delete_todo"].ainvoke({"text": "dentists appointment"})
+    finally:
+        remove_commit_listener(index.apply_changes)
@@ -0,0 +1,159 @@
+"""
+Tests for per-tool-call sessions: agent runs waiting on the LLM must not hold
+pooled connections the REST API needs
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.agents import executor
+from app.api.deps import get_agent_service, get_session_factory
+from app.core.config import get_settings
+from app.db.base import Base
+from app.db.routing import EngineRouter
+from app.db.session import create_sessionmaker, get_db
+from app.main import app
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+
+POOL_SIZE = 2
+AGENT_RUNS = 8
+# Pause between REST requests
+REST_INTERVAL = 0.05
+# Simulated time per LLM call; each run makes two
+LLM_SECONDS = 0.5
+
+
+class ScriptedExecutor:
+    """Calls tools like an agent would, waiting on a (simulated) LLM before each step"""
+
+    def __init__(self, tools: list, writes: bool):
+        self.tools = {t.name: t for t in tools}
+        self.writes = writes
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        await asyncio.sleep(LLM_SECONDS)
+        await self.tools["list_todos"].ainvoke({})
+        await asyncio.sleep(LLM_SECONDS)
+        if self.writes:
+            result = await self.tools["create_todo"].ainvoke({"title": inputs["input"]})
+        else:
+            result = await self.tools["search_todo"].ainvoke({"search_text": inputs["input"]})
+        return {"output": result, "intermediate_steps": []}
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    """Sessions on a file database behind a pool of POOL_SIZE connections"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield create_sessionmaker(EngineRouter(engine, []))
+    await engine.dispose()
+
+
+@pytest.fixture
+def transaction_mode(monkeypatch):
+    def set_mode(mode: str) -> None:
+        monkeypatch.setenv("AGENT_TRANSACTION_MODE", mode)
+        get_settings.cache_clear()
+
+    yield set_mode
+    get_settings.cache_clear()
+
+
+async def run_agent(session_factory, query: str) -> dict:
+    """Run a query the way /agent/query does, with the request's own session"""
+    async with session_factory() as db:
+        service = await get_agent_service(
+            db=db,
+            todo_service=TodoService(TodoRepository(db)),
+            session_factory=session_factory,
+        )
+        return await service.process_query(query)
+
+
+async def rest_latencies(
+    session_factory, agents_running: asyncio.Event, agents_done: asyncio.Event
+) -> list[float]:
+    """Time GET /api/v1/todos from when the agent runs have started until they finish"""
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    latencies = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await agents_running.wait()
+            while not agents_done.is_set():
+                start = time.perf_counter()
+                response = await client.get("/api/v1/todos/")
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(REST_INTERVAL)
+    finally:
+        app.dependency_overrides.clear()
+    return latencies
+
+
+async def run_concurrently(session_factory, monkeypatch, writes: bool):
+    monkeypatch.setattr(
+        executor, "build_agent_executor", lambda tools: ScriptedExecutor(tools, writes)
+    )
+    agents_running = asyncio.Event()
+    agents_done = asyncio.Event()
+
+    async def agents():
+        runs = [
+            asyncio.create_task(run_agent(session_factory, f"Task {n}")) for n in range(AGENT_RUNS)
+        ]
+        # Let every run reach its first LLM wait
+        await asyncio.sleep(LLM_SECONDS / 2)
+        agents_running.set()
+        try:
+            return await asyncio.gather(*runs, return_exceptions=True)
+        finally:
+            agents_done.set()
+
+    return await asyncio.gather(
+        agents(), rest_latencies(session_factory, agents_running, agents_done)
+    )
+
+
+async def test_rest_latency_unaffected_by_agent_runs(session_factory, transaction_mode, monkeypatch):
+    """Test that with per-tool-call sessions many agent runs do not starve REST requests"""
+    transaction_mode("tool")
+
+    results, latencies = await run_concurrently(session_factory, monkeypatch, writes=True)
+
+    assert all(isinstance(result, dict) for result in results), results
+    # No request waits for a run to give back a connection
+    assert max(latencies) < LLM_SECONDS / 2, latencies
+    async with session_factory() as session:
+        todos = await TodoService(TodoRepository(session)).list_summaries()
+    assert len(todos) == AGENT_RUNS
+
+
+async def test_run_transactions_hold_connections_through_llm_waits(
+    session_factory, transaction_mode, monkeypatch
+):
+    """Test the contrast: with one transaction per run, REST requests queue behind the runs"""
+    transaction_mode("run")
+
+    _, latencies = await run_concurrently(session_factory, monkeypatch, writes=False)
+
+    assert max(latencies) > LLM_SECONDS / 2, latencies
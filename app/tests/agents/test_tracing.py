@@ -0,0 +1,77 @@
+"""
+Tests for agent run tracing (LLM and tool spans from LangChain callbacks)
+"""
+
+import uuid
+import pytest
+from langchain_core.outputs import LLMResult
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.tracing import SpanExporter, Tracer
+from app.domain.schemas import TodoCreate
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_service import AgentService
+from app.services.todo_service import TodoService
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def by_name(self, name: str):
+        [span] = [s for s in self.spans if s.name == name]
+        return span
+
+    def sql(self, prefix: str):
+        [span] = [s for s in self.spans if s.attributes.get("db.statement", "").startswith(prefix)]
+        return span
+
+
+class FakeExecutor:
+    """Calls the callbacks as AgentExecutor does: one LLM call, then one tool call"""
+
+    def __init__(self, service: TodoService):
+        self.service = service
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        callbacks = config["callbacks"]
+        llm_run, tool_run = uuid.uuid4(), uuid.uuid4()
+        for callback in callbacks:
+            callback.on_llm_start({"kwargs": {"model_name": "test-model"}}, ["prompt"], run_id=llm_run)
+        usage = {"token_usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}}
+        for callback in callbacks:
+            callback.on_llm_end(LLMResult(generations=[], llm_output=usage), run_id=llm_run)
+
+        for callback in callbacks:
+            callback.on_tool_start({"name": "create_todo"}, inputs["input"], run_id=tool_run)
+        await self.service.create_todo(TodoCreate(title=inputs["input"]))
+        for callback in callbacks:
+            callback.on_tool_end("Created", run_id=tool_run)
+        return {"output": "Done", "intermediate_steps": []}
+
+
+@pytest.mark.asyncio
+async def test_agent_run_spans(db_session: AsyncSession):
+    """Test that LLM and tool calls get spans, with the tool's service and SQL spans beneath it"""
+    exporter = ListExporter()
+    agent = AgentService(FakeExecutor(TodoService(TodoRepository(db_session))))
+
+    with Tracer(exporter).trace("request"):
+        await agent.process_query("Buy milk")
+
+    run = exporter.by_name("agent.process_query")
+    assert run.attributes["agent.llm_calls"] == 1
+    assert run.attributes["agent.total_tokens"] == 15
+
+    llm = exporter.by_name("llm")
+    assert llm.parent_id == run.span_id
+    assert llm.attributes["llm.model"] == "test-model"
+    assert llm.attributes["llm.prompt_tokens"] == 12
+
+    tool = exporter.by_name("tool create_todo")
+    assert tool.parent_id == run.span_id
+    service = exporter.by_name("TodoService.create_todo")
+    assert service.parent_id == tool.span_id
+    assert exporter.sql("INSERT INTO todos ").parent_id == service.span_id
@@ -0,0 +1,120 @@
+"""
+Tests for agent rate limiting and concurrency limits
+"""
+
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.core.security import (
+    AdmissionControlMiddleware,
+    ConcurrencyLimiter,
+    DatabaseRateLimitBackend,
+    InMemoryRateLimitBackend,
+)
+from app.tests.conftest import TestSessionLocal
+
+
+def make_app(limiter: ConcurrencyLimiter, release: asyncio.Event | None = None) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/run")
+    async def run():
+        if release is not None:
+            await release.wait()
+        return {"ok": True}
+
+    @app.post("/other")
+    async def other():
+        return {"ok": True}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        paths=["/run"],
+        backend=InMemoryRateLimitBackend(),
+        limiter=limiter,
+    )
+    return app
+
+
+def make_client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_returns_429(monkeypatch):
+    """Test that a client exceeding its burst gets 429 with Retry-After"""
+    monkeypatch.setenv("AGENT_RATE_LIMIT_BURST", "2")
+    monkeypatch.setenv("AGENT_RATE_LIMIT_PER_MINUTE", "6")
+    from app.core.config import get_settings
+    get_settings.cache_clear()
+    try:
+        app = make_app(ConcurrencyLimiter(max_concurrent=4, max_queued=4, queue_timeout=1))
+        async with make_client(app) as client:
+            statuses = [(await client.post("/run")).status_code for _ in range(3)]
+            limited = await client.post("/run")
+            other = await client.post("/other")
+    finally:
+        get_settings.cache_clear()
+
+    assert statuses == [200, 200, 429]
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 10
+    assert other.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_full_queue_returns_503():
+    """Test that runs beyond the concurrency cap and queue are rejected at once"""
+    release = asyncio.Event()
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queued=1, queue_timeout=5)
+    app = make_app(limiter, release)
+    async with make_client(app) as client:
+        running = asyncio.ensure_future(client.post("/run"))
+        queued = asyncio.ensure_future(client.post("/run"))
+        while limiter.queued < 1:
+            await asyncio.sleep(0.01)
+
+        rejected = await client.post("/run")
+        assert rejected.status_code == 503
+        assert int(rejected.headers["Retry-After"]) >= 1
+
+        release.set()
+        assert (await running).status_code == 200
+        assert (await queued).status_code == 200
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_returns_503():
+    """Test that a queued run gives up after the queue timeout"""
+    release = asyncio.Event()
+    limiter = ConcurrencyLimiter(max_concurrent=1, max_queued=5, queue_timeout=0.05)
+    app = make_app(limiter, release)
+    async with make_client(app) as client:
+        running = asyncio.ensure_future(client.post("/run"))
+        await asyncio.sleep(0.01)
+        assert (await client.post("/run")).status_code == 503
+        release.set()
+        assert (await running).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills():
+    """Test that the in-memory bucket refills at the configured rate"""
+    backend = InMemoryRateLimitBackend()
+    assert await backend.acquire("client", rate=1000, burst=1) == 0
+    assert await backend.acquire("client", rate=1000, burst=1) > 0
+    await asyncio.sleep(0.01)
+    assert await backend.acquire("client", rate=1000, burst=1) == 0
+
+
+@pytest.mark.asyncio
+async def test_database_backend_shares_buckets(db_session):
+    """Test that two database backends (workers) draw from the same bucket"""
+    first = DatabaseRateLimitBackend(TestSessionLocal)
+    second = DatabaseRateLimitBackend(TestSessionLocal)
+    assert await first.acquire("client", rate=0.01, burst=2) == 0
+    assert await second.acquire("client", rate=0.01, burst=2) == 0
+    assert await first.acquire("client", rate=0.01, burst=2) > 0
+    assert await second.acquire("other", rate=0.01, burst=2) == 0
@@ -0,0 +1,30 @@
+"""
+Tests for the asynchronous agent job endpoints
+"""
+
+from fastapi.testclient import TestClient
+
+
+def test_submit_and_poll_job(client: TestClient):
+    """Test that a submitted job is queued and can be polled"""
+    response = client.post("/api/v1/agent/jobs", json={"query": "Buy milk"})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert job["query"] == "Buy milk"
+    assert job["actions_taken"] == []
+    assert response.headers["Location"].endswith(f"/api/v1/agent/jobs/{job['id']}")
+
+    polled = client.get(response.headers["Location"])
+    assert polled.status_code == 200
+    assert polled.json()["id"] == job["id"]
+
+
+def test_get_unknown_job(client: TestClient):
+    """Test that an unknown job id returns 404"""
+    assert client.get("/api/v1/agent/jobs/missing").status_code == 404
+
+
+def test_submit_validates_query(client: TestClient):
+    """Test that an empty query is rejected"""
+    assert client.post("/api/v1/agent/jobs", json={"query": ""}).status_code == 422
@@ -0,0 +1,40 @@
+"""
+Tests for deployment roles (APP_ROLE)
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+from fastapi import FastAPI
+from app.api.v1.router import build_api_router
+
+
+def paths(role: str) -> set[str]:
+    app = FastAPI()
+    app.include_router(build_api_router(role))
+    return set(app.openapi()["paths"])
+
+
+def test_roles_select_endpoints():
+    """Test that each role mounts only its endpoints"""
+    assert "/agent/query" not in paths("rest")
+    assert "/todos/" in paths("rest")
+    assert "/todos/" not in paths("agent")
+    assert {"/agent/query", "/todos/"} <= paths("all")
+    with pytest.raises(ValueError):
+        build_api_router("nope")
+
+
+@pytest.mark.parametrize("role", ["rest", "all"])
+def test_startup_does_not_load_langchain(role: str):
+    """Test that importing the app leaves the agent stack unloaded until it is used"""
+    code = "import sys, app.main; print(any(m.startswith('langchain') for m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "APP_ROLE": role},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,39 @@
+"""
+Tests for the /todos/changes endpoints
+"""
+
+from fastapi.testclient import TestClient
+from app.api.v1.todos import sse_message
+
+
+def test_websocket_replays_and_streams(client: TestClient):
+    """Test that the WebSocket feed replays from ?after= and then pushes live changes"""
+    todo_id = client.post("/api/v1/todos", json={"title": "Before connect"}).json()["id"]
+
+    with client.websocket_connect("/api/v1/todos/changes/ws?after=0") as ws:
+        replayed = ws.receive_json()
+        assert (replayed["op"], replayed["todo_id"]) == ("create", todo_id)
+
+        client.put(f"/api/v1/todos/{todo_id}", json={"completed": True})
+        live = ws.receive_json()
+        assert live["op"] == "update"
+        assert live["todo"]["completed"] is True
+        assert live["id"] > replayed["id"]
+
+        client.delete(f"/api/v1/todos/{todo_id}")
+        deleted = ws.receive_json()
+        assert (deleted["op"], deleted["todo"]) == ("delete", None)
+
+
+def test_invalid_last_event_id(client: TestClient):
+    """Test that a non-numeric Last-Event-ID is rejected"""
+    response = client.get("/api/v1/todos/changes", headers={"Last-Event-ID": "abc"})
+    assert response.status_code == 422
+
+
+def test_sse_message_format():
+    """Test Server-Sent Event framing of events and heartbeats"""
+    message = sse_message({"id": 7, "op": "create", "todo_id": 3, "todo": None})
+    assert message.startswith("id: 7\nevent: create\ndata: {")
+    assert message.endswith("\n\n")
+    assert sse_message(None) == ": heartbeat\n\n"
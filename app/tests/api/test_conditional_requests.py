@@ -0,0 +1,87 @@
+"""
+Tests for ETag / conditional request support on todo endpoints
+"""
+
+from fastapi.testclient import TestClient
+from app.repositories.todo_repository import TodoRepository
+from app.utils.exceptions import TodoConflictError
+
+
+def test_get_todo_not_modified(client: TestClient):
+    """Test that If-None-Match with the current ETag returns 304"""
+    todo_id = client.post("/api/v1/todos", json={"title": "Poll me"}).json()["id"]
+
+    response = client.get(f"/api/v1/todos/{todo_id}")
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/api/v1/todos/{todo_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_list_not_modified_until_changed(client: TestClient):
+    """Test that the list ETag holds until a todo is added"""
+    client.post("/api/v1/todos", json={"title": "Todo 1"})
+    listing = client.get("/api/v1/todos")
+    etag = listing.headers["ETag"]
+
+    response = client.get("/api/v1/todos", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["Vary"] == listing.headers["Vary"]
+
+    client.post("/api/v1/todos", json={"title": "Todo 2"})
+    response = client.get("/api/v1/todos", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["ETag"] != etag
+
+
+def test_filtered_lists_have_distinct_etags(client: TestClient):
+    """Test that filtered listings do not share an ETag with the full list"""
+    client.post("/api/v1/todos", json={"title": "Todo 1"})
+    all_etag = client.get("/api/v1/todos").headers["ETag"]
+    open_etag = client.get("/api/v1/todos?completed=false").headers["ETag"]
+    assert all_etag != open_etag
+
+
+def test_update_with_if_match(client: TestClient):
+    """Test that PUT honours If-Match"""
+    created = client.post("/api/v1/todos", json={"title": "Original"})
+    todo_id = created.json()["id"]
+    etag = created.headers["ETag"]
+
+    response = client.put(
+        f"/api/v1/todos/{todo_id}", json={"title": "Stale"}, headers={"If-Match": '"other"'}
+    )
+    assert response.status_code == 412
+
+    response = client.put(
+        f"/api/v1/todos/{todo_id}", json={"title": "Updated"}, headers={"If-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated"
+
+
+def test_delete_with_if_match(client: TestClient):
+    """Test that DELETE honours If-Match"""
+    created = client.post("/api/v1/todos", json={"title": "To Delete"})
+    todo_id = created.json()["id"]
+
+    response = client.delete(f"/api/v1/todos/{todo_id}", headers={"If-Match": '"other"'})
+    assert response.status_code == 412
+
+    response = client.delete(f"/api/v1/todos/{todo_id}", headers={"If-Match": "*"})
+    assert response.status_code == 204
+
+
+def test_update_conflict_returns_409(client: TestClient, monkeypatch):
+    """Test that a write that keeps losing the race is reported as 409"""
+    todo_id = client.post("/api/v1/todos", json={"title": "Contended"}).json()["id"]
+
+    async def always_conflicts(self, *args, **kwargs):
+        raise TodoConflictError("Todo was changed by another request")
+
+    monkeypatch.setattr(TodoRepository, "update", always_conflicts)
+    response = client.put(f"/api/v1/todos/{todo_id}", json={"completed": True})
+    assert response.status_code == 409
@@ -0,0 +1,94 @@
+"""
+Tests for bulk todo export and import endpoints
+"""
+
+import csv
+import io
+import json
+from fastapi.testclient import TestClient
+
+
+def test_export_ndjson(client: TestClient):
+    """Test exporting todos as NDJSON"""
+    client.post("/api/v1/todos", json={"title": "Todo 1", "priority": "high"})
+    client.post("/api/v1/todos", json={"title": "Todo 2", "description": "Details"})
+
+    response = client.get("/api/v1/todos/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == ["Todo 1", "Todo 2"]
+    assert rows[0]["priority"] == "high"
+    assert rows[1]["description"] == "Details"
+
+
+def test_export_csv(client: TestClient):
+    """Test exporting todos as CSV with a header row"""
+    client.post("/api/v1/todos", json={"title": "Todo, with comma"})
+
+    response = client.get("/api/v1/todos/export?format=csv")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 1
+    assert rows[0]["title"] == "Todo, with comma"
+
+
+def test_import_ndjson(client: TestClient):
+    """Test importing todos from NDJSON"""
+    body = "\n".join([
+        json.dumps({"title": "Imported 1", "priority": "urgent"}),
+        json.dumps({"title": "Imported 2", "completed": True}),
+    ])
+    response = client.post("/api/v1/todos/import", content=body)
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+    todos = client.get("/api/v1/todos").json()
+    assert {t["title"]: t["priority"] for t in todos} == {"Imported 1": "urgent", "Imported 2": "medium"}
+    assert [t["completed"] for t in todos] == [False, True]
+
+
+def test_import_csv_round_trip(client: TestClient):
+    """Test that a CSV export can be restored with its ids"""
+    client.post("/api/v1/todos", json={"title": "Multi\nline", "description": 'Say "hi"'})
+    exported = client.get("/api/v1/todos/export?format=csv").text
+    client.delete("/api/v1/todos/1")
+
+    response = client.post("/api/v1/todos/import?format=csv&keep_ids=true", content=exported)
+    assert response.status_code == 200
+
+    todo = client.get("/api/v1/todos/1").json()
+    assert todo["title"] == "Multi\nline"
+    assert todo["description"] == 'Say "hi"'
+
+
+def test_import_is_all_or_nothing(client: TestClient):
+    """Test that an invalid record rejects the whole import"""
+    body = "\n".join([
+        json.dumps({"title": "Valid"}),
+        json.dumps({"title": "Bad priority", "priority": "whenever"}),
+    ])
+    response = client.post("/api/v1/todos/import", content=body)
+    assert response.status_code == 422
+    assert "line 2" in response.json()["detail"]
+    assert client.get("/api/v1/todos").json() == []
+
+
+def test_import_skip_duplicates(client: TestClient, duplicate_index):
+    """Test that skip_duplicates drops near-duplicate records and reports them"""
+    client.post("/api/v1/todos", json={"title": "Buy milk"})
+    body = "\n".join(json.dumps({"title": title}) for title in ["buy milk!", "Pay rent", "pay rent."])
+
+    response = client.post("/api/v1/todos/import?skip_duplicates=true", content=body)
+    assert response.status_code == 200
+    assert (response.json()["imported"], response.json()["skipped"]) == (1, 2)
+    assert len(client.get("/api/v1/todos").json()) == 2
+
+
+def test_import_skip_duplicates_needs_detection_enabled(client: TestClient):
+    """Test that skip_duplicates is refused, importing nothing, without the duplicate index"""
+    body = json.dumps({"title": "Buy milk"})
+
+    response = client.post("/api/v1/todos/import?skip_duplicates=true", content=body)
+    assert response.status_code == 501
+    assert client.get("/api/v1/todos").json() == []
@@ -0,0 +1,16 @@
+"""
+Tests for health check endpoints
+"""
+
+from fastapi.testclient import TestClient
+
+
+def test_health_db_reports_pool_stats(client: TestClient):
+    """Test that /health/db reports engine health and pool statistics"""
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "healthy"
+    primary = data["engines"]["primary"]
+    assert primary["healthy"] is True
+    assert "pool_class" in primary["pool"]
@@ -0,0 +1,59 @@
+"""
+Tests for Idempotency-Key handling on POST endpoints
+"""
+
+import uuid
+from fastapi.testclient import TestClient
+
+
+def idempotency_key() -> dict:
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+def test_retry_replays_response(client: TestClient):
+    """Test that retrying a create with the same key creates a single todo"""
+    headers = idempotency_key()
+    first = client.post("/api/v1/todos", json={"title": "Once"}, headers=headers)
+    retry = client.post("/api/v1/todos", json={"title": "Once"}, headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["ETag"] == first.headers["ETag"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(client.get("/api/v1/todos").json()) == 1
+
+
+def test_key_reused_for_different_body(client: TestClient):
+    """Test that a key cannot be reused for a different request"""
+    headers = idempotency_key()
+    client.post("/api/v1/todos", json={"title": "First"}, headers=headers)
+    response = client.post("/api/v1/todos", json={"title": "Second"}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(client.get("/api/v1/todos").json()) == 1
+
+
+def test_validation_errors_are_replayed(client: TestClient):
+    """Test that a deterministic 4xx is stored like a success"""
+    headers = idempotency_key()
+    first = client.post("/api/v1/todos", json={}, headers=headers)
+    retry = client.post("/api/v1/todos", json={}, headers=headers)
+
+    assert first.status_code == retry.status_code == 422
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_requests_without_key_are_not_deduplicated(client: TestClient):
+    """Test that plain POSTs still create a todo each"""
+    client.post("/api/v1/todos", json={"title": "Todo"})
+    client.post("/api/v1/todos", json={"title": "Todo"})
+    assert len(client.get("/api/v1/todos").json()) == 2
+
+
+def test_invalid_key(client: TestClient):
+    """Test that an over-long key is rejected"""
+    response = client.post(
+        "/api/v1/todos", json={"title": "Todo"}, headers={"Idempotency-Key": "k" * 300}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,73 @@
+"""
+Tests for sparse fieldsets and compression on the todo list endpoint
+"""
+
+from fastapi.testclient import TestClient
+from app.api.responses import negotiate_encoding
+
+
+def test_list_matches_todo_read(client: TestClient):
+    """Test that the fast list path returns the same objects as the single-todo endpoint"""
+    todo_id = client.post(
+        "/api/v1/todos", json={"title": "Same shape", "priority": "high"}
+    ).json()["id"]
+
+    listed = client.get("/api/v1/todos").json()
+    assert listed == [client.get(f"/api/v1/todos/{todo_id}").json()]
+
+
+def test_list_sparse_fields(client: TestClient):
+    """Test that ?fields= returns only the requested fields plus the id"""
+    client.post("/api/v1/todos", json={"title": "Todo 1", "description": "long text"})
+    client.post("/api/v1/todos", json={"title": "Todo 2"})
+
+    response = client.get("/api/v1/todos?fields=title,completed&completed=false")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    assert all(set(item) == {"id", "title", "completed"} for item in data)
+
+
+def test_list_unknown_field(client: TestClient):
+    """Test that an unknown field name is rejected"""
+    response = client.get("/api/v1/todos?fields=title,owner")
+    assert response.status_code == 422
+    assert "owner" in response.json()["detail"]
+
+
+def test_sparse_list_has_its_own_etag(client: TestClient):
+    """Test that a sparse listing does not share an ETag with the full list"""
+    client.post("/api/v1/todos", json={"title": "Todo 1"})
+    full_etag = client.get("/api/v1/todos").headers["ETag"]
+    sparse_etag = client.get("/api/v1/todos?fields=title").headers["ETag"]
+    assert full_etag != sparse_etag
+
+
+def test_large_list_is_compressed(client: TestClient):
+    """Test that large listings are gzip-compressed when the client accepts it"""
+    for i in range(30):
+        client.post("/api/v1/todos", json={"title": f"Todo {i}", "description": "x" * 50})
+
+    response = client.get("/api/v1/todos", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.json()) == 30
+
+    response = client.get("/api/v1/todos", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_small_list_is_not_compressed(client: TestClient):
+    """Test that small listings are sent uncompressed"""
+    client.post("/api/v1/todos", json={"title": "Tiny"})
+    response = client.get("/api/v1/todos", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_negotiate_encoding():
+    """Test Accept-Encoding negotiation, including q=0 refusals"""
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
@@ -0,0 +1,89 @@
+"""
+Tests for request profiling and SQL query accounting
+"""
+
+import json
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from app.core.profiling import ProfilingMiddleware, record_queries
+from app.tests.conftest import TestSessionLocal
+
+
+def make_app(output_dir, sample_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/lookup")
+    async def lookup():
+        async with TestSessionLocal() as session:
+            # The same lookup twice, then a different one
+            for value in (1, 1, 2):
+                await session.execute(text("SELECT :value"), {"value": value})
+        return {"ok": True}
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        paths=["/api"],
+        enabled=True,
+        sample_rate=sample_rate,
+        output_dir=output_dir,
+    )
+    return app
+
+
+def make_client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_profile_header_records_queries(tmp_path):
+    """Test that X-Profile adds the summary headers and writes the profile files"""
+    async with make_client(make_app(tmp_path)) as client:
+        response = await client.get("/api/lookup", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    # The test engine emits BEGIN itself, then the three SELECTs
+    assert response.headers["X-Profile-Queries"] == "count=4, repeated=1"
+    assert 'sql;dur=' in response.headers["Server-Timing"]
+    profile_id = response.headers["X-Profile-Id"]
+    assert (tmp_path / f"{profile_id}.prof").exists()
+
+    report = json.loads((tmp_path / f"{profile_id}.json").read_text())
+    assert report["status"] == 200
+    assert report["cpu_profile"] is True
+    [statement] = [s for s in report["sql"]["statements"] if s["statement"].startswith("SELECT")]
+    assert statement["count"] == 3
+    assert statement["max_identical"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unprofiled_requests_are_untouched(tmp_path):
+    """Test that requests without the header (and no sampling) are not profiled"""
+    async with make_client(make_app(tmp_path)) as client:
+        response = await client.get("/api/lookup")
+
+    assert "X-Profile-Id" not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_sampled_requests_are_profiled(tmp_path):
+    """Test that the sample rate profiles requests sent without the header"""
+    async with make_client(make_app(tmp_path, sample_rate=1.0)) as client:
+        response = await client.get("/api/lookup")
+
+    assert response.headers["X-Profile-Queries"] == "count=4, repeated=1"
+
+
+@pytest.mark.asyncio
+async def test_record_queries_is_scoped():
+    """Test that only statements run inside record_queries are counted"""
+    async with TestSessionLocal() as session:
+        with record_queries() as queries:
+            await session.execute(text("SELECT 1"))
+        await session.execute(text("SELECT 2"))
+
+    assert "SELECT 1" in queries.statements
+    assert "SELECT 2" not in queries.statements
+    assert queries.repeated == 0
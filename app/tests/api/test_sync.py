@@ -0,0 +1,36 @@
+"""
+Tests for the delta sync endpoint
+"""
+
+from fastapi.testclient import TestClient
+
+
+def test_first_sync(client: TestClient):
+    """Test that a first sync returns all todos and a cursor"""
+    client.post("/api/v1/todos", json={"title": "Todo 1"})
+    client.post("/api/v1/todos", json={"title": "Todo 2"})
+
+    response = client.get("/api/v1/todos/sync")
+    assert response.status_code == 200
+    data = response.json()
+    assert [todo["title"] for todo in data["changed"]] == ["Todo 1", "Todo 2"]
+    assert data["deleted"] == []
+    assert data["has_more"] is False
+    assert data["cursor"]
+
+
+def test_sync_reports_deletes(client: TestClient):
+    """Test that deletions after the cursor come back as tombstones"""
+    todo_id = client.post("/api/v1/todos", json={"title": "Doomed"}).json()["id"]
+    cursor = client.get("/api/v1/todos/sync").json()["cursor"]
+
+    client.delete(f"/api/v1/todos/{todo_id}")
+
+    data = client.get(f"/api/v1/todos/sync?since={cursor}").json()
+    assert data["deleted"] == [todo_id]
+
+
+def test_sync_invalid_cursor(client: TestClient):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/todos/sync?since=garbage")
+    assert response.status_code == 400
@@ -143,3 +143,22 @@ def test_priority_field(client: TestClient):
         data = response.json()
         assert data["priority"] == priority
 
+
+
+def test_duplicate_report(client: TestClient, duplicate_index):
+    """Test that near-duplicate todos are reported as clusters"""
+    for title in ["Buy milk", "Walk dog", "buy milk!"]:
+        client.post("/api/v1/todos", json={"title": title})
+
+    response = client.get("/api/v1/todos/duplicates")
+    assert response.status_code == 200
+    data = response.json()
+    assert [[t["title"] for t in c["todos"]] for c in data["clusters"]] == [["Buy milk", "buy milk!"]]
+    assert (data["total_clusters"], data["duplicate_todos"]) == (1, 1)
+
+
+def test_duplicate_report_needs_detection_enabled(client: TestClient):
+    """Test that the report is refused without the duplicate index"""
+    client.post("/api/v1/todos", json={"title": "Buy milk"})
+
+    assert client.get("/api/v1/todos/duplicates").status_code == 501
@@ -0,0 +1,106 @@
+"""
+Tests for request tracing and traceparent propagation
+"""
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.tracing import (
+    NON_RECORDING_SPAN,
+    SpanExporter,
+    Tracer,
+    TracingMiddleware,
+    parse_traceparent,
+    start_span,
+)
+from app.domain.schemas import TodoCreate
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def by_name(self, name: str):
+        [span] = [s for s in self.spans if s.name == name]
+        return span
+
+    def sql(self, prefix: str):
+        [span] = [s for s in self.spans if s.attributes.get("db.statement", "").startswith(prefix)]
+        return span
+
+
+def make_app(session: AsyncSession, exporter: ListExporter) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/todos/{title}")
+    async def create(title: str):
+        todo = await TodoService(TodoRepository(session)).create_todo(TodoCreate(title=title))
+        return {"id": todo.id}
+
+    app.add_middleware(TracingMiddleware, paths=["/api"], tracer=Tracer(exporter))
+    return app
+
+
+def make_client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_request_spans_continue_traceparent(db_session: AsyncSession):
+    """Test that a request's server, service and SQL spans join the caller's trace"""
+    exporter = ListExporter()
+    async with make_client(make_app(db_session, exporter)) as client:
+        response = await client.post(
+            "/api/todos/Milk", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+    assert {span.trace_id for span in exporter.spans} == {TRACE_ID}
+
+    server = exporter.by_name("POST /api/todos/{title}")
+    assert server.parent_id == PARENT_ID
+    assert server.attributes["http.status_code"] == 200
+    service = exporter.by_name("TodoService.create_todo")
+    assert service.parent_id == server.span_id
+    insert = exporter.sql("INSERT INTO todos ")
+    assert insert.name == "SQL INSERT"
+    assert insert.parent_id == service.span_id
+
+
+@pytest.mark.asyncio
+async def test_unsampled_traceparent_records_nothing(db_session: AsyncSession):
+    """Test that a caller's not-sampled decision is respected"""
+    exporter = ListExporter()
+    async with make_client(make_app(db_session, exporter)) as client:
+        response = await client.post(
+            "/api/todos/Milk", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+        )
+
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
+    assert exporter.spans == []
+
+
+def test_parse_traceparent():
+    """Test W3C traceparent parsing, rejecting malformed and all-zero ids"""
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID, True)
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent(f"ff-{TRACE_ID}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_no_spans_outside_a_trace():
+    """Test that spans started outside any trace record nothing"""
+    assert start_span("orphan") is NON_RECORDING_SPAN
@@ -2,15 +2,24 @@
 Pytest configuration and fixtures
 """
 
+import os
 import pytest
 import asyncio
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from fastapi.testclient import TestClient
 
+# The app's own (in-memory) database has no stamped schema to check
+os.environ.setdefault("DB_CREATE_ALL_ON_STARTUP", "true")
+
 from app.main import app
 from app.db.base import Base
 from app.db.session import get_db
+from app.api.deps import get_session_factory
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.services.duplicate_index import DuplicateIndex
 
 # Test database URL (use in-memory SQLite for tests)
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -18,6 +27,19 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 # Create test engine
 test_engine = create_async_engine(TEST_DATABASE_URL, echo=False)
 
+
+# Let SQLAlchemy own BEGIN so SAVEPOINTs nest inside the outer transaction
+# (the sqlite driver otherwise releases the outermost savepoint as a commit)
+@event.listens_for(test_engine.sync_engine, "connect")
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
 # Create test session maker
 TestSessionLocal = async_sessionmaker(
     bind=test_engine,
@@ -57,9 +79,24 @@ def client(db_session: AsyncSession):
         yield db_session
     
     app.dependency_overrides[get_db] = override_get_db
+    # All test sessions share one in-memory connection, so streams reuse db_session
+    @asynccontextmanager
+    async def shared_session():
+        yield db_session
+    
+    app.dependency_overrides[get_session_factory] = lambda: shared_session
     
     with TestClient(app) as test_client:
         yield test_client
     
     app.dependency_overrides.clear()
 
+
+@pytest.fixture
+def duplicate_index(monkeypatch):
+    """Give the app a duplicate index, as with DUPLICATE_DETECTION_ENABLED"""
+    index = DuplicateIndex()
+    add_commit_listener(index.apply_changes)
+    monkeypatch.setattr("app.api.deps.get_duplicate_index", lambda: index)
+    yield index
+    remove_commit_listener(index.apply_changes)
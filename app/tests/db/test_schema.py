@@ -0,0 +1,67 @@
+"""
+Tests for the startup schema-version check
+"""
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.db.base import Base
+from app.db.schema import check_schema, create_schema, schema_fingerprint
+from app.utils.exceptions import SchemaMismatchError
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stamped_schema_passes(engine):
+    """Test that a database initialised by create_schema passes the check"""
+    assert await create_schema(engine) == schema_fingerprint()
+    await check_schema(engine)
+    # Stamping again keeps a single version row
+    await create_schema(engine)
+    await check_schema(engine)
+
+
+@pytest.mark.asyncio
+async def test_unstamped_schema_fails(engine):
+    """Test that tables created without a stamp fail the check"""
+    with pytest.raises(SchemaMismatchError, match="missing"):
+        await check_schema(engine)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    with pytest.raises(SchemaMismatchError, match="init_db"):
+        await check_schema(engine)
+
+
+@pytest.mark.asyncio
+async def test_outdated_tables_are_not_stamped(engine):
+    """Test that create_schema refuses to stamp tables that predate the models"""
+    async with engine.begin() as conn:
+        # The todos table as created before the version column and keyset index
+        await conn.execute(text(
+            "CREATE TABLE todos (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, "
+            "description TEXT, completed BOOLEAN NOT NULL, priority VARCHAR(6) NOT NULL, "
+            "created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL)"
+        ))
+
+    with pytest.raises(SchemaMismatchError, match="column todos.version.*alembic upgrade head"):
+        await create_schema(engine)
+    with pytest.raises(SchemaMismatchError, match="missing"):
+        await check_schema(engine)
+
+
+def test_fingerprint_follows_models():
+    """Test that the fingerprint changes with the columns and is stable otherwise"""
+    def metadata(*extra):
+        metadata = MetaData()
+        Table("t", metadata, Column("id", Integer, primary_key=True), *extra)
+        return metadata
+
+    assert schema_fingerprint(metadata()) == schema_fingerprint(metadata())
+    assert schema_fingerprint(metadata()) != schema_fingerprint(metadata(Column("n", Integer)))
@@ -0,0 +1,199 @@
+"""
+Tests for asynchronous agent jobs
+"""
+
+import asyncio
+import json
+from datetime import timedelta
+import pytest
+from sqlalchemy import select, update
+from langchain_core.agents import AgentAction
+from app.domain.enums import AgentJobStatus
+from app.domain.models import AgentJob, Todo
+from app.domain.schemas import TodoCreate
+from app.repositories.agent_job_repository import AgentJobRepository
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_job_service import AgentJobRunner
+from app.services.agent_service import AgentService
+from app.services.todo_service import TodoService
+from app.tests.conftest import TestSessionLocal
+from app.utils.datetime import utc_now
+
+
+class FakeExecutor:
+    """Stands in for the agent executor: one tool call, then an answer"""
+
+    def __init__(
+        self, fail: bool = False, release: asyncio.Event | None = None, delay: float = 0.0
+    ):
+        self.fail = fail
+        self.release = release
+        self.delay = delay
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        action = AgentAction(tool="create_todo", tool_input={"title": inputs["input"]}, log="")
+        for callback in config["callbacks"]:
+            callback.on_agent_action(action)
+        if self.release is not None:
+            await self.release.wait()
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+        return {"output": "Done", "intermediate_steps": [(action, "Created")]}
+
+
+async def create_job(query: str):
+    # Each step uses its own session, as the runner's sessions share the test connection
+    async with TestSessionLocal() as session:
+        return await AgentJobRepository(session).create(query)
+
+
+async def get_job(job_id: str):
+    async with TestSessionLocal() as session:
+        return await AgentJobRepository(session).get_by_id(job_id)
+
+
+async def claim_and_crash(worker_id: str, max_attempts: int):
+    # A worker that claimed a job and stopped heartbeating two minutes ago
+    async with TestSessionLocal() as session:
+        job = await AgentJobRepository(session).claim_next(worker_id, utc_now(), max_attempts)
+        await session.execute(
+            update(AgentJob)
+            .where(AgentJob.id == job.id)
+            .values(heartbeat_at=utc_now() - timedelta(minutes=2))
+        )
+        await session.commit()
+
+
+def make_runner(executor: FakeExecutor, **kwargs) -> AgentJobRunner:
+    return AgentJobRunner(
+        TestSessionLocal,
+        agent_service_factory=lambda session: AgentService(executor),
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_next_completes_job(db_session):
+    """Test that a worker runs a queued job and stores its result"""
+    job = await create_job("Buy milk")
+    runner = make_runner(FakeExecutor())
+
+    assert await runner.run_next() is True
+    assert await runner.run_next() is False
+
+    job = await get_job(job.id)
+    assert job.status == AgentJobStatus.SUCCEEDED
+    assert job.response == "Done"
+    assert json.loads(job.actions) == ["1. create_todo(title=Buy milk)"]
+    assert json.loads(job.usage)["llm_calls"] == 0
+    assert job.attempts == 1
+    assert job.finished_at is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_run_keeps_partial_actions(db_session):
+    """Test that a failing run is stored as failed with the actions it took"""
+    job = await create_job("Buy milk")
+    await make_runner(FakeExecutor(fail=True)).run_next()
+
+    job = await get_job(job.id)
+    assert job.status == AgentJobStatus.FAILED
+    assert "LLM unavailable" in job.error
+    assert json.loads(job.actions) == ["1. create_todo(title=Buy milk)"]
+
+
+@pytest.mark.asyncio
+async def test_jobs_have_their_own_timeout(db_session, monkeypatch):
+    """Test that a job may outlast the synchronous query timeout, but not its own"""
+    monkeypatch.setattr("app.services.agent_service.AGENT_TIMEOUT_SECONDS", 0.05)
+    slow = await create_job("Buy milk")
+    await make_runner(FakeExecutor(delay=0.2), timeout=5).run_next()
+    assert (await get_job(slow.id)).status == AgentJobStatus.SUCCEEDED
+
+    stuck = await create_job("Buy bread")
+    await make_runner(FakeExecutor(delay=0.2), timeout=0.1).run_next()
+    stuck = await get_job(stuck.id)
+    assert stuck.status == AgentJobStatus.FAILED
+    assert "timed out after 0.1 seconds" in stuck.error
+
+
+@pytest.mark.asyncio
+async def test_abandoned_job_is_recovered(db_session):
+    """Test that a job whose worker stopped heartbeating runs again, up to max_attempts"""
+    job = await create_job("Buy milk")
+    await claim_and_crash("crashed-worker", max_attempts=2)
+
+    runner = make_runner(FakeExecutor(), max_attempts=2)
+    assert await runner.run_next() is True
+    job = await get_job(job.id)
+    assert job.status == AgentJobStatus.SUCCEEDED
+    assert job.attempts == 2
+
+    exhausted = await create_job("Buy bread")
+    for worker in ("crashed-1", "crashed-2"):
+        await claim_and_crash(worker, max_attempts=2)
+    assert await runner.run_next() is False
+    async with TestSessionLocal() as session:
+        repo = AgentJobRepository(session)
+        assert await repo.fail_abandoned(utc_now() - runner.lease, max_attempts=2) == 1
+    assert (await get_job(exhausted.id)).status == AgentJobStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_stopped_worker_requeues_job(db_session):
+    """Test that a job still running when the runner stops goes back to the queue"""
+    job = await create_job("Buy milk")
+    runner = make_runner(FakeExecutor(release=asyncio.Event()), concurrency=1)
+    await runner.start()
+    runner.notify()
+    for _ in range(100):
+        if (await get_job(job.id)).status == AgentJobStatus.RUNNING:
+            break
+        await asyncio.sleep(0.01)
+
+    await runner.stop(timeout=0.05)
+    job = await get_job(job.id)
+    assert job.status == AgentJobStatus.QUEUED
+    assert job.attempts == 0
+
+
+class WritingExecutor:
+    """Creates a todo through the run's session; optionally another worker takes the job over meanwhile"""
+
+    def __init__(self, session, taken_over: bool):
+        self.session = session
+        self.taken_over = taken_over
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        await TodoService(TodoRepository(self.session)).create_todo(TodoCreate(title=inputs["input"]))
+        if self.taken_over:
+            await self.session.execute(update(AgentJob).values(worker_id="new-worker"))
+        return {"output": "Done", "intermediate_steps": []}
+
+
+async def todo_titles() -> list[str]:
+    async with TestSessionLocal() as session:
+        return list((await session.execute(select(Todo.title))).scalars().all())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("taken_over", [False, True])
+async def test_run_commits_with_its_outcome(db_session, taken_over: bool):
+    """Test that a run's todo changes commit only together with the job's success"""
+    job = await create_job("Buy milk")
+    runner = AgentJobRunner(
+        TestSessionLocal,
+        agent_service_factory=lambda session: AgentService(WritingExecutor(session, taken_over)),
+    )
+
+    await runner.run_next()
+
+    job = await get_job(job.id)
+    if taken_over:
+        # The new worker will make the changes; this run's were rolled back
+        assert (job.status, job.worker_id) == (AgentJobStatus.RUNNING, runner.worker_id)
+        assert await todo_titles() == []
+    else:
+        assert job.status == AgentJobStatus.SUCCEEDED
+        assert await todo_titles() == ["Buy milk"]
@@ -0,0 +1,68 @@
+"""
+Tests for the set-based batch operations behind the agent's batch tools
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.domain.enums import TodoPriority
+from app.domain.models import Todo, TodoEvent
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+
+
+async def test_create_many(db_session: AsyncSession):
+    """Test that several todos are created in one call and flagged as existing"""
+    service = TodoService(TodoRepository(db_session))
+
+    todos = await service.create_many([
+        TodoCreate(title="Milk"), TodoCreate(title="Eggs", priority=TodoPriority.HIGH),
+    ])
+
+    assert [todo.title for todo in todos] == ["Milk", "Eggs"]
+    assert all(todo.id and todo.version == 1 for todo in todos)
+    assert await service.existing_titles(["MILK", "bread"]) == {"milk"}
+
+
+async def test_set_completed_many_bumps_versions(db_session: AsyncSession):
+    """Test that one UPDATE changes only rows with another status and bumps their version"""
+    service = TodoService(TodoRepository(db_session))
+    milk, eggs, done = await service.create_many(
+        [TodoCreate(title="Milk"), TodoCreate(title="Eggs"), TodoCreate(title="Done")]
+    )
+    await service.update_by_id(done.id, TodoUpdate(completed=True))
+    changes = []
+    add_commit_listener(changes.extend)
+    try:
+        changed = await service.set_completed_many([milk.id, done.id, 999], True)
+    finally:
+        remove_commit_listener(changes.extend)
+
+    assert [(todo.id, todo.completed, todo.version) for todo in changed] == [(milk.id, True, 2)]
+    assert [(c.op, c.todo_id, c.completed) for c in changes] == [("update", milk.id, (False, True))]
+    assert changes[0].todo["version"] == 2
+
+    # Entities already in the session see the new state
+    assert milk.completed is True and milk.version == 2
+    assert eggs.completed is False and eggs.version == 1
+    assert (await service.update_by_id(milk.id, TodoUpdate(title="Oat milk"))).version == 3
+
+
+async def test_delete_many_records_events(db_session: AsyncSession):
+    """Test that a set-based delete returns the rows and writes an outbox event per row"""
+    service = TodoService(TodoRepository(db_session))
+    milk, eggs, bread = await service.create_many(
+        [TodoCreate(title="Milk"), TodoCreate(title="Eggs"), TodoCreate(title="Bread")]
+    )
+
+    deleted = await service.delete_many([milk.id, bread.id])
+
+    assert {todo.title for todo in deleted} == {"Milk", "Bread"}
+    remaining = await db_session.execute(select(Todo.title))
+    assert remaining.scalars().all() == ["Eggs"]
+    events = await db_session.execute(select(TodoEvent.op).where(TodoEvent.op == "delete"))
+    assert len(events.scalars().all()) == 2
+    # Deleted entities leave the session
+    assert milk not in db_session and bread not in db_session and eggs in db_session
@@ -0,0 +1,116 @@
+"""
+Tests for the todo_events outbox and the change feed broker
+"""
+
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.broadcast import InMemoryBroadcast
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.db.unit_of_work import UnitOfWork
+from app.domain.models import TodoEvent
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.change_feed import CLIENT_QUEUE_SIZE, ChangeFeed
+from app.services.todo_service import TodoService
+
+
+@pytest.fixture
+def feed():
+    feed = ChangeFeed(InMemoryBroadcast(), retention=timedelta(hours=1))
+    add_commit_listener(feed.publish_committed)
+    yield feed
+    remove_commit_listener(feed.publish_committed)
+
+
+def session_factory(session: AsyncSession):
+    @asynccontextmanager
+    async def factory():
+        yield session
+    return factory
+
+
+async def outbox(session: AsyncSession) -> list[tuple[str, int | None]]:
+    result = await session.execute(select(TodoEvent.op, TodoEvent.todo_id).order_by(TodoEvent.id))
+    return [tuple(row) for row in result]
+
+
+async def test_writes_are_recorded_in_outbox(db_session: AsyncSession):
+    """Test that create, update and delete each leave an outbox event"""
+    service = TodoService(TodoRepository(db_session))
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+    await service.update_by_id(todo.id, TodoUpdate(completed=True))
+    await service.delete_by_id(todo.id)
+
+    assert await outbox(db_session) == [
+        ("create", todo.id), ("update", todo.id), ("delete", todo.id)
+    ]
+
+
+async def test_rolled_back_writes_leave_no_events(db_session: AsyncSession):
+    """Test that events roll back with the transaction that wrote them"""
+    service = TodoService(TodoRepository(db_session))
+
+    with pytest.raises(RuntimeError):
+        async with UnitOfWork(db_session):
+            await service.create_todo(TodoCreate(title="Never committed"))
+            raise RuntimeError("agent failed")
+
+    assert await outbox(db_session) == []
+
+
+async def test_live_events_carry_the_todo(db_session: AsyncSession, feed: ChangeFeed):
+    """Test that committed changes reach subscribed clients with the todo data"""
+    service = TodoService(TodoRepository(db_session))
+
+    async with feed.subscribe() as queue:
+        todo = await service.create_todo(TodoCreate(title="Buy milk"))
+        event = queue.get_nowait()
+
+    assert event["op"] == "create"
+    assert event["todo_id"] == todo.id
+    assert event["todo"]["title"] == "Buy milk"
+    assert event["todo"]["updated_at"] is not None
+
+
+async def test_stream_replays_after_event_id(db_session: AsyncSession, feed: ChangeFeed):
+    """Test that a resuming client gets the events it missed, then live ones"""
+    service = TodoService(TodoRepository(db_session))
+    first = await service.create_todo(TodoCreate(title="Seen"))
+    second = await service.create_todo(TodoCreate(title="Missed"))
+    [(seen_id,)] = (await db_session.execute(
+        select(TodoEvent.id).where(TodoEvent.todo_id == first.id)
+    )).all()
+
+    stream = feed.stream(session_factory(db_session), after=seen_id, heartbeat_seconds=0.05)
+    replayed = await anext(stream)
+    assert (replayed["op"], replayed["todo_id"]) == ("create", second.id)
+
+    third = await service.create_todo(TodoCreate(title="Live"))
+    live = await anext(stream)
+    assert live["todo_id"] == third.id
+    assert await anext(stream) is None  # heartbeat
+    await stream.aclose()
+
+
+async def test_stream_resyncs_unknown_position(db_session: AsyncSession, feed: ChangeFeed):
+    """Test that resuming from an id the outbox cannot replay asks for a resync"""
+    await TodoService(TodoRepository(db_session)).create_todo(TodoCreate(title="Only"))
+
+    stream = feed.stream(session_factory(db_session), after=999)
+    event = await anext(stream)
+    assert event["op"] == "resync"
+    await stream.aclose()
+
+
+async def test_lagging_client_is_resynced(feed: ChangeFeed):
+    """Test that a client whose queue overflows gets a single resync event"""
+    async with feed.subscribe() as queue:
+        for i in range(CLIENT_QUEUE_SIZE + 1):
+            feed._on_message(f'{{"id": {i}, "op": "update", "todo_id": 1, "todo": null}}')
+        assert queue.qsize() == 1
+        assert queue.get_nowait()["op"] == "resync"
@@ -0,0 +1,125 @@
+"""
+Tests for MinHash near-duplicate detection and the duplicate index
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.db.unit_of_work import UnitOfWork
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.duplicate_index import DuplicateIndex
+from app.services.todo_service import TodoService
+from app.utils.exceptions import DuplicateDetectionDisabledError
+from app.utils.minhash import signature, similarity
+
+
+@pytest.fixture
+def index():
+    """An index wired to commits like the one built by get_duplicate_index()"""
+    index = DuplicateIndex()
+    add_commit_listener(index.apply_changes)
+    yield index
+    remove_commit_listener(index.apply_changes)
+
+
+def test_signatures_estimate_text_similarity():
+    """Test that case and punctuation are ignored and small edits stay similar"""
+    assert similarity(signature("Buy milk"), signature("buy milk!")) == 1.0
+    assert similarity(
+        signature("Submit quarterly tax report"), signature("Submit quarterly tax reports")
+    ) > 0.75
+    assert similarity(signature("Buy milk"), signature("Walk dog")) < 0.2
+    assert similarity(signature("Buy milk"), signature("Buy milk", "Two litres from the corner shop on the way home")) < 0.5
+    assert signature("?!") is None
+
+
+def test_index_lookups_and_clusters():
+    """Test that near-duplicates are found and grouped, and removed todos drop out"""
+    index = DuplicateIndex()
+    index.upsert(1, "Buy milk", None)
+    index.upsert(2, "Call mom about the weekend trip", None)
+    index.upsert(3, "buy milk!", None)
+    index.upsert(4, "Call mom about weekend trip", None)
+    index.upsert(5, "Walk dog", None)
+    index.upsert(6, "BUY MILK", None)
+
+    assert [todo_id for todo_id, _ in index.similar(signature("Buy milk."))] == [1, 3, 6]
+    assert index.clusters() == [[1, 3, 6], [2, 4]]
+
+    index.remove(3)
+    index.remove(4)
+    assert index.clusters() == [[1, 6]]
+
+
+async def test_find_duplicates_follows_committed_writes(db_session: AsyncSession, index: DuplicateIndex):
+    """Test that creates and renames reach the index once committed"""
+    service = TodoService(TodoRepository(db_session), duplicates=index)
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+
+    [duplicate] = await service.find_duplicates("buy milk!")
+    assert duplicate.id == todo.id
+    assert await service.find_duplicates("Walk dog") == []
+
+    await service.update_by_id(todo.id, TodoUpdate(title="Walk dog"))
+    assert await service.find_duplicates("buy milk!") == []
+    assert [t.id for t in await service.find_duplicates("Walk dog!")] == [todo.id]
+
+
+async def test_rolled_back_unit_of_work_stays_out_of_the_index(
+    db_session: AsyncSession, index: DuplicateIndex
+):
+    """Test that the shared index is not loaded from a transaction that rolls back"""
+    service = TodoService(TodoRepository(db_session), duplicates=index)
+
+    with pytest.raises(RuntimeError):
+        async with UnitOfWork(db_session):
+            await service.create_todo(TodoCreate(title="Buy milk"))
+            await service.find_duplicates("buy milk!")
+            raise RuntimeError("run failed")
+
+    assert await service.find_duplicates("buy milk!") == []
+    assert len(index) == 0
+
+
+async def test_import_skips_near_duplicates(db_session: AsyncSession, index: DuplicateIndex):
+    """Test that an import drops records duplicating existing todos or earlier records"""
+    service = TodoService(TodoRepository(db_session), duplicates=index)
+    await service.create_todo(TodoCreate(title="Buy milk"))
+
+    async def records():
+        for line_no, title in enumerate(["buy milk!", "Call mom", "call mom.", "Walk dog"], 1):
+            yield line_no, {"title": title}
+
+    duplicates = await service.duplicate_filter()
+    imported = await service.import_records(records(), batch_size=10, duplicates=duplicates)
+
+    assert (imported, duplicates.skipped) == (2, 2)
+    assert sorted(t.title for t in await service.list_summaries()) == ["Buy milk", "Call mom", "Walk dog"]
+
+
+async def test_duplicate_report(db_session: AsyncSession, index: DuplicateIndex):
+    """Test that the report loads the largest clusters and counts all of them"""
+    service = TodoService(TodoRepository(db_session), duplicates=index)
+    await service.create_many([
+        TodoCreate(title=title)
+        for title in ["Buy milk", "Pay rent", "buy milk!", "pay rent.", "Buy Milk", "Walk dog"]
+    ])
+
+    report = await service.duplicate_report(limit=1)
+
+    assert [[todo.title for todo in todos] for todos in report.clusters] == [
+        ["Buy milk", "buy milk!", "Buy Milk"]
+    ]
+    assert (report.total_clusters, report.duplicate_todos) == (2, 3)
+
+
+async def test_lookups_need_the_maintained_index(db_session: AsyncSession):
+    """Test that without the index the lookups refuse rather than build one per call"""
+    service = TodoService(TodoRepository(db_session))
+
+    with pytest.raises(DuplicateDetectionDisabledError):
+        await service.duplicate_report()
+    with pytest.raises(DuplicateDetectionDisabledError):
+        await service.duplicate_filter()
@@ -0,0 +1,82 @@
+"""
+Tests for the idempotency stores
+"""
+
+import asyncio
+import pytest
+from app.api.idempotency import (
+    COMPLETED,
+    PENDING,
+    DatabaseIdempotencyStore,
+    InMemoryIdempotencyStore,
+    StoredResponse,
+)
+from app.tests.conftest import TestSessionLocal
+
+RESPONSE = StoredResponse(
+    status=COMPLETED,
+    fingerprint="abc",
+    status_code=201,
+    headers=[(b"content-type", b"application/json")],
+    body=b'{"id":1}',
+)
+
+
+def stores():
+    return [
+        InMemoryIdempotencyStore(ttl_seconds=60),
+        DatabaseIdempotencyStore(
+            TestSessionLocal, ttl_seconds=60, pending_timeout_seconds=60, poll_interval=0.01
+        ),
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_index", [0, 1])
+async def test_claim_complete_replay(db_session, store_index):
+    """Test that a second claim sees the pending, then the completed record"""
+    store = stores()[store_index]
+    assert await store.claim("key") is None
+    assert (await store.claim("key")).status == PENDING
+
+    await store.complete("key", RESPONSE)
+    assert await store.wait("key", timeout=1) == RESPONSE
+    assert await store.claim("key") == RESPONSE
+
+
+@pytest.mark.asyncio
+async def test_wait_wakes_on_complete():
+    """Test that a retry waiting on a pending key gets the response once stored"""
+    store = InMemoryIdempotencyStore(ttl_seconds=60)
+    await store.claim("key")
+    waiter = asyncio.ensure_future(store.wait("key", timeout=5))
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    await store.complete("key", RESPONSE)
+    assert await waiter == RESPONSE
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("store_index", [0, 1])
+async def test_release_frees_key(db_session, store_index):
+    """Test that a released key can be claimed again"""
+    store = stores()[store_index]
+    await store.claim("key")
+    await store.release("key")
+    assert await store.wait("key", timeout=0) is None
+    assert await store.claim("key") is None
+
+
+@pytest.mark.asyncio
+async def test_expired_keys_can_be_reused(db_session):
+    """Test that records past their TTL no longer hold the key"""
+    memory = InMemoryIdempotencyStore(ttl_seconds=0)
+    await memory.claim("key")
+    await memory.complete("key", RESPONSE)
+    assert await memory.claim("key") is None
+
+    database = DatabaseIdempotencyStore(TestSessionLocal, ttl_seconds=0, pending_timeout_seconds=0)
+    await database.claim("key")
+    await asyncio.sleep(0.01)
+    assert await database.claim("key") is None
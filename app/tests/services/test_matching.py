@@ -0,0 +1,30 @@
+"""
+Tests for fuzzy todo matching
+"""
+
+from types import SimpleNamespace
+
+from app.utils.matching import best_match, rank_matches
+
+
+def todo(title: str, description: str | None = None):
+    return SimpleNamespace(title=title, description=description)
+
+
+def test_best_match_compares_title_and_description():
+    """Test that the closest title or description wins, case-insensitively"""
+    milk = todo("Buy milk")
+    report = todo("Work", "Write the QUARTERLY report")
+
+    assert best_match("buy MILK", [report, milk]) is milk
+    assert best_match("quarterly report", [milk, report]) is report
+    assert best_match("anything", []) is None
+
+
+def test_rank_matches_filters_and_orders():
+    """Test that matches below the threshold are dropped and the rest sorted by similarity"""
+    exact = todo("Buy groceries")
+    close = todo("Buy grocery bags")
+    unrelated = todo("Call the dentist")
+
+    assert rank_matches("buy groceries", [close, unrelated, exact], 0.6) == [exact, close]
@@ -0,0 +1,86 @@
+"""
+Tests for optimistic concurrency on todo writes
+"""
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.unit_of_work import UnitOfWork
+from app.domain.models import Todo
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+from app.utils.etag import todo_etag
+from app.utils.exceptions import TodoConflictError, TodoPreconditionFailedError
+
+
+async def concurrent_write(session: AsyncSession, todo_id: int, **values) -> None:
+    """Change a todo behind the session's back, as another request would"""
+    await session.execute(
+        update(Todo)
+        .where(Todo.id == todo_id)
+        .values(version=Todo.version + 1, **values)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+
+
+async def test_update_bumps_version(db_session: AsyncSession):
+    """Test that each update increments the version"""
+    service = TodoService(TodoRepository(db_session))
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+    assert todo.version == 1
+
+    todo = await service.update_by_id(todo.id, TodoUpdate(completed=True))
+    assert todo.version == 2
+
+
+async def test_conflict_is_retried_without_losing_updates(db_session: AsyncSession):
+    """Test that a write racing another one is re-applied on a fresh read"""
+    service = TodoService(TodoRepository(db_session))
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+    await concurrent_write(db_session, todo.id, title="Buy oat milk")
+
+    updated = await service.update_by_id(todo.id, TodoUpdate(completed=True))
+
+    assert updated.title == "Buy oat milk"
+    assert updated.completed is True
+    assert updated.version == 3
+
+
+async def test_conflict_inside_unit_of_work(db_session: AsyncSession):
+    """Test that retries also work on savepoints inside a unit of work"""
+    service = TodoService(TodoRepository(db_session))
+    todo = await service.create_todo(TodoCreate(title="Walk dog"))
+    await concurrent_write(db_session, todo.id, description="around the park")
+
+    async with UnitOfWork(db_session):
+        updated = await service.update_by_text("Walk dog", TodoUpdate(completed=True))
+
+    assert (updated.description, updated.completed) == ("around the park", True)
+
+
+async def test_if_match_fails_after_concurrent_write(db_session: AsyncSession):
+    """Test that an If-Match taken before a concurrent write no longer matches"""
+    service = TodoService(TodoRepository(db_session))
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+    etag = todo_etag(todo)
+    await concurrent_write(db_session, todo.id, title="Buy oat milk")
+
+    with pytest.raises(TodoPreconditionFailedError):
+        await service.update_by_id(todo.id, TodoUpdate(completed=True), if_match=etag)
+
+
+async def test_conflict_raised_when_retries_run_out(db_session: AsyncSession, monkeypatch):
+    """Test that a write that keeps losing the race surfaces a conflict"""
+    repo = TodoRepository(db_session)
+    service = TodoService(repo)
+    todo = await service.create_todo(TodoCreate(title="Hot todo"))
+
+    async def always_conflicts(*args, **kwargs):
+        raise TodoConflictError("Todo was changed by another request")
+
+    monkeypatch.setattr(repo, "update", always_conflicts)
+    with pytest.raises(TodoConflictError):
+        await service.update_by_id(todo.id, TodoUpdate(completed=True))
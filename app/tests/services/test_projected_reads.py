@@ -0,0 +1,63 @@
+"""
+Tests for the ORM-free projected read path
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.enums import TodoPriority
+from app.domain.models import Todo
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.domain.snapshots import TodoSummary
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+from app.tools.todo_tools import format_todo_line
+from app.utils.constants import DESCRIPTION_PREVIEW_CHARS
+
+
+async def test_summaries_skip_identity_map(db_session: AsyncSession):
+    """Test that listing rows are plain summaries, not session-tracked entities"""
+    service = TodoService(TodoRepository(db_session))
+    await service.create_todo(TodoCreate(title="Buy milk", priority=TodoPriority.HIGH))
+    await service.create_todo(TodoCreate(title="Walk dog"))
+    db_session.expunge_all()
+
+    summaries = await service.list_summaries()
+
+    assert {s.title for s in summaries} == {"Buy milk", "Walk dog"}
+    assert all(isinstance(s, TodoSummary) for s in summaries)
+    assert not any(isinstance(obj, Todo) for obj in db_session.identity_map.values())
+
+
+async def test_summaries_filters(db_session: AsyncSession):
+    """Test completion and priority filters on summaries"""
+    service = TodoService(TodoRepository(db_session))
+    done = await service.create_todo(TodoCreate(title="Done"))
+    await service.update_by_id(done.id, TodoUpdate(completed=True))
+    await service.create_todo(TodoCreate(title="Urgent", priority=TodoPriority.URGENT))
+
+    assert [s.title for s in await service.list_summaries(completed=True)] == ["Done"]
+    urgent = await service.list_summaries(priority=TodoPriority.URGENT)
+    assert [(s.title, s.priority) for s in urgent] == [("Urgent", TodoPriority.URGENT)]
+
+
+async def test_long_description_is_previewed(db_session: AsyncSession):
+    """Test that listings read a bounded description and mark it as cut"""
+    service = TodoService(TodoRepository(db_session))
+    await service.create_todo(TodoCreate(title="Essay", description="word " * 300))
+
+    [summary] = await service.list_summaries()
+
+    assert len(summary.description) == DESCRIPTION_PREVIEW_CHARS + 1
+    assert format_todo_line(summary).endswith("…")
+
+
+async def test_search_uses_full_description(db_session: AsyncSession):
+    """Test that search candidates carry the full description"""
+    service = TodoService(TodoRepository(db_session))
+    description = "groceries " + "x" * 500
+    await service.create_todo(TodoCreate(title="groceries", description=description))
+
+    [result] = await service.search_by_text("groceries")
+
+    assert isinstance(result, TodoSummary)
+    assert result.description == description
@@ -0,0 +1,113 @@
+"""
+Tests for embedding-based todo matching and the vector index
+"""
+
+import json
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.broadcast import InMemoryBroadcast
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.domain.models import Todo
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_index import INDEX_CHANNEL, TodoVectorIndex
+from app.services.todo_service import TodoService
+from app.utils.embedding import cosine, embed, embed_todo
+
+
+@pytest.fixture
+def broadcast():
+    return InMemoryBroadcast()
+
+
+@pytest.fixture
+def index(broadcast: InMemoryBroadcast):
+    """An index wired to commits like the one built by get_todo_index()"""
+    index = TodoVectorIndex(broadcast=broadcast)
+    add_commit_listener(index.apply_changes)
+    yield index
+    remove_commit_listener(index.apply_changes)
+
+
+def test_embeddings_match_word_forms_not_meaning():
+    """Test that inflections and typos score, unrelated and synonym-only texts do not"""
+    query = embed("dentists appointments")
+    assert cosine(query, embed_todo("Book appointment at the dentist", None)) > 0.6
+    assert cosine(embed("grocerys"), embed_todo("Buy groceries", None)) > 0.1
+    assert cosine(query, embed_todo("Buy milk", None)) == 0
+    # Lexical only: no shared words, no match
+    assert cosine(embed("the dentist thing"), embed_todo("See Dr. Lee", None)) == 0
+
+
+def test_index_top_k():
+    """Test that the index returns the k nearest todos by cosine, best first"""
+    index = TodoVectorIndex()
+    index.upsert(1, "Book dentist appointment", None)
+    index.upsert(2, "Dentist invoice", "pay before friday")
+    index.upsert(3, "Buy milk", None)
+    query = embed("dentist appointment")
+
+    [(first, score), (second, _)] = index.search(query, k=2)
+
+    assert (first, second) == (1, 2)
+    assert score == pytest.approx(cosine(query, embed_todo("Book dentist appointment", None)))
+    index.remove(1)
+    assert [todo_id for todo_id, _ in index.search(query, k=5)] == [2]
+
+
+async def test_find_falls_back_to_semantic_match(db_session: AsyncSession, index: TodoVectorIndex):
+    """Test that a lookup no todo contains is resolved through the index"""
+    repo = TodoRepository(db_session)
+    await TodoService(repo).create_many([
+        TodoCreate(title="Book appointment at the dentist"), TodoCreate(title="Buy milk"),
+    ])
+
+    assert await TodoService(repo).find_by_text("dentists appointment") is None
+    service = TodoService(repo, index=index)
+    todo = await service.find_by_text("dentists appointment")
+    assert todo.title == "Book appointment at the dentist"
+    assert await service.find_by_text("weekly report") is None
+    [summary] = await service.search_by_text("appointments with dentist")
+    assert summary.id == todo.id
+    assert await service.search_by_text("appointments with dentist", semantic=False) == []
+
+
+async def test_committed_writes_update_the_index(db_session: AsyncSession, index: TodoVectorIndex):
+    """Test that creates, renames and deletes reach the index once committed"""
+    service = TodoService(TodoRepository(db_session), index=index)
+    await service.create_todo(TodoCreate(title="Buy milk"))
+    await service.find_by_text("anything")  # builds the index
+
+    todo = await service.create_todo(TodoCreate(title="Renew passport"))
+    assert (await service.find_by_text("passports renewal")).id == todo.id
+
+    await service.update_by_id(todo.id, TodoUpdate(title="Water plants"))
+    assert await service.find_by_text("passports renewal") is None
+    assert (await service.find_by_text("plants watering")).id == todo.id
+
+    await service.delete_by_id(todo.id)
+    assert len(index) == 1
+
+
+async def test_remote_changes_are_reread(
+    db_session: AsyncSession, index: TodoVectorIndex, broadcast: InMemoryBroadcast
+):
+    """Test that ids changed by another worker are re-read before the next query"""
+    service = TodoService(TodoRepository(db_session), index=index)
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+    await service.find_by_text("anything")
+
+    # Another worker renames the todo and announces it
+    await db_session.execute(
+        update(Todo).where(Todo.id == todo.id).values(title="Water plants")
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+    db_session.expunge_all()
+    broadcast.publish(INDEX_CHANNEL, json.dumps({"origin": "other", "ids": [todo.id]}))
+
+    assert [todo_id for todo_id, _ in index.search(embed("plants watering"), 5)] == []
+    assert (await service.find_by_text("plants watering")).id == todo.id
@@ -0,0 +1,101 @@
+"""
+Tests for delta sync with updated_at cursors and tombstones
+"""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.responses import TODO_FIELDS
+from app.domain.models import Todo
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_event_repository import TodoEventRepository
+from app.repositories.todo_repository import TodoRepository
+from app.services.sync_service import SyncCursor, TodoSyncService, sync_columns
+from app.services.todo_service import TodoService
+from app.utils.datetime import utc_now
+from app.utils.exceptions import InvalidSyncCursorError, SyncCursorExpiredError
+
+COLUMNS = sync_columns(TODO_FIELDS)
+
+
+@pytest.fixture
+def sync_service(db_session: AsyncSession) -> TodoSyncService:
+    return TodoSyncService(
+        TodoRepository(db_session),
+        TodoEventRepository(db_session),
+        settle=timedelta(seconds=60),
+        retention=timedelta(hours=24),
+    )
+
+
+async def create_old_todos(session: AsyncSession, titles: list[str]) -> list[int]:
+    """Create todos whose last change is older than the settle window"""
+    service = TodoService(TodoRepository(session))
+    ids = []
+    for i, title in enumerate(titles):
+        todo = await service.create_todo(TodoCreate(title=title))
+        await session.execute(
+            update(Todo)
+            .where(Todo.id == todo.id)
+            .values(updated_at=utc_now() - timedelta(hours=1) + timedelta(minutes=i))
+        )
+        ids.append(todo.id)
+    await session.commit()
+    return ids
+
+
+async def test_first_sync_pages_through_all_todos(
+    db_session: AsyncSession, sync_service: TodoSyncService
+):
+    """Test that a first sync returns every todo, page by page"""
+    ids = await create_old_todos(db_session, ["A", "B", "C"])
+
+    seen, since = [], None
+    while True:
+        page = await sync_service.sync(since, COLUMNS, limit=2)
+        seen += [row.id for row in page.changed]
+        since = page.cursor.encode()
+        if not page.has_more:
+            break
+
+    assert seen == ids
+
+
+async def test_sync_returns_only_changes(db_session: AsyncSession, sync_service: TodoSyncService):
+    """Test that a later sync returns changed rows and tombstones, not the whole table"""
+    a, b, c = await create_old_todos(db_session, ["A", "B", "C"])
+    cursor = (await sync_service.sync(None, COLUMNS, limit=100)).cursor.encode()
+
+    service = TodoService(TodoRepository(db_session))
+    await service.update_by_id(a, TodoUpdate(completed=True))
+    await service.delete_by_id(b)
+
+    page = await sync_service.sync(cursor, COLUMNS, limit=100)
+    assert [(row.id, row.completed) for row in page.changed] == [(a, True)]
+    assert page.deleted == [b]
+    assert page.has_more is False
+
+
+async def test_bulk_change_requires_resync(db_session: AsyncSession, sync_service: TodoSyncService):
+    """Test that a bulk import since the cursor makes the client reload everything"""
+    cursor = (await sync_service.sync(None, COLUMNS, limit=100)).cursor.encode()
+
+    async def records():
+        yield 1, {"title": "Imported"}
+
+    await TodoService(TodoRepository(db_session)).import_records(records(), batch_size=10)
+
+    with pytest.raises(SyncCursorExpiredError):
+        await sync_service.sync(cursor, COLUMNS, limit=100)
+
+
+async def test_expired_and_invalid_cursors(sync_service: TodoSyncService):
+    """Test that cursors older than the event retention or malformed are rejected"""
+    old = utc_now() - timedelta(days=2)
+    with pytest.raises(SyncCursorExpiredError):
+        await sync_service.sync(SyncCursor(old, 0, old, 0).encode(), COLUMNS, limit=100)
+    with pytest.raises(InvalidSyncCursorError):
+        await sync_service.sync("not-a-cursor", COLUMNS, limit=100)
@@ -0,0 +1,104 @@
+"""
+Tests for the todo read-through cache
+"""
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.broadcast import InMemoryBroadcast
+from app.db.change_tracking import add_commit_listener, remove_commit_listener
+from app.db.unit_of_work import UnitOfWork
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.domain.snapshots import TodoSnapshot
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_cache import TodoReadCache, all_key
+from app.services.todo_service import TodoService
+
+
+@pytest.fixture
+def broadcast():
+    return InMemoryBroadcast()
+
+
+@pytest.fixture
+def cache(broadcast: InMemoryBroadcast):
+    """A cache wired to commits like the one built by get_todo_cache()"""
+    cache = TodoReadCache(ttl_seconds=60, max_rows=100, broadcast=broadcast)
+    add_commit_listener(cache.invalidate_changes)
+    yield cache
+    remove_commit_listener(cache.invalidate_changes)
+
+
+async def test_reads_are_served_from_cache(db_session: AsyncSession, cache: TodoReadCache):
+    """Test that repeated reads hit the cache and return snapshots"""
+    service = TodoService(TodoRepository(db_session), cache=cache)
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+
+    await service.get_by_id(todo.id)
+    cached = await service.get_by_id(todo.id)
+
+    assert isinstance(cached, TodoSnapshot)
+    assert cached.title == "Buy milk"
+    assert cache.hits == 1
+
+
+async def test_writes_invalidate_touched_keys(db_session: AsyncSession, cache: TodoReadCache):
+    """Test that a committed update refreshes lists and filtered views"""
+    service = TodoService(TodoRepository(db_session), cache=cache)
+    todo = await service.create_todo(TodoCreate(title="Buy milk"))
+
+    assert [t.id for t in await service.get_by_completed(False)] == [todo.id]
+    assert await service.get_by_completed(True) == []
+
+    await service.update_by_id(todo.id, TodoUpdate(completed=True))
+
+    assert await service.get_by_completed(False) == []
+    assert [t.id for t in await service.get_by_completed(True)] == [todo.id]
+    assert (await service.get_by_id(todo.id)).completed is True
+
+
+async def test_rolled_back_unit_of_work_leaves_cache_untouched(
+    db_session: AsyncSession, cache: TodoReadCache
+):
+    """Test that reads inside an uncommitted unit of work neither fill nor use the cache"""
+    service = TodoService(TodoRepository(db_session), cache=cache)
+    await service.list_todos()  # cached: no todos
+
+    with pytest.raises(RuntimeError):
+        async with UnitOfWork(db_session):
+            todo = await service.create_todo(TodoCreate(title="Rolled back"))
+            # Sees its own write rather than the cached empty listing
+            assert [t.title for t in await service.list_todos()] == ["Rolled back"]
+            assert (await service.get_by_id(todo.id)).title == "Rolled back"
+            raise RuntimeError("run failed")
+
+    # Only the listing cached before the unit of work
+    assert list(cache._entries) == [all_key()]
+    assert await service.list_todos() == []
+    assert await service.get_by_id(todo.id) is None
+
+
+async def test_invalidation_reaches_other_workers(
+    db_session: AsyncSession, cache: TodoReadCache, broadcast: InMemoryBroadcast
+):
+    """Test that another worker's cache is invalidated through the broadcast"""
+    other_worker = TodoReadCache(ttl_seconds=60, max_rows=100, broadcast=broadcast)
+    service = TodoService(TodoRepository(db_session), cache=cache)
+    other_service = TodoService(TodoRepository(db_session), cache=other_worker)
+
+    assert await other_service.list_todos() == []
+    await service.create_todo(TodoCreate(title="Buy milk"))
+
+    assert [t.title for t in await other_service.list_todos()] == ["Buy milk"]
+
+
+def test_size_bound_evicts_least_recently_used():
+    """Test that the row budget evicts the oldest entries first"""
+    cache = TodoReadCache(ttl_seconds=60, max_rows=2)
+    cache._put(("id", 1), "a", 1, cache._generation)
+    cache._put(("id", 2), "b", 1, cache._generation)
+    cache._get(("id", 1))
+    cache._put(("id", 3), "c", 1, cache._generation)
+
+    assert cache._get(("id", 2)) is None
+    assert cache._get(("id", 1)) == "a"
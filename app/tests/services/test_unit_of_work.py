@@ -0,0 +1,91 @@
+"""
+Tests for grouping TodoService writes into one transaction
+"""
+
+import pytest
+from sqlalchemy import event, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.unit_of_work import UnitOfWork
+from app.domain.models import Todo
+from app.domain.schemas import TodoCreate, TodoUpdate
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_service import AgentService
+from app.services.todo_service import TodoService
+from app.tests.conftest import test_engine
+
+
+async def count_todos(session: AsyncSession) -> int:
+    result = await session.execute(select(func.count()).select_from(Todo))
+    return result.scalar_one()
+
+
+@pytest.fixture
+def commits():
+    """The database COMMITs issued during the test (savepoint releases excluded)"""
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(test_engine.sync_engine, "commit", on_commit)
+    yield commits
+    event.remove(test_engine.sync_engine, "commit", on_commit)
+
+
+class WritingExecutor:
+    """Stands in for the agent executor: several tool calls that write"""
+
+    def __init__(self, service: TodoService):
+        self.service = service
+
+    async def ainvoke(self, inputs: dict, config: dict) -> dict:
+        await self.service.create_todo(TodoCreate(title="Buy milk"))
+        await self.service.create_todo(TodoCreate(title="Buy eggs"))
+        await self.service.update_by_text("Buy milk", TodoUpdate(completed=True))
+        return {"output": "Done", "intermediate_steps": []}
+
+
+async def test_unit_of_work_commits_once(db_session: AsyncSession, commits: list):
+    """Test that writes inside a unit of work are committed together"""
+    service = TodoService(TodoRepository(db_session))
+
+    async with UnitOfWork(db_session):
+        await service.create_todo(TodoCreate(title="Buy milk"))
+        await service.create_todo(TodoCreate(title="Buy eggs"))
+        await service.update_by_text("Buy milk", TodoUpdate(completed=True))
+        assert db_session.in_nested_transaction() is False
+        assert commits == []
+
+    assert len(commits) == 1
+    await db_session.rollback()
+    assert await count_todos(db_session) == 2
+    milk = await service.find_by_text("Buy milk")
+    assert milk.completed is True
+
+
+async def test_unit_of_work_rolls_back_on_failure(db_session: AsyncSession):
+    """Test that a failing run leaves no partial changes behind"""
+    service = TodoService(TodoRepository(db_session))
+    await service.create_todo(TodoCreate(title="Existing"))
+
+    with pytest.raises(RuntimeError):
+        async with UnitOfWork(db_session):
+            await service.create_todo(TodoCreate(title="Half done"))
+            await service.delete_by_text("Existing")
+            raise RuntimeError("agent failed")
+
+    assert await count_todos(db_session) == 1
+    assert await service.find_by_text("Existing") is not None
+    assert await service.find_by_text("Half done") is None
+
+
+async def test_agent_run_commits_once(db_session: AsyncSession, commits: list):
+    """Test that an agent run with a unit of work commits exactly once"""
+    service = TodoService(TodoRepository(db_session))
+    agent = AgentService(WritingExecutor(service), unit_of_work=UnitOfWork(db_session))
+
+    await agent.process_query("Buy milk and eggs, then tick off the milk")
+
+    assert len(commits) == 1
+    assert await count_todos(db_session) == 2
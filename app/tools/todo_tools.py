@@ -2,11 +2,15 @@
 LangChain tools for todo operations
 """
 
+from dataclasses import replace
 from langchain_core.tools import tool
+from app.db.unit_of_work import SessionPerCall
 from app.services.todo_service import TodoService
+from app.services.run_read_cache import RowState, RunReadCache
 from app.domain.schemas import TodoCreate, TodoUpdate
 from app.domain.enums import TodoPriority
 from app.tools.base import format_tool_response
+from app.utils.constants import DESCRIPTION_PREVIEW_CHARS
 
 
 # Constants
@@ -32,6 +36,13 @@ def validate_priority(priority: str) -> TodoPriority | None:
         return None
 
 
+def preview_description(description: str) -> str:
+    """Shorten a description to DESCRIPTION_PREVIEW_CHARS for list output"""
+    if len(description) <= DESCRIPTION_PREVIEW_CHARS:
+        return description
+    return description[:DESCRIPTION_PREVIEW_CHARS].rstrip() + "…"
+
+
 def format_todo_line(todo, show_status: bool = True, show_priority: bool = True) -> str:
     """Format a single todo line with consistent styling"""
     parts = []
@@ -45,7 +56,7 @@ def format_todo_line(todo, show_status: bool = True, show_priority: bool = True)
     parts.append(f"[{todo.id}] {todo.title}")
     
     if todo.description:
-        parts.append(f"- {todo.description}")
+        parts.append(f"- {preview_description(todo.description)}")
     
     return " ".join(parts)
 
@@ -73,16 +84,52 @@ def format_todo_list(todos: list, show_status: bool = True, page: int = 1) -> st
     return "\n".join(lines)
 
 
-def build_todo_tools(service: TodoService):
+def build_todo_tools(
+    service: TodoService,
+    reads: RunReadCache | None = None,
+    sessions: SessionPerCall | None = None,
+):
     """
     Build LangChain tools with access to TodoService
     
+    Reads go through a run-scoped cache shared by all the tools, and every
+    mutating tool drops the cached reads the changed row could appear in.
+    
     Args:
         service: TodoService instance for performing operations
+        reads: Read cache for the run (a private one is created if omitted)
+        sessions: Give each tool call its own session (bound to service.repo)
+            instead of using the service's session throughout
         
     Returns:
         List of LangChain tools
     """
+    if reads is None:
+        reads = RunReadCache(service)
+
+    async def set_completed(text: str, completed: bool):
+        """Set a matched todo's completion status, returning it (None if not found)"""
+        current_todo = await reads.find_by_text(text)
+        if not current_todo:
+            return None
+        with reads.changing(current_todo):
+            todo = await service.update_by_id(current_todo.id, TodoUpdate(completed=completed))
+        if todo:
+            reads.invalidate(RowState.of(todo))
+        return todo
+
+    async def find_duplicate(title: str, description: str | None = None, exclude: int | None = None):
+        """
+        A todo with the same title or, with the duplicate index enabled, one
+        nearly duplicating this title and description (None if there is none)
+        """
+        existing = await reads.find_by_text(title)
+        if existing and existing.id != exclude and existing.title.lower() == title.lower():
+            return existing
+        if service.duplicates is None:
+            return None
+        near = [todo for todo in await service.find_duplicates(title, description) if todo.id != exclude]
+        return near[0] if near else None
 
     @tool
     async def create_todo(title: str, description: str | None = None, priority: str = "medium") -> str:
@@ -94,8 +141,8 @@ def build_todo_tools(service: TodoService):
                 priority_enum = TodoPriority.MEDIUM
             
             # Check for duplicates
-            existing = await service.find_by_text(title)
-            if existing and existing.title.lower() == title.lower():
+            existing = await find_duplicate(title, description)
+            if existing:
                 return format_tool_response(
                     False,
                     f"Todo with similar title already exists: '{existing.title}' (ID: {existing.id})",
@@ -106,6 +153,7 @@ def build_todo_tools(service: TodoService):
             todo = await service.create_todo(
                 TodoCreate(title=title, description=description, priority=priority_enum)
             )
+            reads.invalidate(RowState.of(todo))
             return format_tool_response(
                 True,
                 f"Created todo: '{todo.title}' [Priority: {todo.priority.value}]",
@@ -118,7 +166,7 @@ def build_todo_tools(service: TodoService):
     async def list_todos(page: int = 1) -> str:
         """List all todo items with pagination (20 per page). Use page parameter to navigate: page=1, page=2, etc."""
         try:
-            todos = await service.list_todos()
+            todos = await reads.list_summaries()
             if not todos:
                 return format_tool_response(True, "No todos found")
             
@@ -130,7 +178,7 @@ def build_todo_tools(service: TodoService):
     async def get_completed_todos(completed: bool, page: int = 1) -> str:
         """Get todos filtered by completion status with pagination. Set completed=True for completed todos, False for incomplete."""
         try:
-            todos = await service.get_by_completed(completed)
+            todos = await reads.list_summaries(completed=completed)
             status_text = "completed" if completed else "incomplete"
             
             if not todos:
@@ -151,7 +199,7 @@ def build_todo_tools(service: TodoService):
         """Update a todo by matching its title or description. Provide the text to find the todo and fields to update. Priority can be: low, medium, high, urgent."""
         try:
             # Find the todo to update
-            current_todo = await service.find_by_text(text)
+            current_todo = await reads.find_by_text(text)
             if not current_todo:
                 return format_tool_response(False, f"Todo not found matching: '{text}'")
             
@@ -164,11 +212,13 @@ def build_todo_tools(service: TodoService):
             
             # Check for duplicate if title is being changed
             if title and title.lower() != current_todo.title.lower():
-                existing = await service.find_by_text(title)
-                if existing and existing.id != current_todo.id and existing.title.lower() == title.lower():
+                existing = await find_duplicate(
+                    title, description or current_todo.description, exclude=current_todo.id
+                )
+                if existing:
                     return format_tool_response(
                         False,
-                        f"Another todo with title '{existing.title}' already exists (ID: {existing.id})",
+                        f"Another todo with a similar title already exists: '{existing.title}' (ID: {existing.id})",
                         f"Current todo: '{current_todo.title}' (ID: {current_todo.id})\n"
                         f"Do you want to:\n"
                         f"1. Update existing '{existing.title}' instead?\n"
@@ -176,11 +226,17 @@ def build_todo_tools(service: TodoService):
                         f"3. Merge them by deleting one?"
                     )
             
-            # Proceed with update
-            todo = await service.update_by_text(
-                text,
-                TodoUpdate(title=title, description=description, completed=completed, priority=priority_enum)
-            )
+            # Proceed with update (on the todo already found, not a fresh match)
+            # Only the fields that were given, so the others are left as they are
+            changes = {"title": title, "description": description, "completed": completed, "priority": priority_enum}
+            with reads.changing(current_todo):
+                todo = await service.update_by_id(
+                    current_todo.id,
+                    TodoUpdate(**{field: value for field, value in changes.items() if value is not None})
+                )
+            if not todo:
+                return format_tool_response(False, f"Todo not found matching: '{text}'")
+            reads.invalidate(RowState.of(todo))
             
             return format_tool_response(
                 True,
@@ -194,7 +250,11 @@ def build_todo_tools(service: TodoService):
     async def delete_todo(text: str) -> str:
         """Delete a todo by matching its title or description."""
         try:
-            success = await service.delete_by_text(text)
+            todo = await reads.find_by_text(text)
+            success = False
+            if todo:
+                with reads.changing(todo):
+                    success = await service.delete_by_id(todo.id)
             
             if not success:
                 return format_tool_response(False, f"Todo not found matching: '{text}'")
@@ -207,10 +267,7 @@ def build_todo_tools(service: TodoService):
     async def mark_complete(text: str) -> str:
         """Mark a todo as completed by matching its title or description."""
         try:
-            todo = await service.update_by_text(
-                text,
-                TodoUpdate(completed=True)
-            )
+            todo = await set_completed(text, True)
             
             if not todo:
                 return format_tool_response(False, f"Todo not found matching: '{text}'")
@@ -223,10 +280,7 @@ def build_todo_tools(service: TodoService):
     async def mark_incomplete(text: str) -> str:
         """Mark a todo as incomplete by matching its title or description."""
         try:
-            todo = await service.update_by_text(
-                text,
-                TodoUpdate(completed=False)
-            )
+            todo = await set_completed(text, False)
             
             if not todo:
                 return format_tool_response(False, f"Todo not found matching: '{text}'")
@@ -235,6 +289,98 @@ def build_todo_tools(service: TodoService):
         except Exception as e:
             return format_tool_response(False, f"Failed to mark incomplete: {str(e)}")
 
+    async def resolve_ids(ids: list[int] | None, match: str | None) -> list[int]:
+        """Ids given explicitly plus those of every todo whose title or description contains match"""
+        todo_ids = list(ids or [])
+        if match:
+            contained = await reads.search_by_text(match, min_similarity=0.0, semantic=False)
+            todo_ids += [todo.id for todo in contained]
+        return list(dict.fromkeys(todo_ids))
+
+    @tool
+    async def create_todos(titles: list[str], priority: str = "medium") -> str:
+        """Create several todos in one call, one per title, all with the same priority (low, medium, high, urgent). Use this instead of calling create_todo repeatedly."""
+        try:
+            priority_enum = validate_priority(priority)
+            if not priority_enum:
+                priority_enum = TodoPriority.MEDIUM
+            
+            # Skip titles that already exist or are repeated in the list
+            existing = await service.existing_titles(titles)
+            duplicates = await service.duplicate_filter() if service.duplicates is not None else None
+            new_titles, skipped = [], []
+            for title in titles:
+                if title.lower() in existing or (duplicates is not None and not duplicates.accept(title)):
+                    skipped.append(title)
+                else:
+                    existing.add(title.lower())
+                    new_titles.append(title)
+            
+            todos = []
+            if new_titles:
+                with reads.changing():
+                    todos = await service.create_many(
+                        [TodoCreate(title=title, priority=priority_enum) for title in new_titles]
+                    )
+                reads.invalidate(*(RowState.of(todo) for todo in todos))
+            
+            lines = [f"Created {len(todos)} todo(s) [Priority: {priority_enum.value}]:"]
+            lines += [f"[{todo.id}] {todo.title}" for todo in todos]
+            if skipped:
+                lines.append(f"Skipped (already exist): {', '.join(skipped)}")
+            return format_tool_response(bool(todos), "\n".join(lines))
+        except Exception as e:
+            return format_tool_response(False, f"Failed to create todos: {str(e)}")
+
+    @tool
+    async def complete_todos(
+        ids: list[int] | None = None, match: str | None = None, completed: bool = True
+    ) -> str:
+        """Mark several todos complete (or incomplete with completed=False) in one call: by ids, and/or every todo whose title or description contains the match text. Use this instead of calling mark_complete repeatedly."""
+        try:
+            todo_ids = await resolve_ids(ids, match)
+            if not todo_ids:
+                return format_tool_response(False, "No todos to update", "Provide ids or a match text")
+            
+            with reads.changing():
+                changed = await service.set_completed_many(todo_ids, completed)
+            # Only the completion status changed, so the rows' previous state is known too
+            reads.invalidate(*(
+                RowState.of(state)
+                for todo in changed
+                for state in (todo, replace(todo, completed=not completed))
+            ))
+            
+            status_text = "complete" if completed else "incomplete"
+            lines = [f"Marked {len(changed)} todo(s) as {status_text}:"]
+            lines += [f"[{todo.id}] {todo.title}" for todo in changed]
+            unchanged = len(todo_ids) - len(changed)
+            if unchanged:
+                lines.append(f"{unchanged} todo(s) were already {status_text} or not found")
+            return format_tool_response(bool(changed), "\n".join(lines))
+        except Exception as e:
+            return format_tool_response(False, f"Failed to update todos: {str(e)}")
+
+    @tool
+    async def delete_todos(ids: list[int] | None = None, match: str | None = None) -> str:
+        """Delete several todos in one call: by ids, and/or every todo whose title or description contains the match text. Use this instead of calling delete_todo repeatedly."""
+        try:
+            todo_ids = await resolve_ids(ids, match)
+            if not todo_ids:
+                return format_tool_response(False, "No todos to delete", "Provide ids or a match text")
+            
+            with reads.changing():
+                deleted = await service.delete_many(todo_ids)
+            reads.invalidate(*(RowState.of(todo) for todo in deleted))
+            
+            if not deleted:
+                return format_tool_response(False, "None of the todos were found")
+            lines = [f"Deleted {len(deleted)} todo(s):"]
+            lines += [f"[{todo.id}] {todo.title}" for todo in deleted]
+            return format_tool_response(True, "\n".join(lines))
+        except Exception as e:
+            return format_tool_response(False, f"Failed to delete todos: {str(e)}")
+
     @tool
     async def get_todos_by_priority(priority: str, page: int = 1) -> str:
         """Get todos filtered by priority level (low, medium, high, urgent) with pagination."""
@@ -244,7 +390,7 @@ def build_todo_tools(service: TodoService):
             if not priority_enum:
                 return format_tool_response(False, f"Invalid priority '{priority}'. Use: low, medium, high, urgent")
             
-            todos = await service.get_by_priority(priority_enum)
+            todos = await reads.list_summaries(priority=priority_enum)
             
             if not todos:
                 return format_tool_response(True, f"No {priority} priority todos found")
@@ -258,7 +404,7 @@ def build_todo_tools(service: TodoService):
         """Search for ALL todos matching the text in title or description. Returns all matching results."""
         try:
             # Use search_by_text to find ALL matches
-            todos = await service.search_by_text(search_text)
+            todos = await reads.search_by_text(search_text)
             
             if not todos:
                 return format_tool_response(False, f"No todos found matching '{search_text}'")
@@ -292,7 +438,7 @@ def build_todo_tools(service: TodoService):
         except Exception as e:
             return format_tool_response(False, f"Failed to search todo: {str(e)}")
 
-    return [
+    tools = [
         create_todo,
         list_todos,
         get_completed_todos,
@@ -302,5 +448,11 @@ def build_todo_tools(service: TodoService):
         delete_todo,
         mark_complete,
         mark_incomplete,
+        create_todos,
+        complete_todos,
+        delete_todos,
     ]
-
+    if sessions is not None:
+        for todo_tool in tools:
+            todo_tool.coroutine = sessions.wrap(todo_tool.coroutine)
+    return tools
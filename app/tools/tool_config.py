@@ -46,6 +46,25 @@ TOOL_DESCRIPTIONS = {
     Use this when the user wants to reopen or uncomplete a todo.
     Required: text (identifier to find the todo)
     """,
+    
+    "create_todos": """
+    Create several todo items in one call.
+    Use this when the user lists more than one thing to add.
+    Required: titles (one per todo)
+    Optional: priority (applies to all of them)
+    """,
+    
+    "complete_todos": """
+    Mark several todos as completed (or incomplete) in one call.
+    Use this when the user wants to finish or reopen more than one todo.
+    Optional: ids, match (text contained in the todos), completed
+    """,
+    
+    "delete_todos": """
+    Delete several todo items in one call.
+    Use this when the user wants to remove more than one todo.
+    Optional: ids, match (text contained in the todos)
+    """,
 }
 
 # Safety rules
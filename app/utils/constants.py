@@ -3,7 +3,41 @@
 MAX_TODO_TITLE_LENGTH = 255
 MAX_TODO_DESCRIPTION_LENGTH = 2000
 
+# Attempts at a todo write that loses an optimistic concurrency race
+WRITE_CONFLICT_ATTEMPTS = 3
+
 # Agent configuration
 AGENT_MAX_ITERATIONS = 10
 AGENT_TIMEOUT_SECONDS = 30
 
+
+# Bulk export/import
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+
+# Response compression
+COMPRESSION_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Listings read at most this many description characters per todo
+DESCRIPTION_PREVIEW_CHARS = 200
+
+# Delta sync page sizes
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 1000
+
+# Semantic matching: hashed feature buckets per embedding, candidates taken
+# from the index per lookup, the blend with the fuzzy ratio and the combined
+# score a match needs
+EMBEDDING_DIMENSIONS = 2 ** 20
+SEMANTIC_TOP_K = 10
+SEMANTIC_WEIGHT = 0.7
+SEMANTIC_MIN_SCORE = 0.3
+
+# Near-duplicate detection: MinHash signature positions, LSH bands (of
+# MINHASH_BINS / MINHASH_BANDS positions each) and the estimated similarity
+# from which two todos count as near-duplicates
+MINHASH_BINS = 64
+MINHASH_BANDS = 16
+DUPLICATE_MIN_SIMILARITY = 0.75
@@ -0,0 +1,105 @@
+"""
+Local text embeddings for todo matching
+
+A hashing vectorizer: the words of a text (lightly stemmed, stop words
+dropped) and the character trigrams of its longer words are hashed into
+EMBEDDING_DIMENSIONS buckets, words to even and trigrams to odd ones, so a
+bucket's weight follows from the bucket alone. For a todo that text is the
+title; the start of the description adds its words only, which keeps the
+vectors (and the index holding them) small. Features are binary and the
+vector is L2-normalised, so the dot product of two vectors is their cosine
+similarity. Nothing is trained or downloaded and the same text always gives
+the same vector, in every process.
+
+This is still lexical: it matches shared words and word fragments
+("dentist" / "dentists", "appointment" / "appointments", typos), not
+meaning. "the dentist thing" only finds "Book appointment with Dr. Lee" if
+the todo mentions the dentist somewhere.
+"""
+
+import math
+import re
+import zlib
+from app.utils.constants import DESCRIPTION_PREVIEW_CHARS, EMBEDDING_DIMENSIONS
+
+# Sparse vector: bucket -> weight
+Vector = dict[int, float]
+
+WORD_PATTERN = re.compile(r"\w+")
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "for", "from", "i",
+    "in", "is", "it", "my", "of", "on", "or", "the", "thing", "this", "that",
+    "to", "todo", "with",
+})
+
+SUFFIXES = ("ing", "ies", "es", "ed", "s")
+
+# Trigrams say less than whole words; they bridge inflections and typos in
+# words long enough to have them
+TRIGRAM_WEIGHT = 0.3
+TRIGRAM_MIN_WORD_LENGTH = 5
+
+
+def stem(word: str) -> str:
+    """Strip one common English suffix ("appointments" -> "appointment")"""
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _hash(feature: str) -> int:
+    return zlib.crc32(feature.encode()) % (EMBEDDING_DIMENSIONS // 2)
+
+
+def feature_buckets(text: str, details: str | None = None) -> set[int]:
+    """
+    Buckets of text's features, stemmed words (even) and their trigrams
+    (odd), plus the words alone of details
+    """
+    buckets = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        buckets.add(_hash(stem(word)) * 2)
+        if len(word) >= TRIGRAM_MIN_WORD_LENGTH:
+            padded = f"<{word}>"
+            buckets.update(_hash(padded[i:i + 3]) * 2 + 1 for i in range(len(padded) - 2))
+    for word in WORD_PATTERN.findall((details or "").lower()):
+        if word not in STOP_WORDS:
+            buckets.add(_hash(stem(word)) * 2)
+    return buckets
+
+
+def bucket_weight(bucket: int) -> float:
+    return TRIGRAM_WEIGHT if bucket & 1 else 1.0
+
+
+def norm(buckets: set[int]) -> float:
+    return math.sqrt(sum(bucket_weight(bucket) ** 2 for bucket in buckets))
+
+
+def embed(text: str, details: str | None = None) -> Vector:
+    """Normalised hashed vector of text (empty for text without any features)"""
+    buckets = feature_buckets(text, details)
+    if not buckets:
+        return {}
+    length = norm(buckets)
+    return {bucket: bucket_weight(bucket) / length for bucket in buckets}
+
+
+def embed_todo(title: str, description: str | None) -> Vector:
+    return embed(title, description_details(description))
+
+
+def description_details(description: str | None) -> str | None:
+    """The part of a description that is embedded (its words only, no trigrams)"""
+    return description[:DESCRIPTION_PREVIEW_CHARS] if description else None
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    """Cosine similarity of two normalised vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(bucket, 0.0) for bucket, weight in a.items())
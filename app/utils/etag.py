@@ -0,0 +1,45 @@
+"""
+Entity tags for conditional HTTP requests
+"""
+
+import hashlib
+from datetime import datetime
+
+
+def _tag(*parts) -> str:
+    digest = hashlib.blake2b(":".join(str(p) for p in parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def todo_etag(todo) -> str:
+    """Strong ETag for a single todo, derived from its id and version"""
+    return _tag("todo", todo.id, todo.version)
+
+
+def list_etag(scope: str, count: int, max_updated_at: datetime | None) -> str:
+    """
+    Strong ETag for a todo listing, derived from the row count and newest
+    updated_at of the rows it covers (scope distinguishes filtered views)
+    """
+    watermark = max_updated_at.isoformat() if max_updated_at else ""
+    return _tag("list", scope, count, watermark)
+
+
+def etag_matches(header: str | None, etag: str, weak: bool = False) -> bool:
+    """
+    Check an If-Match / If-None-Match header against an ETag
+
+    If-Match uses strong comparison; If-None-Match uses weak comparison,
+    so W/ prefixed tags from clients also match there.
+    """
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -12,3 +12,46 @@ class AgentExecutionError(Exception):
     """Raised when agent execution fails"""
     pass
 
+
+
+class TodoConflictError(Exception):
+    """Raised when a todo was changed by a concurrent write since it was read"""
+    pass
+
+
+class TodoPreconditionFailedError(Exception):
+    """Raised when a conditional write's If-Match does not match the current todo"""
+    pass
+
+
+class InvalidSyncCursorError(Exception):
+    """Raised when a delta sync cursor cannot be decoded"""
+    pass
+
+
+class SyncCursorExpiredError(Exception):
+    """Raised when a delta sync cursor is too old to sync from and a full resync is needed"""
+    pass
+
+
+class SchemaMismatchError(Exception):
+    """Raised at startup when the database schema does not match the models"""
+    pass
+
+
+class DuplicateDetectionDisabledError(Exception):
+    """Raised when near-duplicate lookups are asked for without DUPLICATE_DETECTION_ENABLED"""
+    pass
+
+
+class AgentJobLeaseLostError(Exception):
+    """Raised when a job run finishes after another worker took its job over"""
+    pass
+
+
+class AdmissionRejectedError(Exception):
+    """Raised when a run can get neither a slot nor a queue place in time"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
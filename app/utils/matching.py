@@ -0,0 +1,59 @@
+"""
+Fuzzy matching of todos against free text
+
+Pure functions behind TodoService.find_by_text and search_by_text, kept
+separate from the database reads so they can be measured on their own
+(benchmarks/bench_matching.py).
+"""
+
+from difflib import SequenceMatcher
+from typing import Iterable, TypeVar
+from app.utils.constants import SEMANTIC_WEIGHT
+from app.utils.embedding import cosine, embed, embed_todo
+
+T = TypeVar("T")
+
+
+def similarity(query: str, todo) -> float:
+    """
+    Best SequenceMatcher ratio of a lowercased query against the todo's
+    title and description
+    """
+    return max(
+        SequenceMatcher(None, query, todo.title.lower()).ratio(),
+        SequenceMatcher(None, query, (todo.description or '').lower()).ratio(),
+    )
+
+
+def best_match(text: str, candidates: Iterable[T]) -> T | None:
+    """The candidate most similar to text (the first one on ties)"""
+    query = text.lower()
+    return max(candidates, key=lambda todo: similarity(query, todo), default=None)
+
+
+def rank_matches(text: str, candidates: Iterable[T], min_similarity: float) -> list[T]:
+    """Candidates at least min_similarity similar to text, most similar first"""
+    query = text.lower()
+    scored = [(todo, similarity(query, todo)) for todo in candidates]
+    scored = [(todo, ratio) for todo, ratio in scored if ratio >= min_similarity]
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return [todo for todo, _ in scored]
+
+
+def combined_score(query: str, query_vector: dict, todo) -> float:
+    """
+    Fuzzy ratio blended with the embedding cosine; a strong fuzzy match is
+    never scored lower than its ratio alone
+    """
+    fuzzy = similarity(query, todo)
+    semantic = cosine(query_vector, embed_todo(todo.title, todo.description))
+    return max(fuzzy, SEMANTIC_WEIGHT * semantic + (1 - SEMANTIC_WEIGHT) * fuzzy)
+
+
+def rank_semantic(text: str, candidates: Iterable[T], min_score: float) -> list[T]:
+    """Candidates with a combined score of at least min_score, best first"""
+    query, query_vector = text.lower(), embed(text)
+    scored = [(todo, combined_score(query, query_vector, todo)) for todo in candidates]
+    scored = [(todo, score) for todo, score in scored if score >= min_score]
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return [todo for todo, _ in scored]
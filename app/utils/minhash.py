@@ -0,0 +1,100 @@
+"""
+MinHash signatures for near-duplicate todo detection
+
+A todo's title (lowercased, punctuation dropped) is cut into overlapping
+character shingles, to which the words of the start of its description are
+added. Two todos' similarity is the Jaccard similarity of these sets, which a
+MinHash signature estimates: the fraction of positions at which two
+signatures agree.
+
+Signatures use one-permutation hashing: each shingle is hashed once into one
+of MINHASH_BINS bins and every bin keeps its smallest hash. Bins no shingle
+fell into borrow the value of a non-empty bin picked by a fixed probe order
+(densification), so every position stays comparable. That costs one hash per
+shingle instead of one per shingle and position, and the hashes are
+deterministic, so the same text gives the same signature in every process.
+
+For locality sensitive hashing the signature is cut into MINHASH_BANDS bands;
+todos agreeing on all positions of at least one band share that band's bucket
+and become candidates, which are then checked against the full signatures.
+"""
+
+import hashlib
+import operator
+import random
+import re
+from array import array
+from functools import lru_cache
+from app.utils.constants import DESCRIPTION_PREVIEW_CHARS, MINHASH_BANDS, MINHASH_BINS
+
+Signature = array
+
+WORD_PATTERN = re.compile(r"\w+")
+
+SHINGLE_SIZE = 3
+
+_EMPTY = 0xFFFFFFFF
+
+# For each bin, the order in which an empty bin looks for a value to borrow
+_rng = random.Random(4049)
+_PROBES = [_rng.sample(range(MINHASH_BINS), MINHASH_BINS) for _ in range(MINHASH_BINS)]
+
+_ROWS = MINHASH_BINS // MINHASH_BANDS
+
+
+def normalize(text: str) -> str:
+    """Lowercase words separated by single spaces ("Buy milk!" -> "buy milk")"""
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def shingles(title: str, description: str | None = None) -> set[str]:
+    """
+    Character shingles of a todo's normalised title, plus the words of its
+    description preview (marked so they never equal a title shingle)
+    """
+    features = set()
+    text = normalize(title)
+    if text:
+        padded = f"<{text}>"
+        features.update(padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1))
+    if description:
+        words = WORD_PATTERN.findall(description[:DESCRIPTION_PREVIEW_CHARS].lower())
+        features.update(f"#{word}" for word in words)
+    return features
+
+
+@lru_cache(maxsize=65536)
+def _shingle_hash(shingle: str) -> tuple[int, int]:
+    """The bin a shingle falls into and its hash value there"""
+    digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % MINHASH_BINS, (value // MINHASH_BINS) % _EMPTY
+
+
+def signature(title: str, description: str | None = None) -> Signature | None:
+    """MinHash signature of a todo's text (None for text without any shingles)"""
+    features = shingles(title, description)
+    if not features:
+        return None
+    bins = [_EMPTY] * MINHASH_BINS
+    for position, value in map(_shingle_hash, features):
+        if value < bins[position]:
+            bins[position] = value
+    filled = bins[:]
+    for position, value in enumerate(bins):
+        if value == _EMPTY:
+            for other in _PROBES[position]:
+                if bins[other] != _EMPTY:
+                    filled[position] = bins[other]
+                    break
+    return array("I", filled)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(map(operator.eq, a, b)) / MINHASH_BINS
+
+
+def band_keys(sig: Signature) -> list[int]:
+    """The LSH bucket key of each band of a signature (valid within this process)"""
+    return [hash(sig[i:i + _ROWS].tobytes()) for i in range(0, MINHASH_BINS, _ROWS)]
@@ -0,0 +1,165 @@
+"""
+NDJSON / CSV encoding and parsing for bulk todo export and import
+"""
+
+import codecs
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable
+from app.domain.enums import TodoPriority
+from app.utils.constants import MAX_TODO_DESCRIPTION_LENGTH, MAX_TODO_TITLE_LENGTH
+from app.utils.datetime import utc_now
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Column order of exported rows and CSV headers
+EXPORT_COLUMNS = ["id", "title", "description", "completed", "priority", "created_at", "updated_at"]
+
+
+def _plain(value):
+    """Convert a column value into its JSON/CSV representation"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, TodoPriority):
+        return value.value
+    return value
+
+
+def encode_ndjson(rows: Iterable) -> str:
+    """Encode rows (ordered as EXPORT_COLUMNS) as newline-delimited JSON"""
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain, row))), ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+
+def encode_csv(rows: Iterable, header: bool = False) -> str:
+    """Encode rows (ordered as EXPORT_COLUMNS) as CSV, optionally with a header line"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of UTF-8 byte chunks into lines (without line endings)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict]]:
+    """Yield (line number, object) for each non-empty NDJSON line"""
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_no}: invalid JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError(f"line {line_no}: expected a JSON object")
+        yield line_no, record
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict]]:
+    """Yield (line number, row dict) for each CSV record; the first line is the header"""
+    header: list[str] | None = None
+    pending: list[str] = []
+    line_no = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        pending.append(line)
+        # A quoted field may span lines; the record is complete once quotes balance
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+        values = next(csv.reader([part + "\n" for part in pending]), [])
+        pending = []
+        if not any(values):
+            continue
+        if header is None:
+            header = values
+            continue
+        yield line_no, dict(zip(header, values))
+    if pending:
+        raise ValueError(f"line {line_no}: unterminated quoted field")
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    if value in (None, ""):
+        return False
+    text = str(value).strip().lower()
+    if text in ("true", "1", "yes", "t"):
+        return True
+    if text in ("false", "0", "no", "f"):
+        return False
+    raise ValueError(f"invalid boolean '{value}'")
+
+
+def _parse_datetime(value) -> datetime | None:
+    if value in (None, ""):
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"invalid timestamp '{value}'")
+    # Naive timestamps (e.g. from SQLite exports) are taken as UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def normalize_import_row(record: dict, keep_ids: bool = False) -> dict:
+    """
+    Validate one imported record and convert it into column values
+
+    Raises ValueError with a short reason when the record is invalid.
+    Missing timestamps are filled with the current time so every row of a
+    batch has the same columns.
+    """
+    title = record.get("title")
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("title is required")
+    if len(title) > MAX_TODO_TITLE_LENGTH:
+        raise ValueError(f"title is longer than {MAX_TODO_TITLE_LENGTH} characters")
+
+    description = record.get("description") or None
+    if description is not None and len(str(description)) > MAX_TODO_DESCRIPTION_LENGTH:
+        raise ValueError(f"description is longer than {MAX_TODO_DESCRIPTION_LENGTH} characters")
+
+    try:
+        priority = TodoPriority(str(record.get("priority") or TodoPriority.MEDIUM.value).lower())
+    except ValueError:
+        raise ValueError(f"invalid priority '{record.get('priority')}'")
+
+    now = utc_now()
+    row = {
+        "title": title,
+        "description": str(description) if description is not None else None,
+        "completed": _parse_bool(record.get("completed")),
+        "priority": priority,
+        "created_at": _parse_datetime(record.get("created_at")) or now,
+        "updated_at": _parse_datetime(record.get("updated_at")) or now,
+    }
+    if keep_ids:
+        try:
+            row["id"] = int(record["id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("a numeric id is required when keeping ids")
+    return row
@@ -0,0 +1,6 @@
+"""
+Benchmarks for the todo API
+
+Run from the repository root, e.g.:
+    python -m benchmarks.bench_export_import --rows 100000
+"""
@@ -0,0 +1,98 @@
+"""
+LLM round trips for multi-item agent commands, with and without batch tools
+
+Runs each command through the real agent (an OpenRouter key is needed, read
+from the environment / .env like the application does) against a fresh
+temporary SQLite database, once with the per-item tools only ("before") and
+once with the batch tools as well ("after"). Reports the mean LLM calls,
+tool calls, tokens and wall time per command over --repeat runs.
+
+    python -m benchmarks.bench_agent_batch --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.agents.executor import build_agent_executor
+from app.db.base import Base
+from app.db.unit_of_work import UnitOfWork
+from app.domain.schemas import TodoCreate
+from app.repositories.todo_repository import TodoRepository
+from app.services.agent_service import AgentService
+from app.services.run_read_cache import RunReadCache
+from app.services.todo_service import TodoService
+from app.tools.todo_tools import build_todo_tools
+
+BATCH_TOOLS = {"create_todos", "complete_todos", "delete_todos"}
+
+# (name, query, titles of the todos that exist beforehand)
+COMMANDS = [
+    ("add 5 items", "Add milk, eggs, bread, butter and coffee to my todos", []),
+    (
+        "complete by match",
+        "Mark all grocery todos as done",
+        ["Grocery: milk", "Grocery: eggs", "Grocery: bread", "Grocery: apples", "Pay rent"],
+    ),
+    (
+        "delete by match",
+        "Delete every todo about the old project",
+        ["Old project: notes", "Old project: slides", "Old project: budget", "Call mom"],
+    ),
+]
+
+
+async def run_command(query: str, existing: list[str], batch: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            service = TodoService(TodoRepository(session))
+            if existing:
+                await service.create_many([TodoCreate(title=title) for title in existing])
+            reads = RunReadCache(service)
+            tools = [
+                t for t in build_todo_tools(service, reads) if batch or t.name not in BATCH_TOOLS
+            ]
+            agent = AgentService(
+                build_agent_executor(tools), unit_of_work=UnitOfWork(session), read_cache=reads
+            )
+            start = time.perf_counter()
+            result = await agent.process_query(query)
+            seconds = time.perf_counter() - start
+        await engine.dispose()
+    usage = result["usage"]
+    return {
+        "llm_calls": usage.llm_calls,
+        "tool_calls": len(result["actions_taken"]),
+        "tokens": usage.total_tokens,
+        "seconds": seconds,
+    }
+
+
+async def run(repeat: int) -> None:
+    print(f"{'command':<20} {'tools':<8} {'LLM calls':>9} {'tool calls':>10} {'tokens':>8} {'seconds':>8}")
+    for name, query, existing in COMMANDS:
+        for label, batch in (("before", False), ("after", True)):
+            runs = [await run_command(query, existing, batch) for _ in range(repeat)]
+            mean = {key: statistics.mean(r[key] for r in runs) for key in runs[0]}
+            print(
+                f"{name:<20} {label:<8} {mean['llm_calls']:>9.1f} {mean['tool_calls']:>10.1f} "
+                f"{mean['tokens']:>8.0f} {mean['seconds']:>8.1f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per command and tool set")
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat))
+
+
+if __name__ == "__main__":
+    main()
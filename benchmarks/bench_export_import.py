@@ -0,0 +1,119 @@
+"""
+Export/import throughput and memory benchmark
+
+Imports --rows synthetic todos through TodoService.import_records, then
+streams them back out through TodoService.export_batches, reporting rows/sec
+and the peak RSS of each phase. Each phase runs in its own process so the
+peak RSS of one does not hide the other.
+
+    python -m benchmarks.bench_export_import --rows 100000
+    python -m benchmarks.bench_export_import --database-url postgresql+asyncpg://...
+
+The target database must be empty (the schema is created if missing).
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.domain.models import Todo  # noqa - Import to register models
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+from app.utils.constants import EXPORT_BATCH_SIZE, IMPORT_BATCH_SIZE
+from app.utils.todo_io import encode_csv, encode_ndjson, iter_ndjson_records
+from benchmarks.datagen import make_records
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def ndjson_chunks(rows: int):
+    """Encode the synthetic records in chunks, like an uploaded request body"""
+    step = IMPORT_BATCH_SIZE
+    for offset in range(0, rows, step):
+        records = make_records(min(step, rows - offset), seed=offset)
+        yield "".join(json.dumps(r) + "\n" for r in records).encode()
+
+
+async def run_phase(database_url: str, phase: str, rows: int, fmt: str) -> dict:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with session_factory() as session:
+            service = TodoService(TodoRepository(session))
+            start = time.perf_counter()
+            if phase == "import":
+                count = await service.import_records(
+                    iter_ndjson_records(ndjson_chunks(rows)), batch_size=IMPORT_BATCH_SIZE
+                )
+                size = 0
+            else:
+                count = size = 0
+                encode = encode_csv if fmt == "csv" else encode_ndjson
+                async for batch in service.export_batches(EXPORT_BATCH_SIZE):
+                    size += len(encode(batch).encode())
+                    count += len(batch)
+            seconds = time.perf_counter() - start
+    finally:
+        await engine.dispose()
+
+    return {
+        "phase": phase,
+        "rows": count,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(count / seconds) if seconds else 0,
+        "megabytes": round(size / 1024 / 1024, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+async def create_schema(database_url: str) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--phase", choices=["import", "export"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.phase:
+        result = asyncio.run(run_phase(args.database_url, args.phase, args.rows, args.format))
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(create_schema(database_url))
+        for phase in ("import", "export"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_export_import",
+                 "--phase", phase, "--rows", str(args.rows),
+                 "--format", args.format, "--database-url", database_url],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{phase:<7} {result['rows']:>8} rows  {result['seconds']:>7.2f}s  "
+                f"{result['rows_per_second']:>8} rows/s  peak RSS {result['peak_rss_mb']} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
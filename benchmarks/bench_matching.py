@@ -0,0 +1,146 @@
+"""
+Micro-benchmarks of todo matching and tool formatting
+
+Times the functions behind find_by_text / search_by_text (best_match and
+rank_matches, two SequenceMatcher ratios per candidate) across candidate
+counts and description lengths, and format_todo_line / format_todo_list,
+which format the output of almost every agent tool call. The duplicate cases
+compare a near-duplicate check through the MinHash/LSH index with a pairwise
+SequenceMatcher scan of the same titles, and time clustering. No database is
+involved: candidates are in-memory TodoSnapshots built from datagen.
+
+    python -m benchmarks.bench_matching
+    python -m benchmarks.bench_matching --save benchmarks/results/matching-baseline.json
+    python -m benchmarks.bench_matching --check benchmarks/results/matching-baseline.json
+
+--check exits with status 1 when any case is more than --tolerance slower
+than in the saved baseline. Baselines are machine specific, so save one on
+the machine that runs the check (before the change being judged).
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from difflib import SequenceMatcher
+from typing import Callable
+
+from app.domain.enums import TodoPriority
+from app.domain.snapshots import TodoSnapshot
+from app.services.duplicate_index import DuplicateIndex
+from app.tools.todo_tools import format_todo_line, format_todo_list
+from app.utils.matching import best_match, rank_matches
+from app.utils.minhash import signature
+from benchmarks.datagen import SENTENCES, make_records
+
+CANDIDATE_COUNTS = (10, 100, 1000)
+DESCRIPTION_LENGTHS = (0, 200, 2000)
+LIST_SIZES = (10, 1000, 100_000)
+QUERY = "buy groceries"
+DUPLICATE_COUNTS = (1000, 10_000)
+
+
+def make_todos(count: int, description_length: int) -> list[TodoSnapshot]:
+    """count snapshots whose descriptions are description_length characters long"""
+    filler = " ".join(SENTENCES)
+    filler = (filler * (description_length // len(filler) + 1))[:description_length]
+    now = datetime.now(timezone.utc)
+    return [
+        TodoSnapshot(
+            id=i,
+            title=record["title"],
+            description=filler or None,
+            completed=record["completed"],
+            priority=TodoPriority(record["priority"]),
+            created_at=now,
+            updated_at=now,
+            version=1,
+        )
+        for i, record in enumerate(make_records(count, seed=count), start=1)
+    ]
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    benchmarks = {}
+    for length in DESCRIPTION_LENGTHS:
+        for count in CANDIDATE_COUNTS:
+            todos = make_todos(count, length)
+            benchmarks[f"best_match n={count} desc={length}"] = (
+                lambda todos=todos: best_match(QUERY, todos)
+            )
+            benchmarks[f"rank_matches n={count} desc={length}"] = (
+                lambda todos=todos: rank_matches(QUERY, todos, 0.6)
+            )
+        todo = make_todos(1, length)[0]
+        benchmarks[f"format_todo_line desc={length}"] = lambda todo=todo: format_todo_line(todo)
+    for size in LIST_SIZES:
+        todos = make_todos(size, 200)
+        benchmarks[f"format_todo_list n={size}"] = lambda todos=todos: format_todo_list(todos)
+    for count in DUPLICATE_COUNTS:
+        todos = make_todos(count, 0)
+        index = DuplicateIndex()
+        for todo in todos:
+            index.upsert(todo.id, todo.title, None)
+        title = todos[len(todos) // 2].title.upper() + "!"
+        benchmarks[f"duplicate_check n={count}"] = (
+            lambda index=index, title=title: index.similar(signature(title))
+        )
+        benchmarks[f"duplicate_check_pairwise n={count}"] = (
+            lambda todos=todos, title=title: [
+                todo for todo in todos
+                if SequenceMatcher(None, title.lower(), todo.title.lower()).ratio() >= 0.9
+            ]
+        )
+        if count == DUPLICATE_COUNTS[0]:
+            benchmarks[f"duplicate_clusters n={count}"] = lambda index=index: index.clusters()
+    return benchmarks
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Best time of one call in microseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case (best is used)")
+    parser.add_argument("--filter", help="Only run cases whose name contains this")
+    parser.add_argument("--save", type=Path, help="Save the timings as a baseline")
+    parser.add_argument("--check", type=Path, help="Fail on regressions against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown (0.3 = 30%%)")
+    args = parser.parse_args()
+
+    baseline = json.loads(args.check.read_text())["cases"] if args.check else {}
+    timings, regressions = {}, []
+    print(f"{'case':<36} {'µs/call':>12} {'baseline':>12}")
+    for name, func in cases().items():
+        if args.filter and args.filter not in name:
+            continue
+        timings[name] = round(measure(func, args.repeat), 3)
+        line = f"{name:<36} {timings[name]:>12.2f}"
+        if name in baseline:
+            change = timings[name] / baseline[name] - 1
+            line += f" {baseline[name]:>12.2f} {change:>+7.1%}"
+            if change > args.tolerance:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "cases": timings,
+        }, indent=2))
+        print(f"\nSaved {args.save}")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
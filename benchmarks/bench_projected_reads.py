@@ -0,0 +1,92 @@
+"""
+Projected (ORM-free) reads vs full entity reads
+
+Seeds --rows todos into a temporary SQLite database, then loads them through
+each read path in a fresh session, reporting latency and the memory the
+result holds (tracemalloc, measured in a separate run from the timing).
+
+    python -m benchmarks.bench_projected_reads --rows 100000
+"""
+
+import argparse
+import asyncio
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.api.responses import TODO_FIELDS
+from app.db.base import Base
+from app.domain.models import Todo
+from app.repositories.todo_repository import TodoRepository
+from app.utils.constants import DESCRIPTION_PREVIEW_CHARS, IMPORT_BATCH_SIZE
+from app.utils.todo_io import normalize_import_row
+from benchmarks.datagen import make_records
+
+PATHS = {
+    "ORM entities (get_all)": lambda repo: repo.get_all(),
+    "summaries, description preview": lambda repo: repo.get_summaries(
+        description_chars=DESCRIPTION_PREVIEW_CHARS + 1
+    ),
+    "projected rows, all columns": lambda repo: repo.get_columns(
+        [getattr(Todo, name) for name in TODO_FIELDS]
+    ),
+}
+
+
+async def seed(session_factory, rows: int, description_chars: int) -> None:
+    async with session_factory() as session:
+        repo = TodoRepository(session)
+        for offset in range(0, rows, IMPORT_BATCH_SIZE):
+            batch = make_records(min(IMPORT_BATCH_SIZE, rows - offset), seed=offset)
+            for record in batch:
+                record["description"] = (record["description"] or "").ljust(description_chars, ".")
+            await repo.bulk_insert([normalize_import_row(record) for record in batch])
+        await session.commit()
+
+
+async def measure(session_factory, load, trace: bool) -> tuple[float, int]:
+    async with session_factory() as session:
+        repo = TodoRepository(session)
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = await load(repo)
+        seconds = time.perf_counter() - start
+        held = 0
+        if trace:
+            held = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+        del result
+    return seconds, held
+
+
+async def run(rows: int, description_chars: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await seed(session_factory, rows, description_chars)
+
+        print(f"{rows} rows, descriptions of {description_chars} chars")
+        for name, load in PATHS.items():
+            await measure(session_factory, load, trace=False)  # warm up
+            seconds = min([(await measure(session_factory, load, trace=False))[0] for _ in range(3)])
+            _, held = await measure(session_factory, load, trace=True)
+            print(f"  {name:<34} {seconds * 1000:8.0f} ms  {held / 1024 / 1024:8.1f} MiB held")
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--description-chars", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.description_chars))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+List serialization throughput benchmark
+
+Compares encoding 10k todos the way FastAPI does for response_model=list[TodoRead]
+(validate every row into TodoRead, jsonable_encoder, json.dumps) with the
+direct path in app.api.responses, plus a sparse fieldset and compression.
+
+    python -m benchmarks.bench_serialization --rows 10000
+"""
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from app.api.responses import brotli, orjson, serialize_todos
+from app.domain.enums import TodoPriority
+from app.domain.models import Todo
+from app.domain.schemas import TodoRead
+from app.utils.constants import BROTLI_QUALITY, GZIP_LEVEL
+from benchmarks.datagen import make_records
+
+
+def make_todos(count: int) -> list[Todo]:
+    todos = []
+    for i, record in enumerate(make_records(count), start=1):
+        created = datetime.fromisoformat(record["created_at"]).astimezone(timezone.utc)
+        todos.append(Todo(
+            id=i,
+            title=record["title"],
+            description=record["description"],
+            completed=record["completed"],
+            priority=TodoPriority(record["priority"]),
+            created_at=created,
+            updated_at=created,
+            version=1,
+        ))
+    return todos
+
+
+def pydantic_path(todos: list[Todo]) -> bytes:
+    validated = [TodoRead.model_validate(todo) for todo in todos]
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode()
+
+
+def best_of(fn, repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    todos = make_todos(args.rows)
+    cases = {
+        "pydantic + json": lambda: pydantic_path(todos),
+        "direct": lambda: serialize_todos(todos),
+        "direct, fields=id,title,completed": lambda: serialize_todos(
+            todos, ("id", "title", "completed")
+        ),
+    }
+
+    print(f"{args.rows} rows, encoder={'orjson' if orjson else 'json'}")
+    baseline = None
+    for name, fn in cases.items():
+        seconds, body = best_of(fn, args.repeat)
+        baseline = baseline or seconds
+        print(
+            f"  {name:<36} {seconds * 1000:8.1f} ms  {args.rows / seconds:>10,.0f} rows/s  "
+            f"{len(body) / 1024:7.0f} KiB  x{baseline / seconds:.1f}"
+        )
+
+    body = serialize_todos(todos)
+    compressors = {"gzip": lambda: gzip.compress(body, compresslevel=GZIP_LEVEL)}
+    if brotli is not None:
+        compressors["br"] = lambda: brotli.compress(body, quality=BROTLI_QUALITY)
+    for name, fn in compressors.items():
+        seconds, compressed = best_of(fn, args.repeat)
+        print(
+            f"  {name + ' compress':<36} {seconds * 1000:8.1f} ms  "
+            f"{len(body) / 1024:.0f} KiB -> {len(compressed) / 1024:.0f} KiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
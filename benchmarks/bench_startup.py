@@ -0,0 +1,109 @@
+"""
+Startup time and memory per deployment role
+
+Starts the application in a fresh process for each scenario and reports
+the time to import app.main, the time to run the lifespan startup, the
+peak RSS and whether LangChain was loaded. "all + agent" also loads the
+agent stack, as the first agent request would. "create_all" starts with
+DB_CREATE_ALL_ON_STARTUP instead of the schema-version check.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --database-url postgresql+asyncpg://...
+
+The target database is initialised (tables created, schema stamped) first.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+SCENARIOS = {
+    "rest": {"APP_ROLE": "rest"},
+    "agent": {"APP_ROLE": "agent"},
+    "all": {"APP_ROLE": "all"},
+    "all + agent": {"APP_ROLE": "all", "LOAD_AGENT": "1"},
+    "all, create_all": {"APP_ROLE": "all", "DB_CREATE_ALL_ON_STARTUP": "true"},
+}
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def start_app() -> dict:
+    start = time.perf_counter()
+    from app.main import app, lifespan
+    imported = time.perf_counter()
+    if os.environ.get("LOAD_AGENT"):
+        from app.agents.executor import build_agent_executor  # noqa
+        from app.tools.todo_tools import build_todo_tools  # noqa
+    loaded = time.perf_counter()
+
+    async with lifespan(app):
+        started = time.perf_counter()
+
+    return {
+        "import_seconds": round(imported - start, 3),
+        "agent_seconds": round(loaded - imported, 3),
+        "startup_seconds": round(started - loaded, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "langchain": any(name.startswith("langchain") for name in sys.modules),
+    }
+
+
+async def init_database(database_url: str) -> None:
+    from app.db.schema import create_schema
+
+    engine = create_async_engine(database_url)
+    await create_schema(engine)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (best is shown)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(start_app())))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(init_database(database_url))
+        base_env = {
+            **os.environ,
+            "DATABASE_URL": database_url,
+            "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "unused"),
+            "OPENROUTER_MODEL": os.environ.get("OPENROUTER_MODEL", "openai/gpt-4o-mini"),
+        }
+        print(f"{'scenario':<16} {'import':>8} {'agent':>8} {'startup':>8} {'peak RSS':>10}  langchain")
+        for name, env in SCENARIOS.items():
+            runs = []
+            for _ in range(args.repeat):
+                output = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+                    env={**base_env, **env}, check=True, capture_output=True, text=True,
+                ).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r["import_seconds"] + r["agent_seconds"] + r["startup_seconds"])
+            print(
+                f"{name:<16} {best['import_seconds']:>7.2f}s {best['agent_seconds']:>7.2f}s "
+                f"{best['startup_seconds']:>7.3f}s {best['peak_rss_mb']:>7.1f} MB  {best['langchain']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Synthetic todo rows for benchmarks
+
+Titles and descriptions follow the shape of real todo lists rather than
+fixed-size strings: titles are mostly short ("Buy groceries") with a tail of
+longer ones carrying a time or a person, about 40% of todos have no
+description, and description lengths are log-normal (a sentence or two is
+common, a long note is rare, none is over the 2000-character limit).
+"""
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+VERBS = ["Buy", "Call", "Email", "Fix", "Review", "Write", "Plan", "Book", "Clean", "Pay"]
+OBJECTS = [
+    "groceries", "the dentist", "quarterly report", "kitchen sink", "pull request",
+    "blog post", "team offsite", "flight to Berlin", "garage", "electricity bill",
+]
+TITLE_SUFFIXES = [
+    "before Friday", "tomorrow morning", "for the kids", "with Sam", "after lunch",
+    "this weekend", "(again)", "- ask about the invoice", "before the meeting with finance",
+]
+SENTENCES = [
+    "Check the receipt from last month first.",
+    "Sam said the earlier slot is better.",
+    "Remember to bring the paperwork.",
+    "Compare at least three offers before deciding.",
+    "The link is in the shared folder.",
+    "Needs sign-off from the team lead.",
+    "Ask whether the discount still applies.",
+    "Blocked until the contractor replies.",
+    "Keep it under budget this time.",
+    "Follow up by email if nobody answers.",
+]
+MAX_DESCRIPTION_LENGTH = 2000
+
+
+def make_title(rng: random.Random, number: int) -> str:
+    title = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}"
+    if rng.random() < 0.25:
+        title += f" {rng.choice(TITLE_SUFFIXES)}"
+    return f"{title} #{number}"
+
+
+def make_description(rng: random.Random) -> str | None:
+    if rng.random() < 0.4:
+        return None
+    # Median of about two sentences, rarely more than twenty
+    sentences = max(1, round(rng.lognormvariate(math.log(2), 0.9)))
+    text = " ".join(rng.choices(SENTENCES, k=sentences))
+    return text[:MAX_DESCRIPTION_LENGTH]
+
+
+def make_records(count: int, seed: int = 42, start: int = 0) -> list[dict]:
+    """
+    Build count import records (as produced by /todos/export, without ids)
+
+    start numbers the titles and spaces the timestamps, so batches generated
+    with consecutive starts read as one list.
+    """
+    rng = random.Random(seed)
+    epoch = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    records = []
+    for i in range(start, start + count):
+        created = epoch + timedelta(minutes=i)
+        completed = rng.random() < 0.3
+        updated = created + timedelta(hours=rng.randint(1, 72)) if completed else created
+        records.append({
+            "title": make_title(rng, i),
+            "description": make_description(rng),
+            "completed": completed,
+            "priority": rng.choice(["low", "medium", "medium", "high"]),
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+        })
+    return records
@@ -0,0 +1,310 @@
+"""
+Load test of the /api/v1/todos routes
+
+Runs each scenario below with --concurrency clients sending requests
+back to back and reports throughput, p50/p95/p99 latency and errors per
+route. Scenarios run in order: "create" makes the todos that the get,
+update and delete scenarios then work on, so the seeded rows are only read.
+The list and export scenarios read the whole table and send
+--heavy-requests requests instead of --requests.
+
+    python -m benchmarks.load_test --rows 100000
+    python -m benchmarks.load_test --database-url postgresql+asyncpg://...
+    python -m benchmarks.load_test --base-url http://localhost:8000 --label postgres
+    python -m benchmarks.load_test --compare benchmarks/results/<earlier run>.json
+
+Without --base-url the application runs in this process (through the ASGI
+transport, so the numbers include no network or server workers): against a
+temporary SQLite database seeded with --rows todos, or against
+--database-url as it is (seed it with benchmarks.seed). Results are saved
+as JSON under benchmarks/results/ unless --output says otherwise.
+
+The /changes SSE and WebSocket streams are not covered: they are long-lived
+connections, not request/response routes.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.datagen import make_records
+from benchmarks.seed import configure_app, seed
+
+PREFIX = "/api/v1/todos"
+RESULTS_DIR = Path(__file__).parent / "results"
+IMPORT_BODY = "".join(json.dumps(r) + "\n" for r in make_records(100, seed=7)).encode()
+
+
+class State:
+    """Todos created by the run, shared by the scenarios that follow"""
+
+    def __init__(self):
+        self.ids: list[int] = []
+        self.etags: dict[int, str] = {}
+        self.list_etag: str | None = None
+        self.next = 0
+
+    def pick(self) -> int:
+        self.next += 1
+        return self.ids[self.next % len(self.ids)]
+
+    def take(self) -> int | None:
+        return self.ids.pop() if self.ids else None
+
+
+@dataclass
+class Scenario:
+    name: str
+    send: Callable[[httpx.AsyncClient, State], Awaitable[httpx.Response]]
+    expect: tuple[int, ...] = (200,)
+    heavy: bool = False
+    needs_todos: bool = False
+    # Run once before the timed requests
+    prepare: Callable[[httpx.AsyncClient, State], Awaitable[None]] | None = None
+
+
+async def create(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    record = make_records(1, seed=len(state.ids))[0]
+    response = await client.post(f"{PREFIX}/", json={
+        "title": record["title"],
+        "description": record["description"],
+        "priority": record["priority"],
+    })
+    if response.status_code == 201:
+        todo_id = response.json()["id"]
+        state.ids.append(todo_id)
+        state.etags[todo_id] = response.headers["ETag"]
+    return response
+
+
+async def update(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    todo_id = state.pick()
+    response = await client.put(f"{PREFIX}/{todo_id}", json={"completed": todo_id % 2 == 0})
+    if response.status_code == 200:
+        state.etags[todo_id] = response.headers["ETag"]
+    return response
+
+
+async def get_not_modified(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    todo_id = state.pick()
+    return await client.get(
+        f"{PREFIX}/{todo_id}", headers={"If-None-Match": state.etags[todo_id]}
+    )
+
+
+async def fetch_list_etag(client: httpx.AsyncClient, state: State) -> None:
+    state.list_etag = (await client.get(f"{PREFIX}/")).headers["ETag"]
+
+
+async def list_not_modified(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    return await client.get(f"{PREFIX}/", headers={"If-None-Match": state.list_etag})
+
+
+async def delete(client: httpx.AsyncClient, state: State) -> httpx.Response:
+    todo_id = state.take()
+    return await client.delete(f"{PREFIX}/{todo_id if todo_id is not None else 0}")
+
+
+SCENARIOS = [
+    Scenario("create", create, expect=(201,)),
+    Scenario("get", lambda client, state: client.get(f"{PREFIX}/{state.pick()}"), needs_todos=True),
+    Scenario("get 304", get_not_modified, expect=(304,), needs_todos=True),
+    Scenario("update", update, needs_todos=True),
+    Scenario("list", lambda client, state: client.get(f"{PREFIX}/"), heavy=True),
+    Scenario(
+        "list completed=false",
+        lambda client, state: client.get(f"{PREFIX}/", params={"completed": "false"}),
+        heavy=True,
+    ),
+    Scenario(
+        "list fields=id,title",
+        lambda client, state: client.get(f"{PREFIX}/", params={"fields": "id,title"}),
+        heavy=True,
+    ),
+    Scenario("list 304", list_not_modified, expect=(304,), prepare=fetch_list_etag),
+    Scenario("sync", lambda client, state: client.get(f"{PREFIX}/sync")),
+    Scenario("export", lambda client, state: client.get(f"{PREFIX}/export"), heavy=True),
+    Scenario(
+        "import 100",
+        lambda client, state: client.post(
+            f"{PREFIX}/import", content=IMPORT_BODY, headers={"Content-Type": "application/x-ndjson"}
+        ),
+    ),
+    Scenario("delete", delete, expect=(204,)),
+]
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, state: State, requests: int, concurrency: int
+) -> dict:
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await scenario.send(client, state)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if status not in scenario.expect:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    seconds = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+async def run(client: httpx.AsyncClient, args) -> dict:
+    state = State()
+    results = {}
+    for scenario in SCENARIOS:
+        if args.scenario and scenario.name not in args.scenario:
+            continue
+        if scenario.needs_todos and not state.ids:
+            print(f"{scenario.name:<22} skipped (needs the create scenario)")
+            continue
+        if scenario.prepare is not None:
+            await scenario.prepare(client, state)
+        requests = args.heavy_requests if scenario.heavy else args.requests
+        result = await run_scenario(client, scenario, state, requests, args.concurrency)
+        results[scenario.name] = result
+        print_result(scenario.name, result)
+    return results
+
+
+async def run_in_process(args) -> dict:
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        # Unhandled errors (e.g. SQLite "database is locked") count as 500s
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run(client, args)
+
+
+async def run_remote(base_url: str, args) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        return await run(client, args)
+
+
+def print_result(name: str, result: dict) -> None:
+    errors = sum(result["errors"].values())
+    print(
+        f"{name:<22} {result['requests']:>6} req  {result['requests_per_second']:>8.1f} req/s  "
+        f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+        f"p99 {result['p99_ms']:>8.2f} ms  errors {errors}"
+    )
+
+
+def print_comparison(results: dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())["scenarios"]
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        throughput = (result["requests_per_second"] / before["requests_per_second"] - 1) * 100
+        p95 = (result["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(f"{name:<22} req/s {throughput:>+7.1f}%  p95 {p95:>+7.1f}%")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="Load test a running server instead of an in-process app")
+    parser.add_argument("--database-url", help="In-process only; defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=10_000, help="Todos seeded into the temporary database")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--heavy-requests", type=int, default=20, help="Requests per whole-table scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenario", action="append", help="Only run this scenario (repeatable)")
+    parser.add_argument("--label", help="Database name recorded in the results (e.g. sqlite, postgres)")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = None
+        if args.base_url:
+            target = args.base_url
+            results = asyncio.run(run_remote(args.base_url, args))
+        else:
+            target = args.database_url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+            configure_app(target)
+            if not args.database_url:
+                seeded = asyncio.run(seed(target, args.rows))
+                rows = seeded["rows"]
+                print(f"Seeded {rows} todos in {seeded['seconds']:.2f}s")
+            results = asyncio.run(run_in_process(args))
+
+    label = args.label or ("postgres" if "postgresql" in target else "sqlite" if "sqlite" in target else "server")
+    timestamp = datetime.now(timezone.utc)
+    output = args.output or RESULTS_DIR / f"{timestamp:%Y%m%dT%H%M%SZ}-{label}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "timestamp": timestamp.isoformat(),
+            "commit": git_commit(),
+            "database": label,
+            "target": "server" if args.base_url else "in-process",
+            "seeded_rows": rows,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "argv": sys.argv[1:],
+        },
+        "scenarios": results,
+    }, indent=2))
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Bulk seed a database with synthetic todos
+
+Creates the schema (stamped, so the application starts against it) and
+loads --rows todos from benchmarks.datagen through TodoService.import_records:
+COPY on Postgres, executemany INSERTs elsewhere, in one transaction.
+
+    python -m benchmarks.seed --rows 100000 --database-url sqlite+aiosqlite:///./bench.db
+    python -m benchmarks.seed --rows 1000000 --database-url postgresql+asyncpg://... --reset
+
+--database-url defaults to DATABASE_URL. A database that already holds todos
+is left alone unless --reset deletes them first.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.schema import create_schema
+from app.domain.models import Todo
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+from app.utils.constants import IMPORT_BATCH_SIZE
+from benchmarks.datagen import make_records
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+async def iter_records(rows: int):
+    """(line number, record) pairs, generated IMPORT_BATCH_SIZE at a time"""
+    for offset in range(0, rows, IMPORT_BATCH_SIZE):
+        batch = make_records(min(IMPORT_BATCH_SIZE, rows - offset), seed=offset, start=offset)
+        for line_no, record in enumerate(batch, start=offset + 1):
+            yield line_no, record
+
+
+async def seed(database_url: str, rows: int, reset: bool = False) -> dict:
+    """Create the schema and load rows todos; returns the count and timing"""
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        await create_schema(engine)
+        async with session_factory() as session:
+            service = TodoService(TodoRepository(session))
+            existing = (await session.execute(select(func.count(Todo.id)))).scalar_one()
+            if existing and not reset:
+                raise SystemExit(f"Database already holds {existing} todos; pass --reset to replace them")
+            if existing:
+                await service.delete_all()
+            start = time.perf_counter()
+            count = await service.import_records(iter_records(rows), batch_size=IMPORT_BATCH_SIZE)
+            seconds = time.perf_counter() - start
+    finally:
+        await engine.dispose()
+    return {
+        "rows": count,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(count / seconds) if seconds else 0,
+    }
+
+
+def configure_app(database_url: str) -> None:
+    """
+    Point the application settings at database_url
+
+    Settings are cached on first use, and seeding uses them (the change
+    recorder), so call this before either.
+    """
+    os.environ.update({
+        "DATABASE_URL": database_url,
+        "APP_ROLE": "rest",
+        "OPENROUTER_API_KEY": os.environ.get("OPENROUTER_API_KEY", "unused"),
+        "OPENROUTER_MODEL": os.environ.get("OPENROUTER_MODEL", "openai/gpt-4o-mini"),
+    })
+
+
+def parse_rows(value: str) -> int:
+    return SIZES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=parse_rows, default=SIZES["100k"], help="A count, or 10k/100k/1m")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"))
+    parser.add_argument("--reset", action="store_true", help="Delete existing todos first")
+    args = parser.parse_args()
+    if not args.database_url:
+        sys.exit("Pass --database-url or set DATABASE_URL")
+    configure_app(args.database_url)
+
+    result = asyncio.run(seed(args.database_url, args.rows, args.reset))
+    print(
+        f"Seeded {result['rows']} todos in {result['seconds']:.2f}s "
+        f"({result['rows_per_second']} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
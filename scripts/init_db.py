@@ -1,7 +1,8 @@
 """
 Database initialization script
 
-Run this to create all database tables.
+Run this to create all database tables and stamp the schema version the
+application checks on startup.
 """
 
 import asyncio
@@ -11,9 +12,8 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.db.base import Base
+from app.db.schema import create_schema
 from app.db.session import engine
-from app.domain.models import Todo  # noqa - Import to register models
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -23,14 +23,9 @@ async def init_db():
     """Initialize the database by creating all tables"""
     logger.info("Creating database tables...")
     
-    async with engine.begin() as conn:
-        # Drop all tables (use with caution!)
-        # await conn.run_sync(Base.metadata.drop_all)
-        
-        # Create all tables
-        await conn.run_sync(Base.metadata.create_all)
+    version = await create_schema(engine)
     
-    logger.info("Database tables created successfully!")
+    logger.info(f"Database tables created successfully (schema {version})!")
 
 
 async def main():
@@ -0,0 +1,99 @@
+"""
+Bulk export/import of todos from the command line
+
+Examples:
+    python scripts/todos_io.py export --format ndjson --output todos.ndjson
+    python scripts/todos_io.py import --format csv --input todos.csv --keep-ids
+
+Exports stream from a server-side cursor; imports load through Postgres
+COPY (executemany on other databases) in a single transaction.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.db.session import AsyncSessionLocal, router
+from app.repositories.todo_repository import TodoRepository
+from app.services.todo_service import TodoService
+from app.core.logging import get_logger
+from app.utils.constants import EXPORT_BATCH_SIZE, IMPORT_BATCH_SIZE
+from app.utils.todo_io import encode_csv, encode_ndjson, iter_csv_records, iter_ndjson_records
+
+logger = get_logger(__name__)
+
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+async def export_todos(output: Path, fmt: str) -> int:
+    """Write every todo to output and return the number of rows"""
+    rows = 0
+    async with AsyncSessionLocal() as session:
+        service = TodoService(TodoRepository(session))
+        with output.open("w", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                f.write(encode_csv([], header=True))
+            async for batch in service.export_batches(EXPORT_BATCH_SIZE):
+                f.write(encode_csv(batch) if fmt == "csv" else encode_ndjson(batch))
+                rows += len(batch)
+    return rows
+
+
+async def read_chunks(path: Path):
+    with path.open("rb") as f:
+        while chunk := f.read(READ_CHUNK_BYTES):
+            yield chunk
+
+
+async def import_todos(input_path: Path, fmt: str, keep_ids: bool) -> int:
+    """Load todos from input_path and return the number of rows"""
+    parse = iter_csv_records if fmt == "csv" else iter_ndjson_records
+    async with AsyncSessionLocal() as session:
+        service = TodoService(TodoRepository(session))
+        return await service.import_records(
+            parse(read_chunks(input_path)), batch_size=IMPORT_BATCH_SIZE, keep_ids=keep_ids
+        )
+
+
+async def main(args: argparse.Namespace) -> int:
+    start = time.perf_counter()
+    try:
+        if args.command == "export":
+            rows = await export_todos(args.output, args.format)
+        else:
+            rows = await import_todos(args.input, args.format, args.keep_ids)
+    except Exception as e:
+        logger.error(f"{args.command.capitalize()} failed: {e}")
+        return 1
+    finally:
+        await router.dispose()
+
+    seconds = time.perf_counter() - start
+    logger.info(f"{args.command.capitalize()}ed {rows} todos in {seconds:.2f}s "
+                f"({rows / seconds if seconds else 0:.0f} rows/sec)")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk export/import todos")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export all todos to a file")
+    export_parser.add_argument("--output", type=Path, required=True)
+    export_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+
+    import_parser = subparsers.add_parser("import", help="Import todos from a file")
+    import_parser.add_argument("--input", type=Path, required=True)
+    import_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    import_parser.add_argument("--keep-ids", action="store_true",
+                               help="Keep ids from the file (restore a backup)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))